@@ -1,8 +1,16 @@
 from django.contrib import admin
 from .models import (
     CategorieProduit, Produit, Client, Fournisseur, Vente, LigneVente,
-    Achat, LigneAchat, MouvementStock, Employe, Salaire, Transaction
+    Achat, LigneAchat, MouvementStock, Employe, Salaire, Transaction,
+    VenteDailyRollup, ProduitMonthlyStats, ClientMonthlyStats
 )
+from .pagination import EstimatedCountPaginator
+
+
+class EstimatedCountAdmin(admin.ModelAdmin):
+    """Changelist des grandes tables : total estimé, sans second COUNT(*) non filtré."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(CategorieProduit)
 class CategorieProduitAdmin(admin.ModelAdmin):
@@ -46,7 +54,7 @@ class AchatAdmin(admin.ModelAdmin):
     inlines = [LigneAchatInline]
 
 @admin.register(MouvementStock)
-class MouvementStockAdmin(admin.ModelAdmin):
+class MouvementStockAdmin(EstimatedCountAdmin):
     list_display = ("id","produit","type","quantite","date","source_type","source_id")
     list_filter = ("type","date")
 
@@ -61,6 +69,22 @@ class SalaireAdmin(admin.ModelAdmin):
     list_filter = ("periode",)
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(EstimatedCountAdmin):
     list_display = ("id","type","module","reference_id","montant","date")
-    list_filter = ("type","module","date")
\ No newline at end of file
+    list_filter = ("type","module","date")
+
+@admin.register(VenteDailyRollup)
+class VenteDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("jour","total","nombre")
+    date_hierarchy = "jour"
+
+
+@admin.register(ProduitMonthlyStats)
+class ProduitMonthlyStatsAdmin(admin.ModelAdmin):
+    list_display = ("produit","mois","quantite","chiffre_affaires","remise")
+    list_filter = ("mois",)
+
+@admin.register(ClientMonthlyStats)
+class ClientMonthlyStatsAdmin(admin.ModelAdmin):
+    list_display = ("client","mois","nombre_ventes","chiffre_affaires")
+    list_filter = ("mois",)
@@ -0,0 +1,93 @@
+"""
+Instantanés (snapshots) versionnés stockés dans le cache Django.
+
+Chaque snapshot est rangé sous une clé ``<nom>:v<version>``. Les signaux
+incrémentent la version après commit, ce qui invalide l'entrée sans avoir
+à la supprimer. Pour qu'une rafale d'écritures ne provoque pas une rafale
+de recalculs, le dernier snapshot calculé reste servi (statut ``STALE``)
+tant qu'il a moins de ``DASHBOARD_CACHE_DEBOUNCE`` secondes.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DASHBOARD_STATS = "dashboard:kpis"
+HISTORIQUE_VENTES = "dashboard:historique"
+REFERENCE_CATEGORIES = "reference:categories"
+REFERENCE_PRODUITS = "reference:produits"
+
+HIT = "HIT"
+MISS = "MISS"
+STALE = "STALE"
+
+
+def _ttl():
+    return getattr(settings, "DASHBOARD_CACHE_TTL", 300)
+
+
+def _debounce():
+    return getattr(settings, "DASHBOARD_CACHE_DEBOUNCE", 2)
+
+
+def version_courante(nom):
+    cle = f"{nom}:version"
+    # Version initiale horodatée : pas de collision si le compteur est évincé
+    cache.add(cle, int(time.time()), None)
+    return cache.get(cle)
+
+
+def incrementer_version(nom):
+    cle = f"{nom}:version"
+    try:
+        return cache.incr(cle)
+    except ValueError:
+        cache.set(cle, int(time.time()), None)
+        return cache.get(cle)
+
+
+def invalider(nom):
+    """Invalide un snapshot une fois la transaction courante validée."""
+    transaction.on_commit(lambda: incrementer_version(nom))
+
+
+def snapshot(nom, calcul, variante=""):
+    """
+    Retourne ``(donnees, statut)`` où statut vaut HIT, STALE ou MISS.
+    ``calcul`` n'est appelé que sur MISS. Les variantes (paramètres de la
+    requête) d'un même snapshot partagent sa version et son invalidation.
+    """
+    donnees, statut, version = lire(nom, variante)
+    if statut != MISS:
+        return donnees, statut
+
+    donnees = calcul()
+    # Version lue avant le calcul : une écriture concurrente reste visible
+    stocker(nom, donnees, variante, version)
+    return donnees, MISS
+
+
+def lire(nom, variante=""):
+    """
+    Première moitié de ``snapshot`` : ``(donnees, statut, version)``, avec
+    ``donnees`` à None sur MISS ; le résultat du calcul est alors à passer
+    à ``stocker`` avec cette version.
+    """
+    version = version_courante(nom)
+    donnees = cache.get(f"{nom}:v{version}:{variante}")
+    if donnees is not None:
+        return donnees, HIT, version
+
+    dernier = cache.get(f"{nom}:dernier:{variante}")
+    if dernier and time.time() - dernier["calcule_le"] < _debounce():
+        return dernier["donnees"], STALE, version
+    return None, MISS, version
+
+
+def stocker(nom, donnees, variante="", version=None):
+    """Enregistre un snapshot déjà calculé (par défaut pour la version courante)."""
+    if version is None:
+        version = version_courante(nom)
+    cache.set(f"{nom}:v{version}:{variante}", donnees, _ttl())
+    cache.set(f"{nom}:dernier:{variante}", {"donnees": donnees, "calcule_le": time.time()}, _ttl())
@@ -0,0 +1,220 @@
+"""
+Diffusion en temps réel des variations de KPI (Server-Sent Events).
+
+Chaîne de traitement :
+
+1. les signaux publient, après commit, un message ``changement`` sur le
+   backend configuré (``EVENTS_BACKEND``) ;
+2. chaque processus écoute ce backend ; ``DiffuseurKpi`` regroupe les
+   changements reçus pendant ``EVENTS_COALESCE`` secondes, recalcule les
+   KPI une seule fois et ne garde que ceux qui ont changé ;
+3. ``Broadcaster`` pousse ce delta dans la file de chaque flux SSE ouvert
+   dans le processus.
+
+``LocalBackend`` ne diffuse qu'au sein du processus courant ;
+``PostgresNotifyBackend`` passe par LISTEN/NOTIFY pour partager les
+événements entre plusieurs workers.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# Backends de transport
+# ─────────────────────────────────────────────
+class LocalBackend:
+    """Transport en mémoire : les messages ne quittent pas le processus."""
+
+    def __init__(self):
+        self._callbacks = []
+
+    def demarrer(self, callback):
+        self._callbacks.append(callback)
+
+    def publier(self, message):
+        for callback in list(self._callbacks):
+            callback(message)
+
+
+class PostgresNotifyBackend:
+    """Transport via PostgreSQL LISTEN/NOTIFY, partagé entre workers."""
+
+    canal = "mutooni_evenements"
+
+    def __init__(self):
+        self._callbacks = []
+        self._thread = None
+        self._verrou = threading.Lock()
+
+    def demarrer(self, callback):
+        self._callbacks.append(callback)
+        with self._verrou:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._ecouter, name="events-listen", daemon=True)
+                self._thread.start()
+
+    def publier(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.canal, json.dumps(message)])
+
+    def _ecouter(self):
+        import psycopg2
+
+        while True:
+            try:
+                conn = psycopg2.connect(**connection.get_connection_params())
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.canal}"')
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._distribuer(conn.notifies.pop(0).payload)
+            except psycopg2.Error:
+                logger.exception("Écoute LISTEN/NOTIFY interrompue, reconnexion dans 5 s")
+                time.sleep(5)
+
+    def _distribuer(self, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Notification illisible : %r", payload)
+            return
+        for callback in list(self._callbacks):
+            callback(message)
+
+
+_backend = None
+_backend_verrou = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_verrou:
+        if _backend is None:
+            chemin = getattr(settings, "EVENTS_BACKEND", "core.events.LocalBackend")
+            _backend = import_string(chemin)()
+        return _backend
+
+
+def publier_changement(modele, pk, action):
+    """Publie un changement (à appeler après commit)."""
+    try:
+        get_backend().publier({"type": "changement", "modele": modele, "id": pk, "action": action})
+    except Exception:
+        # La diffusion temps réel ne doit jamais faire échouer une écriture
+        logger.exception("Publication de l'événement %s #%s impossible", modele, pk)
+
+
+# ─────────────────────────────────────────────
+# Fan-out vers les flux SSE du processus
+# ─────────────────────────────────────────────
+class Broadcaster:
+    """Répartit chaque message dans la file asyncio de chaque abonné."""
+
+    taille_file = 100
+
+    def __init__(self):
+        self._abonnes = {}  # file -> boucle asyncio propriétaire
+        self._verrou = threading.Lock()
+
+    def abonner(self):
+        file = asyncio.Queue(maxsize=self.taille_file)
+        with self._verrou:
+            self._abonnes[file] = asyncio.get_running_loop()
+        return file
+
+    def desabonner(self, file):
+        with self._verrou:
+            self._abonnes.pop(file, None)
+
+    @property
+    def nombre_abonnes(self):
+        return len(self._abonnes)
+
+    def diffuser(self, message):
+        """Utilisable depuis n'importe quel thread."""
+        with self._verrou:
+            abonnes = list(self._abonnes.items())
+        for file, boucle in abonnes:
+            try:
+                boucle.call_soon_threadsafe(self._deposer, file, message)
+            except RuntimeError:
+                # Boucle fermée : l'abonné a disparu sans se désabonner
+                self.desabonner(file)
+
+    @staticmethod
+    def _deposer(file, message):
+        try:
+            file.put_nowait(message)
+        except asyncio.QueueFull:
+            # Client trop lent : le message est ignoré plutôt que de bloquer les autres
+            pass
+
+
+class DiffuseurKpi:
+    """Transforme les changements reçus en deltas de KPI (un calcul par rafale)."""
+
+    def __init__(self, broadcaster, calcul=None):
+        self.broadcaster = broadcaster
+        self._calcul = calcul
+        self._derniers = None
+        self._planifie = False
+        self._verrou = threading.Lock()
+        self._demarre = False
+
+    def demarrer(self):
+        with self._verrou:
+            if self._demarre:
+                return
+            self._demarre = True
+        get_backend().demarrer(self.recevoir)
+
+    def recevoir(self, message):
+        if message.get("type") != "changement" or not self.broadcaster.nombre_abonnes:
+            return
+        with self._verrou:
+            if self._planifie:
+                return
+            self._planifie = True
+        delai = getattr(settings, "EVENTS_COALESCE", 0.5)
+        threading.Timer(delai, self._calculer_et_diffuser).start()
+
+    def calculer_delta(self):
+        if self._calcul is None:
+            from core.views.dashboard import calculer_stats_dashboard
+            self._calcul = calculer_stats_dashboard
+        kpis = self._calcul()
+        precedents = self._derniers or {}
+        self._derniers = kpis
+        return {nom: valeur for nom, valeur in kpis.items() if precedents.get(nom) != valeur}
+
+    def _calculer_et_diffuser(self):
+        with self._verrou:
+            self._planifie = False
+        try:
+            delta = self.calculer_delta()
+        except Exception:
+            logger.exception("Calcul des KPI pour le flux temps réel impossible")
+            return
+        finally:
+            # Thread éphémère : sa connexion ne sera jamais réutilisée
+            connection.close()
+        if delta:
+            self.broadcaster.diffuser({"type": "kpis", "kpis": delta})
+
+
+broadcaster = Broadcaster()
+diffuseur_kpi = DiffuseurKpi(broadcaster)
@@ -0,0 +1,39 @@
+"""
+FilterSets partagés par les ViewSets de core.
+
+Les filtres de date sont traduits en intervalles semi-ouverts
+``[début, fin)`` sur la colonne ``date`` brute (cf. core.utils.intervalle_jours)
+afin de rester compatibles avec les index composites.
+"""
+import django_filters
+
+from core.models import MouvementStock, Transaction
+from core.utils import debut_du_jour, intervalle_jours
+
+
+class PeriodeFilterSet(django_filters.FilterSet):
+    date = django_filters.DateFilter(method="filtrer_jour", help_text="Jour exact (AAAA-MM-JJ)")
+    date_debut = django_filters.DateFilter(method="filtrer_debut", help_text="À partir de ce jour inclus")
+    date_fin = django_filters.DateFilter(method="filtrer_fin", help_text="Jusqu'à ce jour inclus")
+
+    def filtrer_jour(self, queryset, name, value):
+        debut, fin = intervalle_jours(value, value)
+        return queryset.filter(date__gte=debut, date__lt=fin)
+
+    def filtrer_debut(self, queryset, name, value):
+        return queryset.filter(date__gte=debut_du_jour(value))
+
+    def filtrer_fin(self, queryset, name, value):
+        return queryset.filter(date__lt=intervalle_jours(value, value)[1])
+
+
+class MouvementStockFilterSet(PeriodeFilterSet):
+    class Meta:
+        model = MouvementStock
+        fields = ["produit", "type"]
+
+
+class TransactionFilterSet(PeriodeFilterSet):
+    class Meta:
+        model = Transaction
+        fields = ["type", "module"]
@@ -0,0 +1,151 @@
+"""
+Requêtes de création idempotentes (en-tête ``Idempotency-Key``).
+
+Un terminal qui renvoie un POST après une coupure réseau le rejoue avec
+la même clé : la première exécution est mémorisée dans
+``RequeteIdempotente`` (statut, corps et en-têtes de la réponse) et les
+suivantes reçoivent cette réponse, marquée ``Idempotent-Replayed: true``,
+sans que la vue soit exécutée de nouveau. Les clés sont propres à chaque
+utilisateur et expirent après ``API_IDEMPOTENCE_TTL`` heures
+(``manage.py purger_idempotence`` supprime les entrées expirées).
+
+La ligne est insérée avant l'exécution et sert de verrou : la contrainte
+d'unicité (utilisateur, clé) ne laisse passer qu'une requête. Une requête
+concurrente portant la même clé attend jusqu'à
+``API_IDEMPOTENCE_ATTENTE`` secondes que la première se termine, puis
+rejoue sa réponse (409 si elle est toujours en cours). La table plutôt
+que le cache : les backends configurés (locmem, fichiers) ne sont pas
+partagés de façon atomique entre processus.
+
+Une même clé réutilisée pour un autre corps ou une autre URL est refusée
+(422). Une exception ou une réponse 5xx libère la clé : le client peut
+réessayer.
+"""
+import hashlib
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from core.models import RequeteIdempotente
+
+ENTETE = 'Idempotency-Key'
+LONGUEUR_MAX = 255
+# Au-delà, une requête restée « en cours » est considérée comme abandonnée (processus arrêté)
+DUREE_ABANDON = timedelta(minutes=5)
+PAUSE_MAX = 0.5
+
+
+class RequeteEnCours(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Une requête portant cette clé d'idempotence est en cours de traitement."
+    default_code = 'requete_en_cours'
+
+
+class CleReutilisee(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Cette clé d'idempotence a déjà servi pour une autre requête."
+    default_code = 'cle_reutilisee'
+
+
+def idempotent(methode):
+    """Décore une méthode de vue (POST) : voir le docstring du module."""
+    @wraps(methode)
+    def executer(vue, request, *args, **kwargs):
+        return executer_une_fois(request, lambda: methode(vue, request, *args, **kwargs))
+    return executer
+
+
+def empreinte(request):
+    try:
+        corps = request.body
+    except RawPostDataException:
+        # Corps déjà lu par un parseur de formulaire
+        corps = repr(sorted(request.data.lists())).encode()
+    contenu = hashlib.sha256()
+    for morceau in (request.method.encode(), request.get_full_path().encode(), corps):
+        contenu.update(morceau)
+        contenu.update(b'\0')
+    return contenu.hexdigest()
+
+
+def executer_une_fois(request, traitement):
+    cle = request.headers.get(ENTETE)
+    if not cle or not request.user.is_authenticated:
+        return traitement()
+    if len(cle) > LONGUEUR_MAX:
+        raise ValidationError({ENTETE: f"{LONGUEUR_MAX} caractères au plus."})
+
+    entree, reservee = reserver(request.user, cle, empreinte(request))
+    if not reservee:
+        return rejouer(entree)
+
+    try:
+        response = traitement()
+    except BaseException:
+        entree.delete()
+        raise
+    if not isinstance(response, Response) or response.status_code >= 500:
+        entree.delete()
+        return response
+
+    entree.statut, entree.reponse = response.status_code, response.data
+    entree.entetes = dict(response.items())
+    entree.save(update_fields=['statut', 'reponse', 'entetes'])
+    return response
+
+
+def reserver(utilisateur, cle, signature):
+    """
+    Retourne ``(entrée, True)`` si la clé vient d'être réservée pour cette
+    requête, ``(entrée terminée, False)`` si sa réponse est à rejouer.
+    """
+    attente = getattr(settings, 'API_IDEMPOTENCE_ATTENTE', 10)
+    fin, pause = time.monotonic() + attente, 0.02
+    while True:
+        maintenant = timezone.now()
+        try:
+            with transaction.atomic():
+                return RequeteIdempotente.objects.create(
+                    utilisateur=utilisateur, cle=cle, empreinte=signature,
+                    expire=maintenant + timedelta(hours=getattr(settings, 'API_IDEMPOTENCE_TTL', 24)),
+                ), True
+        except IntegrityError:
+            pass
+
+        entree = RequeteIdempotente.objects.filter(utilisateur=utilisateur, cle=cle).first()
+        if entree is None:
+            continue  # libérée entre-temps
+        if entree.expire <= maintenant or (entree.statut is None and entree.date <= maintenant - DUREE_ABANDON):
+            RequeteIdempotente.objects.filter(pk=entree.pk, statut=entree.statut).delete()
+            continue
+        if entree.empreinte != signature:
+            raise CleReutilisee()
+        if entree.statut is not None:
+            return entree, False
+        if time.monotonic() >= fin:
+            raise RequeteEnCours()
+        time.sleep(pause)
+        pause = min(pause * 2, PAUSE_MAX)
+
+
+def rejouer(entree):
+    response = Response(entree.reponse, status=entree.statut)
+    for nom, valeur in entree.entetes.items():
+        if nom.lower() not in ('content-type', 'content-length'):
+            response[nom] = valeur
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def purger():
+    """Supprime les entrées expirées ; retourne leur nombre."""
+    nombre, _ = RequeteIdempotente.objects.filter(expire__lte=timezone.now()).delete()
+    return nombre
@@ -0,0 +1,116 @@
+"""
+Moteur d'indicateurs (KPI) du tableau de bord.
+
+Chaque KPI est une agrégation scalaire ``SELECT SUM(...) FROM ...`` ; les
+KPI demandés sont assemblés en sous-requêtes d'un unique ``SELECT`` afin
+de ne faire qu'un aller-retour vers la base, quel que soit leur nombre.
+``calculer_kpi`` calcule un KPI isolé, pour les exécuter en parallèle sur
+plusieurs connexions (core.views.asynchrone).
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import DecimalField, ExpressionWrapper, F, Func
+from django.utils import timezone
+
+from core.models import Achat, Produit, Vente
+from core.utils import intervalle_mois
+
+DEUX_DECIMALES = Decimal("0.01")
+MONTANT = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _somme(expression):
+    # Func (et non Sum) : pas de GROUP BY, la sous-requête renvoie toujours une ligne
+    return Func(expression, function="SUM", output_field=MONTANT)
+
+
+def _compte():
+    return Func(F("id"), function="COUNT")
+
+
+def _ventes_mois():
+    debut, fin = intervalle_mois(timezone.localdate())
+    return Vente.objects.filter(
+        statut="PAYEE", date__gte=debut, date__lt=fin
+    ).annotate(valeur=_somme(F("total")))
+
+
+def _achats_mois():
+    debut, fin = intervalle_mois(timezone.localdate())
+    return Achat.objects.filter(
+        statut__in=["PAYE", "PARTIEL"], date__gte=debut, date__lt=fin
+    ).annotate(valeur=_somme(F("total")))
+
+
+def _stock_unites():
+    return Produit.objects.annotate(valeur=_somme(F("stock_actuel")))
+
+
+def _stock_valeur():
+    return Produit.objects.annotate(
+        valeur=_somme(ExpressionWrapper(F("stock_actuel") * F("prix_unitaire"), output_field=MONTANT))
+    )
+
+
+def _creances_clients():
+    return Vente.objects.exclude(statut="ANNULEE").filter(
+        total__gt=F("montant_paye")
+    ).annotate(valeur=_somme(F("total") - F("montant_paye")))
+
+
+def _dettes_fournisseurs():
+    return Achat.objects.exclude(statut="ANNULE").filter(
+        total__gt=F("montant_paye")
+    ).annotate(valeur=_somme(F("total") - F("montant_paye")))
+
+
+def _produits_sous_seuil():
+    return Produit.objects.filter(stock_actuel__lt=F("seuil_min")).annotate(valeur=_compte())
+
+
+def _montant(valeur):
+    return Decimal(str(valeur or 0)).quantize(DEUX_DECIMALES)
+
+
+def _entier(valeur):
+    return int(valeur or 0)
+
+
+# nom du KPI -> (constructeur du queryset, conversion de la valeur brute)
+KPIS = {
+    "total_vente": (_ventes_mois, _montant),
+    "total_achat": (_achats_mois, _montant),
+    "total_stock": (_stock_unites, _entier),
+    "valeur_stock": (_stock_valeur, _montant),
+    "creances_clients": (_creances_clients, _montant),
+    "dettes_fournisseurs": (_dettes_fournisseurs, _montant),
+    "produits_sous_seuil": (_produits_sous_seuil, _entier),
+}
+
+
+def calculer_kpis(noms=None):
+    """Calcule les KPI demandés (tous par défaut) en une seule requête SQL."""
+    noms = list(KPIS) if noms is None else list(noms)
+    if not noms:
+        return {}
+
+    colonnes, params = [], []
+    for nom in noms:
+        queryset, _ = KPIS[nom]
+        sql, sql_params = queryset().order_by().values("valeur").query.sql_with_params()
+        colonnes.append(f"({sql})")
+        params.extend(sql_params)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT " + ", ".join(colonnes), params)
+        ligne = cursor.fetchone()
+
+    return {nom: KPIS[nom][1](valeur) for nom, valeur in zip(noms, ligne)}
+
+
+def calculer_kpi(nom):
+    """Calcule un seul KPI, en une requête."""
+    queryset, conversion = KPIS[nom]
+    valeurs = list(queryset().order_by().values_list("valeur", flat=True)[:1])
+    return conversion(valeurs[0] if valeurs else None)
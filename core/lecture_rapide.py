@@ -0,0 +1,158 @@
+"""
+Lecture rapide des listes : lignes construites depuis ``values()``.
+
+Sur les grandes listes (ventes et leurs lignes, mouvements de stock), la
+plus grande part du temps CPU passe dans l'instanciation des modèles et
+dans la boucle générique de ``Serializer.to_representation``. Un
+``PlanLecture`` est compilé à partir du sérialiseur existant : pour chaque
+champ lisible, la colonne à lire et un convertisseur équivalent à
+``field.to_representation`` (Decimal -> str, datetime -> ISO 8601). La
+sortie est identique à celle du sérialiseur :
+
+* ``StringRelatedField`` : ``str()`` des objets liés, chargés une fois par
+  page (``in_bulk``) ;
+* sérialiseur imbriqué ``many=True`` sur une relation inverse : une
+  requête ``values()`` pour toute la page, regroupée par parent.
+
+Un champ non pris en charge (méthode, propriété, source pointée...) rend
+le plan indisponible : la vue revient alors au sérialiseur.
+"""
+import decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+# Types de lignes d'un plan
+SIMPLE, TEXTE, IMBRIQUE = "simple", "texte", "imbrique"
+
+
+def _identite(valeur):
+    return valeur
+
+
+def convertisseur(champ):
+    """Équivalent précompilé de ``champ.to_representation`` (hors None)."""
+    if isinstance(champ, serializers.DecimalField):
+        en_texte = getattr(champ, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+        if en_texte and not champ.localize and not champ.normalize_output and champ.decimal_places is not None:
+            contexte = decimal.getcontext().copy()
+            if champ.max_digits is not None:
+                contexte.prec = champ.max_digits
+            pas = decimal.Decimal(".1") ** champ.decimal_places
+            arrondi = champ.rounding
+            return lambda v: "{:f}".format(v.quantize(pas, rounding=arrondi, context=contexte))
+        return champ.to_representation
+
+    if isinstance(champ, serializers.DateTimeField):
+        format_sortie = getattr(champ, "format", api_settings.DATETIME_FORMAT)
+        fuseau = champ.timezone if hasattr(champ, "timezone") else champ.default_timezone()
+        if format_sortie is None or format_sortie.lower() != "iso-8601" or fuseau is None:
+            return champ.to_representation
+
+        def iso(v):
+            texte = v.astimezone(fuseau).isoformat()
+            return texte[:-6] + "Z" if texte.endswith("+00:00") else texte
+        return iso
+
+    if isinstance(champ, serializers.ChoiceField):
+        choix = champ.choice_strings_to_values
+        return lambda v: choix.get(str(v), v)
+
+    # Valeurs déjà typées par la base : str() / int() seraient sans effet
+    if type(champ) in (serializers.CharField, serializers.EmailField, serializers.IntegerField):
+        return _identite
+    return champ.to_representation
+
+
+class PlanLecture:
+    """Plan de construction des lignes d'un sérialiseur de modèle."""
+
+    def __init__(self, modele, entrees):
+        self.modele = modele
+        self.entrees = entrees  # (type, nom, colonne, détail)
+
+    @classmethod
+    def depuis_serializer(cls, serializer):
+        """Compile le plan, ou retourne None si un champ n'est pas pris en charge."""
+        modele = serializer.Meta.model
+        entrees = []
+        for champ in serializer._readable_fields:
+            if champ.source == "*" or "." in champ.source:
+                return None
+            try:
+                champ_modele = modele._meta.get_field(champ.source)
+            except FieldDoesNotExist:
+                return None
+
+            if isinstance(champ, serializers.ListSerializer):
+                if not champ_modele.one_to_many or not isinstance(champ.child, serializers.ModelSerializer):
+                    return None
+                enfant = cls.depuis_serializer(champ.child)
+                if enfant is None:
+                    return None
+                entrees.append((IMBRIQUE, champ.field_name, champ_modele.field.attname, enfant))
+            elif isinstance(champ, serializers.StringRelatedField):
+                if not (champ_modele.many_to_one or champ_modele.one_to_one) or not champ_modele.concrete:
+                    return None
+                entrees.append((TEXTE, champ.field_name, champ_modele.attname, champ_modele.related_model))
+            elif isinstance(champ, serializers.PrimaryKeyRelatedField):
+                if not champ_modele.many_to_one or champ.pk_field is not None:
+                    return None
+                entrees.append((SIMPLE, champ.field_name, champ_modele.attname, _identite))
+            elif isinstance(champ, (serializers.BaseSerializer, serializers.RelatedField)) \
+                    or champ_modele.is_relation:
+                return None
+            else:
+                entrees.append((SIMPLE, champ.field_name, champ_modele.attname, convertisseur(champ)))
+        return cls(modele, entrees)
+
+    def colonnes(self, *supplementaires):
+        """Colonnes à passer à ``values()`` (clé primaire toujours incluse)."""
+        colonnes = [self.modele._meta.pk.attname]
+        for type_, _, colonne, _ in self.entrees:
+            if type_ != IMBRIQUE:
+                colonnes.append(colonne)
+        colonnes.extend(supplementaires)
+        return list(dict.fromkeys(colonnes))
+
+    def construire(self, lignes):
+        """Transforme des lignes ``values()`` en représentations sérialisées."""
+        lignes = list(lignes)
+        pk = self.modele._meta.pk.attname
+        textes, enfants = {}, {}
+        for type_, nom, colonne, detail in self.entrees:
+            if type_ == TEXTE:
+                ids = {ligne[colonne] for ligne in lignes} - {None}
+                textes[nom] = {i: str(o) for i, o in detail._default_manager.in_bulk(ids).items()}
+            elif type_ == IMBRIQUE:
+                enfants[nom] = detail.par_parent(colonne, [ligne[pk] for ligne in lignes])
+
+        resultat = []
+        for ligne in lignes:
+            sortie = {}
+            for type_, nom, colonne, detail in self.entrees:
+                if type_ == SIMPLE:
+                    valeur = ligne[colonne]
+                    sortie[nom] = None if valeur is None else detail(valeur)
+                elif type_ == TEXTE:
+                    valeur = ligne[colonne]
+                    sortie[nom] = None if valeur is None else textes[nom][valeur]
+                else:
+                    sortie[nom] = enfants[nom].get(ligne[pk], [])
+            resultat.append(sortie)
+        return resultat
+
+    def par_parent(self, cle, parents):
+        """Lignes enfants des ``parents``, regroupées par valeur de ``cle``."""
+        if not parents:
+            return {}
+        lignes = list(
+            self.modele._default_manager.filter(**{f"{cle}__in": parents})
+            .order_by(self.modele._meta.pk.attname)
+            .values(*self.colonnes(cle))
+        )
+        groupes = {}
+        for ligne, sortie in zip(lignes, self.construire(lignes)):
+            groupes.setdefault(ligne[cle], []).append(sortie)
+        return groupes
@@ -0,0 +1,84 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.compression import Gzip, Zstd, zstandard
+from core.models import Client, LigneVente, Produit, Vente
+from core.renderers import MessagePackRenderer, ORJSONRenderer
+from core.serializers import VenteSerializer
+
+
+class Annulation(Exception):
+    """Levée pour annuler les données de test en fin de mesure."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure, pour des pages de ventes (avec lignes) rendues en JSON et en MessagePack, "
+        "les octets économisés et le temps CPU de chaque codage de compression."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tailles", default="50,500", help="Ventes par réponse, séparées par des virgules")
+        parser.add_argument("--lignes", type=int, default=3, help="Lignes par vente")
+        parser.add_argument("--repetitions", type=int, default=20)
+
+    def handle(self, *args, **options):
+        tailles = [int(t) for t in options["tailles"].split(",")]
+        try:
+            with transaction.atomic():
+                self.generer(max(tailles), options["lignes"])
+                self.mesurer(tailles, options["repetitions"])
+                raise Annulation
+        except Annulation:
+            pass
+
+    def generer(self, nombre, lignes_par_vente):
+        clients = Client.objects.bulk_create(Client(nom=f"Client bench {i}") for i in range(50))
+        produits = Produit.objects.bulk_create(
+            Produit(nom=f"Produit bench {i}", unite="u", prix_unitaire=Decimal("1.50") + i) for i in range(50)
+        )
+        # bulk_create : pas de signaux, les agrégats ne sont pas touchés (et la transaction est annulée)
+        ventes = Vente.objects.bulk_create(
+            Vente(client=clients[i % 50], total=Decimal("4.50") + i, montant_paye=Decimal("4.50"), statut="PAYEE")
+            for i in range(nombre)
+        )
+        LigneVente.objects.bulk_create(
+            (
+                LigneVente(
+                    vente=vente, produit=produits[(vente.pk + j) % 50],
+                    quantite=Decimal(1 + j), prix_unitaire=Decimal("1.50") + j,
+                )
+                for vente in ventes for j in range(lignes_par_vente)
+            ),
+            batch_size=5000,
+        )
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(f"Base {connection.vendor} : seul le contenu importe ici."))
+
+    def mesurer(self, tailles, repetitions):
+        codecs = [Gzip(1), Gzip(6), Gzip(9)]
+        if zstandard is not None:
+            codecs += [Zstd(1), Zstd(3), Zstd(9)]
+        else:
+            self.stdout.write(self.style.WARNING("zstandard absent : zstd non mesuré."))
+
+        self.stdout.write(f"{'réponse':<22}{'codage':<9}{'octets':>10}{'compressé':>11}{'gain':>7}{'ms CPU':>9}")
+        queryset = Vente.objects.select_related("client").prefetch_related("lignes__produit").order_by("id")
+        for taille in tailles:
+            data = VenteSerializer(queryset[:taille], many=True).data
+            for format_, rendu in (("json", ORJSONRenderer().render), ("msgpack", MessagePackRenderer().render)):
+                contenu = rendu(data)
+                for codec in codecs:
+                    durees = []
+                    for _ in range(repetitions):
+                        debut = time.thread_time()
+                        compresse = codec.compresser(contenu)
+                        durees.append(time.thread_time() - debut)
+                    nom = f"{codec.nom}-{codec.niveau}"
+                    self.stdout.write(
+                        f"{f'{taille} ventes {format_}':<22}{nom:<9}{len(contenu):>10}{len(compresse):>11}"
+                        f"{1 - len(compresse) / len(contenu):>7.0%}{min(durees) * 1000:>9.2f}"
+                    )
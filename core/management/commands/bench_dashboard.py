@@ -0,0 +1,92 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncRequestFactory, override_settings
+
+from core.cache import MISS
+from core.views.asynchrone import DashboardStatsAsyncView, HistoriqueVentesAsyncView
+from core.views.dashboard import DashboardStatsView, HistoriqueVentesView
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la latence des vues synchrones et asynchrones du tableau de bord "
+        "sous charge concurrente, servies comme par le handler ASGI (à lancer sur PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requetes", type=int, default=200)
+        parser.add_argument("--concurrence", type=int, default=20)
+        parser.add_argument("--utilisateur", help="Nom de l'utilisateur au nom duquel interroger les vues")
+        parser.add_argument(
+            "--chaud", action="store_true",
+            help="Laisser le cache servir les réponses (par défaut chaque requête recalcule)"
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        utilisateur = (
+            User.objects.filter(username=options["utilisateur"]).first()
+            if options["utilisateur"] else User.objects.order_by("id").first()
+        )
+        if utilisateur is None:
+            raise CommandError("Aucun utilisateur disponible pour authentifier les requêtes.")
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                f"Base {connection.vendor} : résultats peu représentatifs de la production."
+            ))
+
+        cas = [
+            ("dashboard-stats", "/api/dashboard-stats/", DashboardStatsView, DashboardStatsAsyncView),
+            ("historique-ventes", "/api/stats/historique-ventes/?periode=semaine&jours=365",
+             HistoriqueVentesView, HistoriqueVentesAsyncView),
+        ]
+        # À froid, aucun snapshot n'est conservé : chaque requête de chaque vue recalcule
+        # (invalider entre les requêtes ne suffit pas, une requête concurrente peut remplir le cache)
+        reglages = {"DASHBOARD_CACHE_DEBOUNCE": 0} if options["chaud"] else {"DASHBOARD_CACHE_TTL": 0}
+        self.stdout.write(
+            f"{'vue':<20}{'mode':<8}{'moy. ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}{'MISS %':>8}"
+        )
+        with override_settings(**reglages):
+            for nom, url, vue_sync, vue_async in cas:
+                for mode, vue in (("sync", vue_sync.as_view()), ("async", vue_async.as_view())):
+                    latences, duree, calculs = asyncio.run(self._charger(vue, url, utilisateur, options))
+                    latences.sort()
+                    self.stdout.write(
+                        f"{nom:<20}{mode:<8}"
+                        f"{statistics.mean(latences):>10.2f}"
+                        f"{latences[len(latences) // 2]:>10.2f}"
+                        f"{latences[int(len(latences) * 0.95) - 1]:>10.2f}"
+                        f"{len(latences) / duree:>10.1f}"
+                        f"{100 * calculs / len(latences):>8.0f}"
+                    )
+
+    async def _charger(self, vue, url, utilisateur, options):
+        factory = AsyncRequestFactory()
+        asynchrone = asyncio.iscoroutinefunction(vue)
+        # Comme le handler ASGI : les vues synchrones passent par un thread
+        appeler = vue if asynchrone else sync_to_async(vue)
+        semaphore = asyncio.Semaphore(options["concurrence"])
+        latences = []
+        calculs = 0
+
+        async def une_requete():
+            nonlocal calculs
+            async with semaphore:
+                request = factory.get(url)
+                request.user = utilisateur
+                debut = time.perf_counter()
+                response = await appeler(request)
+                if hasattr(response, "render"):
+                    await sync_to_async(response.render)()
+                latences.append((time.perf_counter() - debut) * 1000)
+                calculs += response.get("X-Cache") == MISS
+
+        debut = time.perf_counter()
+        await asyncio.gather(*(une_requete() for _ in range(options["requetes"])))
+        return latences, time.perf_counter() - debut, calculs
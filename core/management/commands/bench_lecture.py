@@ -0,0 +1,85 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.lecture_rapide import PlanLecture
+from core.models import Client, LigneVente, Produit, Vente
+from core.serializers import VenteSerializer
+
+
+class Annulation(Exception):
+    """Levée pour annuler les données de test en fin de mesure."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit (lignes/s) de VenteSerializer(many=True) et de la lecture "
+        "rapide par values() sur des ventes générées puis annulées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ventes", type=int, default=2000)
+        parser.add_argument("--lignes", type=int, default=3, help="Lignes par vente")
+        parser.add_argument("--repetitions", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                f"Base {connection.vendor} : résultats peu représentatifs de la production."
+            ))
+        try:
+            with transaction.atomic():
+                self.generer(options["ventes"], options["lignes"])
+                self.mesurer(options)
+                raise Annulation
+        except Annulation:
+            pass
+
+    def generer(self, nombre, lignes_par_vente):
+        client = Client.objects.create(nom="Client bench")
+        produit = Produit.objects.create(nom="Produit bench", unite="u", prix_unitaire=Decimal("1.50"))
+        # bulk_create : pas de signaux, les agrégats ne sont pas touchés (et la transaction est annulée)
+        ventes = Vente.objects.bulk_create(
+            Vente(client=client, total=Decimal("4.50"), montant_paye=Decimal("4.50"), statut="PAYEE")
+            for _ in range(nombre)
+        )
+        LigneVente.objects.bulk_create(
+            (
+                LigneVente(vente=vente, produit=produit, quantite=Decimal("3"), prix_unitaire=Decimal("1.50"))
+                for vente in ventes for _ in range(lignes_par_vente)
+            ),
+            batch_size=5000,
+        )
+        self.stdout.write(f"{nombre} ventes et {nombre * lignes_par_vente} lignes générées")
+
+    def mesurer(self, options):
+        queryset = Vente.objects.select_related("client").prefetch_related("lignes__produit").order_by("id")
+
+        def serializer():
+            return VenteSerializer(queryset, many=True).data
+
+        def lecture_rapide():
+            plan = PlanLecture.depuis_serializer(VenteSerializer())
+            return plan.construire(queryset.select_related(None).prefetch_related(None).values(*plan.colonnes()))
+
+        rendu = JSONRenderer().render
+        if rendu(serializer()) != rendu(lecture_rapide()):
+            self.stderr.write(self.style.ERROR("Sorties différentes : mesure sans objet."))
+            return
+
+        self.stdout.write(f"{'mode':<16}{'meilleur ms':>12}{'lignes/s':>12}")
+        resultats = {}
+        for nom, calcul in (("serializer", serializer), ("lecture rapide", lecture_rapide)):
+            durees = []
+            for _ in range(options["repetitions"]):
+                debut = time.perf_counter()
+                calcul()
+                durees.append(time.perf_counter() - debut)
+            resultats[nom] = options["ventes"] / min(durees)
+            self.stdout.write(f"{nom:<16}{min(durees) * 1000:>12.1f}{resultats[nom]:>12.0f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Gain : x{resultats['lecture rapide'] / resultats['serializer']:.1f}"
+        ))
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Transaction
+from core.pagination import KeysetPagination
+
+
+class Annulation(Exception):
+    """Levée pour annuler les données de test en fin de mesure."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le coût d'une page profonde et de la première page, en pagination "
+        "par clé et par décalage (OFFSET), sur des transactions générées puis annulées "
+        "(à lancer sur PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=1000, help="Page profonde à mesurer")
+        parser.add_argument("--taille", type=int, default=50, help="Taille de page")
+        parser.add_argument("--repetitions", type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                f"Base {connection.vendor} : résultats peu représentatifs de la production."
+            ))
+        try:
+            with transaction.atomic():
+                self.generer((options["pages"] + 1) * options["taille"])
+                self.mesurer(options)
+                raise Annulation
+        except Annulation:
+            pass
+
+    def generer(self, nombre):
+        Transaction.objects.bulk_create(
+            (Transaction(type="RECETTE", module="BENCH", reference_id=i, montant=1) for i in range(nombre)),
+            batch_size=5000,
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE core_transaction")
+        self.stdout.write(f"{nombre} transactions générées")
+
+    def mesurer(self, options):
+        pagination = KeysetPagination()
+        queryset = Transaction.objects.all()
+        ordering = pagination.get_ordering(queryset)
+        taille, profonde = options["taille"], options["pages"]
+
+        # Curseur de la page profonde : position de la dernière ligne de la page précédente
+        precedent = queryset.order_by(*ordering)[(profonde - 1) * taille - 1]
+        positions = {1: None, profonde: pagination.position_de(precedent, ordering)}
+
+        self.stdout.write(f"{'mode':<10}{'page':>8}{'moy. ms':>10}{'p50 ms':>10}")
+        for page, position in positions.items():
+            self.afficher("clé", page, options, lambda: pagination.paginer(queryset, ordering, taille, position))
+        for page in positions:
+            debut = (page - 1) * taille
+            self.afficher("décalage", page, options, lambda: list(queryset.order_by(*ordering)[debut:debut + taille]))
+
+    def afficher(self, mode, page, options, requete):
+        latences = []
+        for _ in range(options["repetitions"]):
+            debut = time.perf_counter()
+            requete()
+            latences.append((time.perf_counter() - debut) * 1000)
+        self.stdout.write(
+            f"{mode:<10}{page:>8}{statistics.mean(latences):>10.2f}{statistics.median(latences):>10.2f}"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.idempotence import purger
+
+
+class Command(BaseCommand):
+    help = "Supprime les clés d'idempotence (Idempotency-Key) expirées."
+
+    def handle(self, *args, **options):
+        nb = purger()
+        self.stdout.write(self.style.SUCCESS(f"RequeteIdempotente : {nb} entrées expirées supprimées."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.rollups import reconstruire_stats_mensuelles, reconstruire_ventes_rollup
+
+
+class Command(BaseCommand):
+    help = "Reconstruit entièrement les tables d'agrégats (rollups) à partir des données brutes."
+
+    def handle(self, *args, **options):
+        nb = reconstruire_ventes_rollup()
+        self.stdout.write(self.style.SUCCESS(f"VenteDailyRollup : {nb} jours reconstruits."))
+        nb_produits, nb_clients = reconstruire_stats_mensuelles()
+        self.stdout.write(self.style.SUCCESS(f"ProduitMonthlyStats : {nb_produits} lignes reconstruites."))
+        self.stdout.write(self.style.SUCCESS(f"ClientMonthlyStats : {nb_clients} lignes reconstruites."))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.cache import (
+    DASHBOARD_STATS, HISTORIQUE_VENTES, REFERENCE_CATEGORIES, REFERENCE_PRODUITS, stocker
+)
+from core.views.dashboard import calculer_historique, calculer_stats_dashboard
+from core.views.stock import CategorieProduitViewSet, ProduitViewSet
+
+JOURS_HISTORIQUE = 30
+
+
+def entrees():
+    """(libellé, nom du snapshot, variante, calcul) pour chaque entrée à préchauffer."""
+    yield "kpis tableau de bord", DASHBOARD_STATS, "", calculer_stats_dashboard
+    for periode in ("jour", "semaine", "mois"):
+        yield (
+            f"historique {periode} ({JOURS_HISTORIQUE} j)",
+            HISTORIQUE_VENTES,
+            f"{periode}:{JOURS_HISTORIQUE}",
+            lambda periode=periode: calculer_historique(JOURS_HISTORIQUE, periode),
+        )
+    yield "liste des catégories", REFERENCE_CATEGORIES, "", CategorieProduitViewSet.liste_pour_cache
+    yield "liste des produits", REFERENCE_PRODUITS, "", ProduitViewSet.liste_pour_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Précalcule et stocke dans le cache les KPI du tableau de bord, l'historique "
+        "des ventes et les listes de référence. À lancer au démarrage du conteneur "
+        "et périodiquement (--intervalle)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--intervalle", type=int, default=0,
+            help="Recommencer toutes les N secondes (0 : une seule passe)"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.prechauffer()
+            if not options["intervalle"]:
+                break
+            # Processus de longue durée : ne pas garder la connexion entre deux passes
+            connection.close()
+            time.sleep(options["intervalle"])
+
+    def prechauffer(self):
+        debut_total = time.perf_counter()
+        for libelle, nom, variante, calcul in entrees():
+            debut = time.perf_counter()
+            try:
+                stocker(nom, calcul(), variante)
+            except Exception as e:
+                # Une entrée en échec ne doit pas empêcher le démarrage de l'application
+                self.stderr.write(self.style.ERROR(f"{libelle:<32} échec : {e}"))
+                continue
+            self.stdout.write(f"{libelle:<32} {(time.perf_counter() - debut) * 1000:>8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Cache préchauffé en {(time.perf_counter() - debut_total) * 1000:.1f} ms"
+        ))
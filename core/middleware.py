@@ -0,0 +1,133 @@
+# core/middleware.py
+import logging
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from core.compression import choisir_codec, codecs_disponibles
+
+logger = logging.getLogger(__name__)
+
+# Types déjà compressés (archives, médias, exports bureautiques) ou à ne pas
+# mettre en mémoire tampon (flux SSE du tableau de bord)
+TYPES_EXCLUS = (
+    'application/zip', 'application/gzip', 'application/x-gzip', 'application/zstd',
+    'application/x-7z-compressed', 'application/x-bzip2', 'application/x-xz',
+    'application/pdf', 'application/octet-stream',
+    'application/vnd.openxmlformats-', 'application/vnd.oasis.opendocument.',
+    'image/', 'audio/', 'video/', 'font/woff',
+    'text/event-stream',
+)
+
+
+def compressible(response):
+    type_contenu = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if type_contenu.startswith(TYPES_EXCLUS) and type_contenu != 'image/svg+xml':
+        return False
+    return 'no-transform' not in response.get('Cache-Control', '')
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresse les réponses de l'API (``/api/``) en zstd ou gzip selon
+    ``Accept-Encoding`` (voir core.compression) :
+
+    * réponse complète : à partir de ``API_COMPRESSION_MIN_KB`` Ko, et
+      seulement si le résultat est plus court ;
+    * réponse en flux (exports ``.../stream/``) : toujours, morceau par
+      morceau, synchrone ou asynchrone.
+
+    Les réponses déjà codées ou d'un type déjà compressé sont laissées
+    telles quelles. Chaque compression est journalisée (niveau DEBUG) avec
+    les octets économisés et le temps CPU consommé.
+    """
+    prefixe = '/api/'
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.taille_min = getattr(settings, 'API_COMPRESSION_MIN_KB', 1) * 1024
+        self.codecs = codecs_disponibles(
+            getattr(settings, 'API_COMPRESSION_GZIP_LEVEL', 6),
+            getattr(settings, 'API_COMPRESSION_ZSTD_LEVEL', 3),
+        )
+
+    def process_response(self, request, response):
+        if not request.path_info.startswith(self.prefixe) or response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < self.taille_min:
+            return response
+        if not compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = choisir_codec(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.codecs)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.flux_asynchrone(codec, response.streaming_content, request.path)
+            else:
+                response.streaming_content = self.flux(codec, response.streaming_content, request.path)
+            del response.headers['Content-Length']
+        else:
+            debut = time.thread_time()
+            contenu = codec.compresser(response.content)
+            duree = time.thread_time() - debut
+            if len(contenu) >= len(response.content):
+                return response
+            journaliser(codec, request.path, len(response.content), len(contenu), duree)
+            response.content = contenu
+            response.headers['Content-Length'] = str(len(contenu))
+
+        # La représentation codée n'est plus identique octet pour octet
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.nom
+        return response
+
+    @staticmethod
+    def flux(codec, morceaux, chemin):
+        compresser, terminer = codec.flux()
+        entree = sortie = duree = 0
+        try:
+            for morceau in morceaux:
+                debut = time.thread_time()
+                compresse = compresser(morceau)
+                duree += time.thread_time() - debut
+                entree, sortie = entree + len(morceau), sortie + len(compresse)
+                if compresse:
+                    yield compresse
+            fin = terminer()
+            sortie += len(fin)
+            yield fin
+        finally:
+            journaliser(codec, chemin, entree, sortie, duree)
+
+    @staticmethod
+    async def flux_asynchrone(codec, morceaux, chemin):
+        compresser, terminer = codec.flux()
+        entree = sortie = duree = 0
+        try:
+            async for morceau in morceaux:
+                debut = time.thread_time()
+                compresse = compresser(morceau)
+                duree += time.thread_time() - debut
+                entree, sortie = entree + len(morceau), sortie + len(compresse)
+                if compresse:
+                    yield compresse
+            fin = terminer()
+            sortie += len(fin)
+            yield fin
+        finally:
+            journaliser(codec, chemin, entree, sortie, duree)
+
+
+def journaliser(codec, chemin, entree, sortie, duree):
+    logger.debug(
+        "%s %s : %d -> %d octets (-%d), %.2f ms CPU",
+        codec.nom, chemin, entree, sortie, entree - sortie, duree * 1000,
+    )
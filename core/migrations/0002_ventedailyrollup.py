@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:46
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def remplir_rollup(apps, schema_editor):
+    Vente = apps.get_model("core", "Vente")
+    VenteDailyRollup = apps.get_model("core", "VenteDailyRollup")
+    lignes = (
+        Vente.objects.filter(statut="PAYEE")
+        .annotate(jour=TruncDate("date"))
+        .values("jour")
+        .annotate(somme=Sum("total"), nb=Count("id"))
+        .order_by("jour")
+    )
+    VenteDailyRollup.objects.bulk_create(
+        [VenteDailyRollup(jour=l["jour"], total=l["somme"], nombre=l["nb"]) for l in lignes],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VenteDailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("jour", models.DateField(unique=True)),
+                (
+                    "total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("nombre", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(remplir_rollup, migrations.RunPython.noop),
+    ]
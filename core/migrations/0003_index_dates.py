@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_ventedailyrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="achat",
+            index=models.Index(fields=["statut", "date"], name="achat_statut_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="mouvementstock",
+            index=models.Index(
+                fields=["produit", "date"], name="mouvement_produit_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["module", "date"], name="transaction_module_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vente",
+            index=models.Index(fields=["statut", "date"], name="vente_statut_date_idx"),
+        ),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:52
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DateField, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncMonth
+
+
+def remplir_stats(apps, schema_editor):
+    LigneVente = apps.get_model("core", "LigneVente")
+    Vente = apps.get_model("core", "Vente")
+    ProduitMonthlyStats = apps.get_model("core", "ProduitMonthlyStats")
+    ClientMonthlyStats = apps.get_model("core", "ClientMonthlyStats")
+    montant = ExpressionWrapper(
+        F("quantite") * F("prix_unitaire") - F("remise"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    par_produit = (
+        LigneVente.objects.exclude(vente__statut="ANNULEE")
+        .filter(produit__isnull=False)
+        .annotate(m=TruncMonth("vente__date", output_field=DateField()))
+        .values("produit_id", "m")
+        .annotate(q=Sum("quantite"), ca=Sum(montant), r=Sum("remise"))
+        .order_by()
+    )
+    ProduitMonthlyStats.objects.bulk_create(
+        [
+            ProduitMonthlyStats(
+                produit_id=l["produit_id"], mois=l["m"], quantite=l["q"],
+                chiffre_affaires=Decimal(l["ca"]).quantize(Decimal("0.01")), remise=l["r"],
+            )
+            for l in par_produit
+        ],
+        batch_size=500,
+    )
+    par_client = (
+        Vente.objects.exclude(statut="ANNULEE")
+        .filter(client__isnull=False)
+        .annotate(m=TruncMonth("date", output_field=DateField()))
+        .values("client_id", "m")
+        .annotate(nb=Count("id"), ca=Sum("total"))
+        .order_by()
+    )
+    ClientMonthlyStats.objects.bulk_create(
+        [
+            ClientMonthlyStats(client_id=l["client_id"], mois=l["m"], nombre_ventes=l["nb"], chiffre_affaires=l["ca"])
+            for l in par_client
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_index_dates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClientMonthlyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("mois", models.DateField()),
+                ("nombre_ventes", models.IntegerField(default=0)),
+                (
+                    "chiffre_affaires",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats_mensuelles",
+                        to="core.client",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["mois", "client"], name="stats_client_mois_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("client", "mois"), name="client_mois_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ProduitMonthlyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("mois", models.DateField()),
+                (
+                    "quantite",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "chiffre_affaires",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "remise",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "produit",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats_mensuelles",
+                        to="core.produit",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["mois", "produit"], name="stats_produit_mois_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("produit", "mois"), name="produit_mois_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(remplir_stats, migrations.RunPython.noop),
+    ]
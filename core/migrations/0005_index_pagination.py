@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_stats_mensuelles"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="achat",
+            index=models.Index(fields=["date", "id"], name="achat_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="mouvementstock",
+            index=models.Index(fields=["date", "id"], name="mouvement_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["date", "id"], name="transaction_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vente",
+            index=models.Index(fields=["date", "id"], name="vente_date_id_idx"),
+        ),
+    ]
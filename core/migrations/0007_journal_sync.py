@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:13
+
+from django.db import migrations, models
+
+# Ordre d'inscription : les catégories avant les produits qui les imbriquent
+RESSOURCES = [
+    ("categories", "CategorieProduit"),
+    ("produits", "Produit"),
+    ("clients", "Client"),
+    ("fournisseurs", "Fournisseur"),
+    ("employes", "Employe"),
+]
+
+
+def remplir_journal(apps, schema_editor):
+    """Inscrit les lignes existantes : since=0 sert alors tout le catalogue."""
+    ChangementSync = apps.get_model("core", "ChangementSync")
+    for ressource, nom in RESSOURCES:
+        ids = apps.get_model("core", nom).objects.order_by("pk").values_list("pk", flat=True)
+        ChangementSync.objects.bulk_create(
+            (ChangementSync(ressource=ressource, objet_id=pk) for pk in ids.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangementSync",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ressource", models.CharField(max_length=30)),
+                ("objet_id", models.BigIntegerField()),
+                ("supprime", models.BooleanField(default=False)),
+                ("date", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ressource", "objet_id"),
+                        name="sync_ressource_objet_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(remplir_journal, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:30
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_journal_sync"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RequeteIdempotente",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cle", models.CharField(max_length=255)),
+                ("empreinte", models.CharField(max_length=64)),
+                ("statut", models.PositiveSmallIntegerField(null=True)),
+                (
+                    "reponse",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                ("entetes", models.JSONField(default=dict)),
+                ("date", models.DateTimeField(auto_now_add=True)),
+                ("expire", models.DateTimeField(db_index=True)),
+                (
+                    "utilisateur",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("utilisateur", "cle"),
+                        name="idempotence_utilisateur_cle_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_requetes_idempotentes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="changementsync",
+            name="xid",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="changementsync",
+            index=models.Index(fields=["xid", "id"], name="sync_xid_id_idx"),
+        ),
+    ]
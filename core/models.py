@@ -1,7 +1,10 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 class CategorieProduit(models.Model):
     nom = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.nom
@@ -13,6 +16,7 @@ class Produit(models.Model):
     prix_unitaire  = models.DecimalField(max_digits=10, decimal_places=2)
     seuil_min      = models.IntegerField(default=0)
     stock_actuel   = models.IntegerField(default=0)
+    updated_at     = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.nom
@@ -23,6 +27,7 @@ class Client(models.Model):
     email     = models.EmailField(blank=True, null=True)
     adresse   = models.TextField(blank=True)
     solde     = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.nom
@@ -33,6 +38,7 @@ class Fournisseur(models.Model):
     email     = models.EmailField(blank=True, null=True)
     adresse   = models.TextField(blank=True)
     solde     = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.nom
@@ -50,6 +56,12 @@ class Vente(models.Model):
     mode_paiement  = models.CharField(max_length=50, blank=True)
     statut         = models.CharField(max_length=20, choices=STATUT_CHOICES, default='EN_COURS')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['statut', 'date'], name='vente_statut_date_idx'),
+            models.Index(fields=['date', 'id'], name='vente_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"Vente #{self.id} - {self.client.nom if self.client else 'N/A'}"
 
@@ -73,6 +85,12 @@ class Achat(models.Model):
     montant_paye   = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     statut         = models.CharField(max_length=20, choices=STATUT_CHOICES, default='EN_ATTENTE')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['statut', 'date'], name='achat_statut_date_idx'),
+            models.Index(fields=['date', 'id'], name='achat_date_id_idx'),
+        ]
+
     def __str__(self):
         return f"Achat #{self.id} - {self.fournisseur.nom if self.fournisseur else 'N/A'}"
 
@@ -91,12 +109,19 @@ class MouvementStock(models.Model):
     source_type  = models.CharField(max_length=30, blank=True)  # VENTE / ACHAT / MANUEL
     source_id    = models.IntegerField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['produit', 'date'], name='mouvement_produit_date_idx'),
+            models.Index(fields=['date', 'id'], name='mouvement_date_id_idx'),
+        ]
+
 class Employe(models.Model):
     nom           = models.CharField(max_length=120)
     poste         = models.CharField(max_length=80)
     salaire_base  = models.DecimalField(max_digits=10, decimal_places=2)
     date_embauche = models.DateField()
     actif         = models.BooleanField(default=True)
+    updated_at    = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.nom
@@ -117,3 +142,77 @@ class Transaction(models.Model):
     reference_id  = models.IntegerField()
     montant       = models.DecimalField(max_digits=12, decimal_places=2)
     description   = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['module', 'date'], name='transaction_module_date_idx'),
+            models.Index(fields=['date', 'id'], name='transaction_date_id_idx'),
+        ]
+
+class VenteDailyRollup(models.Model):
+    """Agrégat journalier des ventes payées, maintenu par core.signals."""
+    jour    = models.DateField(unique=True)
+    total   = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    nombre  = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.jour} : {self.total} ({self.nombre} ventes)"
+
+class ProduitMonthlyStats(models.Model):
+    """Ventes mensuelles par produit (lignes des ventes non annulées), maintenu par core.signals."""
+    produit          = models.ForeignKey(Produit, on_delete=models.CASCADE, related_name='stats_mensuelles')
+    mois             = models.DateField()  # premier jour du mois
+    quantite         = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    chiffre_affaires = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    remise           = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['produit', 'mois'], name='produit_mois_unique')]
+        indexes = [models.Index(fields=['mois', 'produit'], name='stats_produit_mois_idx')]
+
+class ClientMonthlyStats(models.Model):
+    """Ventes mensuelles par client (ventes non annulées), maintenu par core.signals."""
+    client           = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='stats_mensuelles')
+    mois             = models.DateField()  # premier jour du mois
+    nombre_ventes    = models.IntegerField(default=0)
+    chiffre_affaires = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['client', 'mois'], name='client_mois_unique')]
+        indexes = [models.Index(fields=['mois', 'client'], name='stats_client_mois_idx')]
+
+class TransactionCourante(models.Func):
+    """Identifiant de la transaction en cours sous PostgreSQL (``pg_current_xact_id``), 0 ailleurs."""
+    template = '0'
+    output_field = models.BigIntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return 'pg_current_xact_id()::text::bigint', []
+
+
+class ChangementSync(models.Model):
+    """Journal des changements des données de référence (synchronisation incrémentale), maintenu par core.signals."""
+    # (xid, id) sert de numéro de séquence : une seule entrée, la plus récente, par objet
+    ressource = models.CharField(max_length=30)
+    objet_id  = models.BigIntegerField()
+    supprime  = models.BooleanField(default=False)
+    date      = models.DateTimeField(auto_now=True)
+    xid       = models.BigIntegerField(default=0)  # transaction d'écriture (TransactionCourante)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['ressource', 'objet_id'], name='sync_ressource_objet_unique')]
+        indexes = [models.Index(fields=['xid', 'id'], name='sync_xid_id_idx')]
+
+class RequeteIdempotente(models.Model):
+    """Réponse mémorisée d'un POST portant un en-tête ``Idempotency-Key`` (voir core.idempotence)."""
+    utilisateur = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    cle         = models.CharField(max_length=255)
+    empreinte   = models.CharField(max_length=64)  # sha256 de la méthode, du chemin et du corps
+    statut      = models.PositiveSmallIntegerField(null=True)  # None : requête en cours
+    reponse     = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    entetes     = models.JSONField(default=dict)
+    date        = models.DateTimeField(auto_now_add=True)
+    expire      = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['utilisateur', 'cle'], name='idempotence_utilisateur_cle_unique')]
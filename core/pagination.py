@@ -0,0 +1,338 @@
+"""
+Pagination de l'API.
+
+Par défaut, les listes sont paginées par clé (keyset) : le curseur encode
+les valeurs des colonnes de tri de la dernière ligne servie et la page
+suivante est obtenue par ``WHERE (date, id) < (...) ORDER BY ... LIMIT n``.
+Le coût d'une page ne dépend donc pas de sa position, contrairement à
+``OFFSET``. Le tri est ``(-date, -id)`` pour les modèles datés et ``id``
+pour les autres ; une vue peut le fixer avec ``pagination_ordering``.
+
+Un client qui a besoin de numéros de page l'indique explicitement avec
+``?page=N`` : la pagination par numéro (OFFSET) est alors utilisée.
+
+Pour les grandes tables en ajout seul (transactions, mouvements de stock),
+``EstimatedCountPagination`` ajoute un total sans ``COUNT(*)`` complet :
+estimation du planificateur PostgreSQL sans filtre, comptage plafonné avec
+filtre, comptage exact sur les autres bases. ``count_exact`` indique
+lequel a été servi.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _page_size_max():
+    return getattr(settings, "API_PAGE_SIZE_MAX", 500)
+
+
+def _count_max():
+    return getattr(settings, "API_COUNT_MAX", 10000)
+
+
+# ─────────────────────────────────────────
+# Comptage estimé
+# ─────────────────────────────────────────
+def estimation_table(queryset):
+    """Nombre de lignes estimé par PostgreSQL (pg_class.reltuples), None si inconnu."""
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        ligne = cursor.fetchone()
+    # -1 : table jamais analysée
+    return ligne[0] if ligne and ligne[0] >= 0 else None
+
+
+def compter(queryset, plafond=None):
+    """
+    Retourne ``(total, exact)``. Seul PostgreSQL est estimé : sans filtre, on
+    lit les statistiques du planificateur ; avec filtre, on compte au plus
+    ``plafond + 1`` lignes et le total vaut ``plafond`` s'il est dépassé.
+    """
+    plafond = _count_max() if plafond is None else plafond
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.count(), True
+
+    if not queryset.query.where:
+        estimation = estimation_table(queryset)
+        # Petite table ou statistiques absentes : le comptage exact est bon marché
+        if estimation is not None and estimation > plafond:
+            return estimation, False
+    lignes = queryset.order_by().values("pk")[:plafond + 1].count()
+    if lignes > plafond:
+        return plafond, False
+    return lignes, True
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator Django dont le total passe par ``compter`` (API et admin)."""
+
+    @cached_property
+    def _total(self):
+        return compter(self.object_list)
+
+    @property
+    def count(self):
+        return self._total[0]
+
+    @property
+    def count_exact(self):
+        return self._total[1]
+
+
+class OffsetPagination(PageNumberPagination):
+    """Pagination par numéro de page, sur demande explicite (``?page=``)."""
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return _page_size_max()
+
+
+class EstimatedOffsetPagination(OffsetPagination):
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data["count_exact"] = self.page.paginator.count_exact
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"]["count_exact"] = {"type": "boolean"}
+        return schema
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    offset_query_param = "page"
+    offset_class = OffsetPagination
+    template = None
+
+    def __init__(self):
+        self.offset = None
+
+    # ─────────────────────────────────────────
+    # Configuration
+    # ─────────────────────────────────────────
+    @property
+    def page_size(self):
+        return api_settings.PAGE_SIZE or 50
+
+    def get_page_size(self, request):
+        if self.page_size_query_param in request.query_params:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=_page_size_max(),
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    @staticmethod
+    def get_ordering(queryset, view=None):
+        ordering = getattr(view, "pagination_ordering", None)
+        if ordering:
+            return tuple(ordering)
+        noms = {f.name for f in queryset.model._meta.concrete_fields}
+        return ("-date", "-id") if "date" in noms else ("id",)
+
+    # ─────────────────────────────────────────
+    # Curseurs
+    # ─────────────────────────────────────────
+    def encoder(self, position, inverse=False):
+        brut = json.dumps({"p": position, "r": inverse}, separators=(",", ":"))
+        return urlsafe_b64encode(brut.encode()).decode().rstrip("=")
+
+    def decoder(self, request, model, ordering):
+        """Retourne ``(position, inverse)`` ; position convertie selon les champs de tri."""
+        jeton = request.query_params.get(self.cursor_query_param)
+        if not jeton:
+            return None, False
+        try:
+            donnees = json.loads(urlsafe_b64decode(jeton + "=" * (-len(jeton) % 4)))
+            position = donnees["p"]
+            if not isinstance(position, list) or len(position) != len(ordering) or None in position:
+                raise ValueError(position)
+            valeurs = [self._champ(model, nom).to_python(v) for nom, v in zip(ordering, position)]
+            return valeurs, bool(donnees["r"])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound("Curseur invalide.")
+
+    @staticmethod
+    def _champ(model, nom):
+        return model._meta.get_field(nom.lstrip("-"))
+
+    def position_de(self, obj, ordering, model=None):
+        """Valeurs des colonnes de tri d'un objet ou d'une ligne ``values()``."""
+        position = []
+        for nom in ordering:
+            champ = self._champ(model or type(obj), nom)
+            valeur = obj[champ.attname] if isinstance(obj, dict) else champ.value_from_object(obj)
+            position.append(valeur.isoformat() if hasattr(valeur, "isoformat") else str(valeur))
+        return position
+
+    def _apres(self, model, ordering, position, inverse):
+        """Filtre « strictement après position » dans le sens de parcours (comparaison lexicographique)."""
+        valeurs = [self._champ(model, nom).to_python(v) for nom, v in zip(ordering, position)]
+        condition = Q()
+        egalites = {}
+        for nom, valeur in zip(ordering, valeurs):
+            champ = nom.lstrip("-")
+            descendant = nom.startswith("-") != inverse
+            condition |= Q(**egalites, **{f"{champ}__{'lt' if descendant else 'gt'}": valeur})
+            egalites[champ] = valeur
+        if len(ordering) == 1:
+            return condition
+        # Borne large sur la première colonne : permet un parcours d'index par intervalle
+        champ, valeur = ordering[0].lstrip("-"), valeurs[0]
+        descendant = ordering[0].startswith("-") != inverse
+        return Q(**{f"{champ}__{'lte' if descendant else 'gte'}": valeur}) & condition
+
+    # ─────────────────────────────────────────
+    # Pagination
+    # ─────────────────────────────────────────
+    def paginer(self, queryset, ordering, page_size, position=None, inverse=False):
+        """
+        Retourne ``(objets, position_suivante, position_precedente)`` ; les
+        positions valent None lorsqu'il n'y a pas de page dans ce sens.
+        """
+        tri = [nom[1:] if nom.startswith("-") else f"-{nom}" for nom in ordering] if inverse else list(ordering)
+        if position is not None:
+            queryset = queryset.filter(self._apres(queryset.model, ordering, position, inverse))
+        objets = list(queryset.order_by(*tri)[:page_size + 1])
+        encore = len(objets) > page_size
+        objets = objets[:page_size]
+        if inverse:
+            objets.reverse()
+        if not objets:
+            return objets, None, None
+
+        premier = self.position_de(objets[0], ordering, queryset.model)
+        dernier = self.position_de(objets[-1], ordering, queryset.model)
+        if inverse:
+            return objets, dernier, premier if encore else None
+        return objets, dernier if encore else None, premier if position is not None else None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(queryset, view)
+        if self.offset_query_param in request.query_params:
+            # Même tri que les curseurs : les deux modes listent dans le même ordre
+            self.offset = self.offset_class()
+            return self.offset.paginate_queryset(queryset.order_by(*ordering), request, view)
+
+        self.base_url = request.build_absolute_uri()
+        position, inverse = self.decoder(request, queryset.model, ordering)
+        objets, self.suivante, self.precedente = self.paginer(
+            queryset, ordering, self.get_page_size(request), position, inverse
+        )
+        return objets
+
+    def lien(self, position, inverse):
+        if position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encoder(position, inverse))
+
+    def get_next_link(self):
+        return self.lien(self.suivante, False)
+
+    def get_previous_link(self):
+        return self.lien(self.precedente, True)
+
+    def get_paginated_response(self, data):
+        if self.offset is not None:
+            return self.offset.get_paginated_response(data)
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def reponse_premiere_page(self, request, results, suivante):
+        """Réponse d'une première page déjà sérialisée (servie depuis le cache)."""
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        self.suivante, self.precedente = suivante, None
+        return self.get_paginated_response(results)
+
+    # ─────────────────────────────────────────
+    # Schéma OpenAPI
+    # ─────────────────────────────────────────
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Curseur de pagination (liens next / previous)",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Nombre de résultats par page (max. {_page_size_max()})",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.offset_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Numéro de page : active explicitement la pagination par décalage (OFFSET)",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class EstimatedCountPagination(KeysetPagination):
+    """Pagination par clé accompagnée d'un total estimé (``count`` / ``count_exact``)."""
+    offset_class = EstimatedOffsetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        objets = super().paginate_queryset(queryset, request, view)
+        if self.offset is None:
+            self.total = compter(queryset)
+        return objets
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.offset is None:
+            response.data = {"count": self.total[0], "count_exact": self.total[1], **response.data}
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["properties"] = {
+            "count": {"type": "integer", "example": 123},
+            "count_exact": {"type": "boolean"},
+            **schema["properties"],
+        }
+        return schema
@@ -0,0 +1,187 @@
+"""
+Rendu et lecture des corps de requête / réponse : JSON via orjson et
+MessagePack (``application/msgpack``).
+
+JSON
+----
+
+``ORJSONRenderer`` produit les mêmes octets que ``JSONRenderer`` (sortie
+compacte, UTF-8, dates au format de l'encodeur DRF, U+2028 / U+2029
+échappés) en déléguant l'encodage à orjson. Sans orjson, ou pour une
+sortie indentée (API navigable, ``; indent=``), le rendu repasse par la
+bibliothèque standard.
+
+Décimaux : DRF les écrit comme des flottants. On garde ce rendu quand la
+conversion est exacte, sinon le nombre est écrit tel quel (``Fragment``),
+ou à défaut en chaîne, pour ne rien perdre sur les montants.
+
+MessagePack
+-----------
+Les types sans équivalent MessagePack sont encodés ainsi (dans les deux
+sens) :
+
+=========  ==================  ==========================================
+Type       Extension           Contenu
+=========  ==================  ==========================================
+Decimal    ExtType 1           texte ASCII de la valeur (``"12.50"``)
+date       ExtType 2           date ISO 8601 (``"2025-06-30"``)
+datetime   Timestamp (-1)      type standard MessagePack, instant UTC ;
+                               un datetime naïf est pris dans le fuseau
+                               courant
+=========  ==================  ==========================================
+
+À la lecture, l'extension 1 redevient un ``Decimal``, la 2 une ``date``
+et un Timestamp un ``datetime`` UTC. Les autres types (UUID, textes
+traduisibles...) suivent l'encodeur JSON de DRF. Les montants et dates
+déjà mis en forme par les sérialiseurs restent des chaînes.
+"""
+import datetime
+import decimal
+import json
+
+import msgpack
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+SEPARATEURS_JS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+_encodeur_drf = JSONEncoder()
+
+
+def encoder_decimal(valeur):
+    flottant = float(valeur)
+    if decimal.Decimal(repr(flottant)) == valeur:
+        return flottant
+    texte = format(valeur, "f")
+    return orjson.Fragment(texte.encode()) if hasattr(orjson, "Fragment") else texte
+
+
+def defaut(obj):
+    """Types non natifs pour orjson : même rendu que l'encodeur DRF."""
+    if isinstance(obj, decimal.Decimal):
+        return encoder_decimal(obj)
+    return _encodeur_drf.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            contenu = orjson.dumps(data, default=defaut, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            # Entiers hors 64 bits, clés exotiques... : la bibliothèque standard sait faire
+            return super().render(data, accepted_media_type, renderer_context)
+        for brut, echappe in SEPARATEURS_JS:
+            if brut in contenu:
+                contenu = contenu.replace(brut, echappe)
+        return contenu
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class NDJSONRenderer(ORJSONRenderer):
+    """Un document JSON par ligne (exports en flux, voir ``ExportFluxMixin``)."""
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        contenu = super().render(data, None, renderer_context)
+        return contenu + b"\n" if contenu else contenu
+
+
+class NDJSONParser(BaseParser):
+    """Corps NDJSON : un document JSON par ligne, lu comme une liste (lignes vides ignorées)."""
+    media_type = "application/x-ndjson"
+    renderer_class = NDJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        charger = orjson.loads if orjson else json.loads
+        erreur = orjson.JSONDecodeError if orjson else ValueError
+        documents = []
+        for numero, ligne in enumerate(stream.read().splitlines(), start=1):
+            if not ligne.strip():
+                continue
+            try:
+                documents.append(charger(ligne))
+            except erreur as exc:
+                raise ParseError("NDJSON parse error - ligne %d : %s" % (numero, exc))
+        return documents
+
+
+# ─────────────────────────────────────────
+# MessagePack
+# ─────────────────────────────────────────
+EXT_DECIMAL = 1
+EXT_DATE = 2
+
+
+def defaut_msgpack(obj):
+    if isinstance(obj, decimal.Decimal):
+        return msgpack.ExtType(EXT_DECIMAL, str(obj).encode("ascii"))
+    if isinstance(obj, datetime.datetime):
+        if timezone.is_naive(obj):
+            obj = timezone.make_aware(obj)
+        return msgpack.Timestamp.from_datetime(obj)
+    if isinstance(obj, datetime.date):
+        return msgpack.ExtType(EXT_DATE, obj.isoformat().encode("ascii"))
+    return _encodeur_drf.default(obj)
+
+
+def extension_msgpack(code, contenu):
+    if code == EXT_DECIMAL:
+        return decimal.Decimal(contenu.decode("ascii"))
+    if code == EXT_DATE:
+        return datetime.date.fromisoformat(contenu.decode("ascii"))
+    raise ParseError(f"Type d'extension MessagePack inconnu : {code}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=defaut_msgpack, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(
+                stream.read(), ext_hook=extension_msgpack, timestamp=3, raw=False, strict_map_key=False
+            )
+        except (ValueError, decimal.InvalidOperation, msgpack.UnpackException) as exc:
+            # UnicodeDecodeError (contenu d'extension non ASCII) est une ValueError
+            raise ParseError("MessagePack parse error - %s" % str(exc))
@@ -0,0 +1,256 @@
+"""
+Agrégats pré-calculés utilisés par les statistiques du tableau de bord.
+
+Les tables de rollup sont mises à jour de façon incrémentale par les
+signaux (core.signals) et peuvent être reconstruites intégralement via
+la commande ``rebuild_rollups``.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DateField, DecimalField, ExpressionWrapper, F, Sum, Value, When
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from core.models import (
+    ClientMonthlyStats, LigneVente, ProduitMonthlyStats, Vente, VenteDailyRollup
+)
+
+STATUT_COMPTABILISE = 'PAYEE'
+STATUT_EXCLU = 'ANNULEE'
+DEUX_DECIMALES = Decimal('0.01')
+
+
+def contribution_vente(statut, total, date):
+    """Retourne (jour, total) si la vente compte dans le rollup, sinon None."""
+    if statut != STATUT_COMPTABILISE or date is None:
+        return None
+    return timezone.localdate(date), Decimal(total or 0)
+
+
+def _appliquer_delta(modele, cles, deltas):
+    """Incrémente les compteurs d'une ligne d'agrégat, en la créant si besoin."""
+    increments = {champ: F(champ) + valeur for champ, valeur in deltas.items()}
+    if modele.objects.filter(**cles).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            modele.objects.create(**cles, **deltas)
+    except IntegrityError:
+        # Ligne créée entre-temps par une écriture concurrente
+        modele.objects.filter(**cles).update(**increments)
+
+
+def _appliquer_deltas(modele, cles, champ, deltas):
+    """
+    ``_appliquer_delta`` pour plusieurs lignes, une par valeur de ``champ``
+    (``deltas`` : {valeur: {compteur: delta}}), en un nombre de requêtes
+    indépendant du nombre de lignes : un UPDATE groupé (CASE) des lignes
+    existantes, puis un INSERT groupé des manquantes.
+    """
+    if not deltas:
+        return
+    if len(deltas) == 1:
+        (valeur, delta), = deltas.items()
+        return _appliquer_delta(modele, {**cles, champ: valeur}, delta)
+
+    lignes = modele.objects.filter(**cles, **{f'{champ}__in': list(deltas)})
+    existantes = set(lignes.values_list(champ, flat=True))
+    if existantes:
+        compteurs = next(iter(deltas.values())).keys()
+        lignes.filter(**{f'{champ}__in': existantes}).update(**{
+            compteur: F(compteur) + Case(
+                *[When(**{champ: valeur}, then=Value(deltas[valeur][compteur])) for valeur in existantes],
+                output_field=modele._meta.get_field(compteur).clone(),
+            )
+            for compteur in compteurs
+        })
+
+    manquantes = [valeur for valeur in deltas if valeur not in existantes]
+    if not manquantes:
+        return
+    try:
+        with transaction.atomic():
+            modele.objects.bulk_create(modele(**cles, **{champ: valeur}, **deltas[valeur]) for valeur in manquantes)
+    except IntegrityError:
+        # Lignes créées entre-temps par une écriture concurrente
+        for valeur in manquantes:
+            _appliquer_delta(modele, {**cles, champ: valeur}, deltas[valeur])
+
+
+def appliquer_delta_vente(jour, total, nombre):
+    """Ajoute (ou retire, si négatif) un montant et un nombre de ventes à un jour."""
+    _appliquer_delta(VenteDailyRollup, {'jour': jour}, {'total': total, 'nombre': nombre})
+
+
+# ─────────────────────────────────────────────
+# Statistiques mensuelles par produit et par client
+# ─────────────────────────────────────────────
+def vente_active(statut):
+    return statut != STATUT_EXCLU
+
+
+def mois_de(date):
+    return timezone.localdate(date).replace(day=1)
+
+
+def appliquer_lignes_vente(mois, lignes, signe=1):
+    """
+    Reporte des lignes de vente dans ProduitMonthlyStats (mise à jour
+    groupée, quel que soit le nombre de produits).
+    ``lignes`` : itérable de (produit_id, quantite, prix_unitaire, remise).
+    """
+    cumuls = {}
+    for produit_id, quantite, prix_unitaire, remise in lignes:
+        if produit_id is None:
+            continue
+        quantite, remise = Decimal(quantite), Decimal(remise or 0)
+        q, ca, r = cumuls.get(produit_id, (Decimal(0), Decimal(0), Decimal(0)))
+        cumuls[produit_id] = (q + quantite, ca + quantite * Decimal(prix_unitaire) - remise, r + remise)
+    if not cumuls:
+        return
+    _appliquer_deltas(ProduitMonthlyStats, {'mois': mois}, 'produit_id', {
+        produit_id: {
+            'quantite': signe * q,
+            'chiffre_affaires': signe * ca.quantize(DEUX_DECIMALES),
+            'remise': signe * r,
+        }
+        for produit_id, (q, ca, r) in cumuls.items()
+    })
+
+
+def appliquer_vente_client(client_id, mois, total, signe=1):
+    """Reporte une vente dans ClientMonthlyStats."""
+    if client_id is None:
+        return
+    _appliquer_delta(
+        ClientMonthlyStats,
+        {'client_id': client_id, 'mois': mois},
+        {'nombre_ventes': signe, 'chiffre_affaires': signe * Decimal(total or 0)},
+    )
+
+
+def appliquer_ventes_creees(ventes):
+    """
+    Reporte des ventes insérées par ``bulk_create`` (sans signaux) dans le
+    rollup journalier et les stats mensuelles clients et produits.
+    ``ventes`` : itérable de (vente, lignes). Une requête groupée par agrégat
+    et par jour / mois concerné, quel que soit le nombre de ventes.
+    """
+    jours, clients, produits = {}, {}, {}
+    for vente, lignes in ventes:
+        contribution = contribution_vente(vente.statut, vente.total, vente.date)
+        if contribution:
+            cumul = jours.setdefault(contribution[0], {'total': Decimal(0), 'nombre': 0})
+            cumul['total'] += contribution[1]
+            cumul['nombre'] += 1
+        if not vente_active(vente.statut):
+            continue
+        mois = mois_de(vente.date)
+        if vente.client_id is not None:
+            cumul = clients.setdefault(mois, {}).setdefault(
+                vente.client_id, {'nombre_ventes': 0, 'chiffre_affaires': Decimal(0)}
+            )
+            cumul['nombre_ventes'] += 1
+            cumul['chiffre_affaires'] += Decimal(vente.total or 0)
+        produits.setdefault(mois, []).extend(
+            (l.produit_id, l.quantite, l.prix_unitaire, l.remise) for l in lignes
+        )
+
+    _appliquer_deltas(VenteDailyRollup, {}, 'jour', jours)
+    for mois, deltas in clients.items():
+        _appliquer_deltas(ClientMonthlyStats, {'mois': mois}, 'client_id', deltas)
+    for mois, lignes in produits.items():
+        appliquer_lignes_vente(mois, lignes)
+
+
+def reconstruire_ventes_rollup():
+    """Recalcule entièrement VenteDailyRollup à partir des ventes payées."""
+    lignes = (
+        Vente.objects.filter(statut=STATUT_COMPTABILISE)
+        .annotate(jour=TruncDate('date'))
+        .values('jour')
+        .annotate(somme=Sum('total'), nb=Count('id'))
+        .order_by('jour')
+    )
+    rollups = [
+        VenteDailyRollup(jour=l['jour'], total=l['somme'], nombre=l['nb'])
+        for l in lignes
+    ]
+    with transaction.atomic():
+        VenteDailyRollup.objects.all().delete()
+        VenteDailyRollup.objects.bulk_create(rollups, batch_size=500)
+    return len(rollups)
+
+
+def reconstruire_stats_mensuelles():
+    """Recalcule ProduitMonthlyStats et ClientMonthlyStats ; retourne (nb_produits, nb_clients)."""
+    montant = ExpressionWrapper(
+        F('quantite') * F('prix_unitaire') - F('remise'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    par_produit = (
+        LigneVente.objects.exclude(vente__statut=STATUT_EXCLU)
+        .filter(produit__isnull=False)
+        .annotate(m=TruncMonth('vente__date', output_field=DateField()))
+        .values('produit_id', 'm')
+        .annotate(q=Sum('quantite'), ca=Sum(montant), r=Sum('remise'))
+        .order_by()
+    )
+    par_client = (
+        Vente.objects.exclude(statut=STATUT_EXCLU)
+        .filter(client__isnull=False)
+        .annotate(m=TruncMonth('date', output_field=DateField()))
+        .values('client_id', 'm')
+        .annotate(nb=Count('id'), ca=Sum('total'))
+        .order_by()
+    )
+    produits = [
+        ProduitMonthlyStats(
+            produit_id=l['produit_id'], mois=l['m'], quantite=l['q'],
+            chiffre_affaires=Decimal(l['ca']).quantize(DEUX_DECIMALES), remise=l['r'],
+        )
+        for l in par_produit
+    ]
+    clients = [
+        ClientMonthlyStats(client_id=l['client_id'], mois=l['m'], nombre_ventes=l['nb'], chiffre_affaires=l['ca'])
+        for l in par_client
+    ]
+    with transaction.atomic():
+        ProduitMonthlyStats.objects.all().delete()
+        ClientMonthlyStats.objects.all().delete()
+        ProduitMonthlyStats.objects.bulk_create(produits, batch_size=500)
+        ClientMonthlyStats.objects.bulk_create(clients, batch_size=500)
+    return len(produits), len(clients)
+
+
+# ─────────────────────────────────────────────
+# Classements (top N) lus uniquement dans les agrégats
+# ─────────────────────────────────────────────
+CRITERES_PRODUITS = ('chiffre_affaires', 'quantite')
+CRITERES_CLIENTS = ('chiffre_affaires', 'nombre_ventes')
+
+
+def top_produits(mois_debut, mois_fin, n=10, critere='chiffre_affaires'):
+    return list(
+        ProduitMonthlyStats.objects.filter(mois__gte=mois_debut, mois__lte=mois_fin)
+        .values('produit_id', 'produit__nom')
+        .annotate(
+            quantite_total=Sum('quantite'),
+            chiffre_affaires_total=Sum('chiffre_affaires'),
+            remise_total=Sum('remise'),
+        )
+        .order_by(f'-{critere}_total', 'produit_id')[:n]
+    )
+
+
+def top_clients(mois_debut, mois_fin, n=10, critere='chiffre_affaires'):
+    return list(
+        ClientMonthlyStats.objects.filter(mois__gte=mois_debut, mois__lte=mois_fin)
+        .values('client_id', 'client__nom')
+        .annotate(
+            nombre_ventes_total=Sum('nombre_ventes'),
+            chiffre_affaires_total=Sum('chiffre_affaires'),
+        )
+        .order_by(f'-{critere}_total', 'client_id')[:n]
+    )
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from core.models import LigneAchat, Achat, Produit, Fournisseur
+from core.serializers.mixins import ChampsDemandesMixin, ClePrechargeeField, PrechargementListSerializer
+from core.services import modifier_achat, receptionner_achat
 
-class LigneAchatSerializer(serializers.ModelSerializer):
+class LigneAchatSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     produit = serializers.StringRelatedField(read_only=True)
-    produit_id = serializers.PrimaryKeyRelatedField(
+    # Produits de toutes les lignes chargés en une requête (PrechargementListSerializer)
+    produit_id = ClePrechargeeField(
         source="produit",
         queryset=Produit.objects.all(),
         write_only=True
@@ -11,8 +14,11 @@ class LigneAchatSerializer(serializers.ModelSerializer):
     class Meta:
         model = LigneAchat
         fields = "__all__"
+        # Renseigné à la création de l'achat parent
+        read_only_fields = ("achat",)
+        list_serializer_class = PrechargementListSerializer
 
-class AchatSerializer(serializers.ModelSerializer):
+class AchatSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     fournisseur = serializers.StringRelatedField(read_only=True)
     fournisseur_id = serializers.PrimaryKeyRelatedField(
         source="fournisseur",
@@ -27,8 +33,11 @@ class AchatSerializer(serializers.ModelSerializer):
         read_only_fields = ("id","date",)
 
     def create(self, validated_data):
-        lignes_data = validated_data.pop("lignes")
-        achat = Achat.objects.create(**validated_data)
-        for line in lignes_data:
-            LigneAchat.objects.create(achat=achat, **line)
-        return achat
+        # Achat, lignes, entrée en stock, mouvements, audit et solde fournisseur (core.services)
+        request = self.context.get("request")
+        return receptionner_achat(validated_data, utilisateur=request.user if request else None)
+
+    def update(self, instance, validated_data):
+        # Annulation / réactivation : stock, mouvements, audit et solde fournisseur suivent (core.services)
+        request = self.context.get("request")
+        return modifier_achat(instance, validated_data, utilisateur=request.user if request else None)
@@ -1,12 +1,13 @@
 from rest_framework import serializers
 from core.models import CategorieProduit, Produit, Client, Fournisseur
+from core.serializers.mixins import ChampsDemandesMixin
 
-class CategorieProduitSerializer(serializers.ModelSerializer):
+class CategorieProduitSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     class Meta:
         model = CategorieProduit
         fields = "__all__"
 
-class ProduitSerializer(serializers.ModelSerializer):
+class ProduitSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     categorie = CategorieProduitSerializer(read_only=True)
     categorie_id = serializers.PrimaryKeyRelatedField(
         source="categorie",
@@ -17,12 +18,12 @@ class ProduitSerializer(serializers.ModelSerializer):
         model = Produit
         fields = "__all__"
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = "__all__"
 
-class FournisseurSerializer(serializers.ModelSerializer):
+class FournisseurSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     class Meta:
         model = Fournisseur
         fields = "__all__"
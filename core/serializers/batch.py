@@ -0,0 +1,33 @@
+# core/serializers/batch.py
+from django.conf import settings
+from rest_framework import serializers
+
+METHODES = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+
+
+class SousRequeteSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=METHODES, default="GET")
+    url = serializers.RegexField(r"^/api/", help_text="Chemin de l'API, paramètres compris (/api/produits/?page_size=5)")
+    headers = serializers.DictField(child=serializers.CharField(), required=False, default=dict)
+    body = serializers.JSONField(required=False, default=None)
+
+
+class LotSerializer(serializers.Serializer):
+    """Corps de POST /api/batch/."""
+    requetes = SousRequeteSerializer(many=True, allow_empty=False)
+    parallele = serializers.BooleanField(
+        default=False,
+        help_text="Exécute en parallèle les GET consécutifs (les écritures restent séquentielles)"
+    )
+
+    def validate_requetes(self, value):
+        maximum = getattr(settings, "API_BATCH_MAX", 20)
+        if len(value) > maximum:
+            raise serializers.ValidationError(f"{maximum} sous-requêtes au plus.")
+        return value
+
+
+class SousReponseSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField())
+    body = serializers.JSONField(allow_null=True)
@@ -1,24 +1,53 @@
 # core/serializers/dashboard.py
 from rest_framework import serializers
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.utils import timezone
+from core.rollups import CRITERES_CLIENTS, CRITERES_PRODUITS
+from core.series import METRIQUES, PERIODES
 
 class DashboardStatsSerializer(serializers.Serializer):
     """
     Sérialiseur pour les statistiques du tableau de bord.
+    Tous les champs sont optionnels : seuls les KPI demandés via ``?kpis=`` sont renvoyés.
     """
     total_vente = serializers.DecimalField(
         max_digits=12, 
         decimal_places=2,
+        required=False,
         help_text="Total des ventes pour le mois en cours"
     )
     total_achat = serializers.DecimalField(
         max_digits=12, 
         decimal_places=2,
+        required=False,
         help_text="Total des achats pour le mois en cours"
     )
     total_stock = serializers.IntegerField(
+        required=False,
         help_text="Nombre total d'articles en stock"
     )
+    valeur_stock = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        required=False,
+        help_text="Valeur du stock (stock_actuel × prix_unitaire)"
+    )
+    creances_clients = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        required=False,
+        help_text="Montant restant dû par les clients (total - montant_paye)"
+    )
+    dettes_fournisseurs = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        required=False,
+        help_text="Montant restant dû aux fournisseurs (total - montant_paye)"
+    )
+    produits_sous_seuil = serializers.IntegerField(
+        required=False,
+        help_text="Nombre de produits dont le stock est sous le seuil minimum"
+    )
 
 
 class HistoriqueVentesSerializer(serializers.Serializer):
@@ -44,4 +73,110 @@ class HistoriqueVentesSerializer(serializers.Serializer):
     )
 
     class Meta:
-        fields = ['date', 'total_ventes', 'nombre_ventes', 'montant_moyen']
\ No newline at end of file
+        fields = ['date', 'total_ventes', 'nombre_ventes', 'montant_moyen']
+
+class HistoriqueParametresSerializer(serializers.Serializer):
+    """
+    Paramètres de requête de l'historique des ventes (ils forment aussi la clé de cache).
+    """
+    JOURS_MAX = 5 * 366
+
+    jours = serializers.IntegerField(
+        default=30, min_value=1, max_value=JOURS_MAX, help_text="Nombre de jours à analyser"
+    )
+    periode = serializers.ChoiceField(choices=PERIODES, default="jour", help_text="Période d'agrégation")
+
+class SeriesParametresSerializer(serializers.Serializer):
+    """
+    Paramètres de requête de l'endpoint des séries temporelles.
+    """
+    debut = serializers.DateField(required=False, help_text="Premier jour inclus (défaut : fin - 29 jours)")
+    fin = serializers.DateField(required=False, help_text="Dernier jour inclus (défaut : aujourd'hui)")
+    periode = serializers.ChoiceField(choices=PERIODES, default="jour")
+    metriques = serializers.CharField(
+        required=False,
+        help_text="Métriques séparées par des virgules : ventes, achats, solde_flux, nombre_ventes (toutes par défaut)"
+    )
+    comparer = serializers.BooleanField(default=False, help_text="Ajouter la période précédente")
+
+    JOURS_MAX = 5 * 366
+
+    def validate_metriques(self, value):
+        metriques = [m for m in value.split(",") if m]
+        inconnues = [m for m in metriques if m not in METRIQUES]
+        if inconnues:
+            raise serializers.ValidationError(f"Métrique(s) inconnue(s) : {', '.join(inconnues)}")
+        return metriques
+
+    def validate(self, attrs):
+        fin = attrs.get("fin") or timezone.localdate()
+        debut = attrs.get("debut") or fin - timedelta(days=29)
+        if debut > fin:
+            raise serializers.ValidationError("debut doit précéder fin")
+        if (fin - debut).days > self.JOURS_MAX:
+            raise serializers.ValidationError(f"Intervalle limité à {self.JOURS_MAX} jours")
+        attrs.update(debut=debut, fin=fin)
+        return attrs
+
+
+class SeriesTemporellesSerializer(serializers.Serializer):
+    """
+    Sérialiseur (documentation) des séries alignées et complétées par des zéros.
+    """
+    meta = serializers.DictField()
+    labels = serializers.ListField(child=serializers.DateField(), help_text="Début de chaque bucket")
+    series = serializers.DictField(
+        child=serializers.ListField(),
+        help_text="Une liste de valeurs par métrique, alignée sur labels"
+    )
+    precedent = serializers.DictField(
+        required=False,
+        help_text="Mêmes clés (labels, series) pour la période précédente si comparer=true"
+    )
+
+
+class TopParametresSerializer(serializers.Serializer):
+    """
+    Paramètres de requête du classement des meilleurs produits / clients.
+    """
+    type = serializers.ChoiceField(choices=["produits", "clients"], default="produits")
+    debut = serializers.DateField(
+        input_formats=["%Y-%m"], required=False,
+        help_text="Premier mois inclus (AAAA-MM, défaut : mois courant)"
+    )
+    fin = serializers.DateField(
+        input_formats=["%Y-%m"], required=False,
+        help_text="Dernier mois inclus (AAAA-MM, défaut : mois courant)"
+    )
+    n = serializers.IntegerField(default=10, min_value=1, max_value=100)
+    critere = serializers.ChoiceField(
+        choices=["chiffre_affaires", "quantite", "nombre_ventes"], default="chiffre_affaires"
+    )
+
+    def validate(self, attrs):
+        fin = attrs.get("fin") or timezone.localdate().replace(day=1)
+        debut = attrs.get("debut") or fin
+        if debut > fin:
+            raise serializers.ValidationError("debut doit précéder fin")
+        criteres = CRITERES_PRODUITS if attrs["type"] == "produits" else CRITERES_CLIENTS
+        if attrs["critere"] not in criteres:
+            raise serializers.ValidationError(
+                {"critere": f"Pour {attrs['type']} : {', '.join(criteres)}"}
+            )
+        attrs.update(debut=debut, fin=fin)
+        return attrs
+
+
+class TopProduitSerializer(serializers.Serializer):
+    produit_id = serializers.IntegerField()
+    produit__nom = serializers.CharField()
+    quantite_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    chiffre_affaires_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    remise_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class TopClientSerializer(serializers.Serializer):
+    client_id = serializers.IntegerField()
+    client__nom = serializers.CharField()
+    nombre_ventes_total = serializers.IntegerField()
+    chiffre_affaires_total = serializers.DecimalField(max_digits=14, decimal_places=2)
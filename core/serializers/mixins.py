@@ -0,0 +1,96 @@
+# core/serializers/mixins.py
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def champs_demandes(request):
+    """Retourne ``(fields, omit)`` lus dans la requête (None si absents)."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None, None
+    lire = lambda nom: [c for c in request.query_params.get(nom, "").split(",") if c] or None
+    return lire("fields"), lire("omit")
+
+
+class ChampsDemandesMixin:
+    """
+    Restreint la représentation aux champs demandés (``?fields=id,nom``) ou
+    en retire certains (``?omit=categorie``). Les champs retirés ne sont ni
+    lus ni sérialisés ; seules les lectures sont concernées. Un nom inconnu
+    provoque une erreur 400.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, omit = champs_demandes(self.context.get("request"))
+        if fields is None and omit is None:
+            return
+
+        inconnus = [c for c in (fields or []) + (omit or []) if c not in self.fields]
+        if inconnus:
+            raise serializers.ValidationError({"fields": f"Champ(s) inconnu(s) : {', '.join(inconnus)}"})
+        for nom in list(self.fields):
+            if (fields is not None and nom not in fields) or (omit is not None and nom in omit):
+                self.fields.pop(nom)
+
+
+def precharger(contexte, queryset, valeurs):
+    """
+    Charge en une requête les objets de ``queryset`` dont la clé primaire
+    figure dans ``valeurs`` et les range dans ``contexte["precharges"]``
+    (par modèle ; une clé introuvable y est notée ``None``). Les clés déjà
+    chargées ne sont pas relues ; les valeurs invalides sont ignorées, leur
+    erreur viendra de la validation du champ.
+    """
+    modele = queryset.model
+    cache = contexte.setdefault("precharges", {}).setdefault(modele, {})
+    cles = set()
+    for valeur in valeurs:
+        if valeur is None or isinstance(valeur, bool):
+            continue
+        try:
+            cles.add(modele._meta.pk.to_python(valeur))
+        except (TypeError, ValueError, DjangoValidationError):
+            continue
+    cles -= cache.keys()
+    if cles:
+        trouves = queryset.in_bulk(cles)
+        cache.update({cle: trouves.get(cle) for cle in cles})
+
+
+class ClePrechargeeField(serializers.PrimaryKeyRelatedField):
+    """
+    ``PrimaryKeyRelatedField`` servi depuis les objets préchargés dans le
+    contexte (``precharger``, appelé par ``PrechargementListSerializer`` ou
+    par la vue) au lieu d'une requête par élément. Messages d'erreur et
+    représentation sont inchangés.
+    """
+
+    def to_internal_value(self, data):
+        queryset = self.get_queryset()
+        cache = self.context.get("precharges", {}).get(queryset.model)
+        if cache is None or data is None or isinstance(data, bool):
+            return super().to_internal_value(data)
+        try:
+            cle = queryset.model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            return super().to_internal_value(data)
+        if cle not in cache:
+            return super().to_internal_value(data)
+        if cache[cle] is None:
+            self.fail("does_not_exist", pk_value=data)
+        return cache[cle]
+
+
+class PrechargementListSerializer(serializers.ListSerializer):
+    """Précharge en une requête par champ les ``ClePrechargeeField`` de tous les éléments."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for nom, champ in self.child.fields.items():
+                if isinstance(champ, ClePrechargeeField) and not champ.read_only:
+                    precharger(
+                        self.context, champ.get_queryset(),
+                        (element.get(nom) for element in data if isinstance(element, dict)),
+                    )
+        return super().to_internal_value(data)
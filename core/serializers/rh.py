@@ -1,12 +1,13 @@
 from rest_framework import serializers
 from core.models import Employe, Salaire
+from core.serializers.mixins import ChampsDemandesMixin
 
-class EmployeSerializer(serializers.ModelSerializer):
+class EmployeSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     class Meta:
         model = Employe
         fields = "__all__"
 
-class SalaireSerializer(serializers.ModelSerializer):
+class SalaireSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     employe = serializers.StringRelatedField(read_only=True)
     employe_id = serializers.PrimaryKeyRelatedField(
         source="employe",
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from core.models import MouvementStock, Produit
+from core.serializers.mixins import ChampsDemandesMixin
 
-class MouvementStockSerializer(serializers.ModelSerializer):
+class MouvementStockSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     produit = serializers.StringRelatedField(read_only=True)
     produit_id = serializers.PrimaryKeyRelatedField(
         source="produit",
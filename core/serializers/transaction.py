@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from core.models import Transaction
+from core.serializers.mixins import ChampsDemandesMixin
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = "__all__"
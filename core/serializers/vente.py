@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from core.models import LigneVente, Vente, Produit, Client
+from core.services import enregistrer_vente, modifier_vente
+from core.serializers.mixins import ChampsDemandesMixin, ClePrechargeeField, PrechargementListSerializer
 
-class LigneVenteSerializer(serializers.ModelSerializer):
+class LigneVenteSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     produit = serializers.StringRelatedField(read_only=True)
-    produit_id = serializers.PrimaryKeyRelatedField(
+    # Produits de toutes les lignes chargés en une requête (PrechargementListSerializer)
+    produit_id = ClePrechargeeField(
         source="produit",
         queryset=Produit.objects.all(),
         write_only=True
@@ -11,10 +14,13 @@ class LigneVenteSerializer(serializers.ModelSerializer):
     class Meta:
         model = LigneVente
         fields = "__all__"
+        # Renseignée à la création de la vente parente
+        read_only_fields = ("vente",)
+        list_serializer_class = PrechargementListSerializer
 
-class VenteSerializer(serializers.ModelSerializer):
+class VenteSerializer(ChampsDemandesMixin, serializers.ModelSerializer):
     client = serializers.StringRelatedField(read_only=True)
-    client_id = serializers.PrimaryKeyRelatedField(
+    client_id = ClePrechargeeField(
         source="client",
         queryset=Client.objects.all(),
         write_only=True
@@ -27,8 +33,25 @@ class VenteSerializer(serializers.ModelSerializer):
         read_only_fields = ("id","date",)
 
     def create(self, validated_data):
-        lignes_data = validated_data.pop("lignes")
-        vente = Vente.objects.create(**validated_data)
-        for line in lignes_data:
-            LigneVente.objects.create(vente=vente, **line)
-        return vente
+        # Vente, lignes, stock, mouvements, audit et solde client (core.services)
+        request = self.context.get("request")
+        return enregistrer_vente(validated_data, utilisateur=request.user if request else None)
+
+    def update(self, instance, validated_data):
+        # Annulation / réactivation : stock, mouvements, audit et solde client suivent (core.services)
+        request = self.context.get("request")
+        return modifier_vente(instance, validated_data, utilisateur=request.user if request else None)
+
+
+class IssueVenteSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    status = serializers.IntegerField()
+    id = serializers.IntegerField(required=False)
+    erreurs = serializers.JSONField(required=False)
+
+
+class ResultatLotSerializer(serializers.Serializer):
+    """Réponse de POST /api/ventes/bulk/."""
+    crees = serializers.IntegerField()
+    refusees = serializers.IntegerField()
+    resultats = IssueVenteSerializer(many=True)
@@ -0,0 +1,159 @@
+"""
+Séries temporelles alignées (ventes, achats, solde des flux, nombre de
+ventes). Le solde des flux est ventes − achats sur le bucket : une
+différence d'encaissements, pas une marge (le coût des marchandises
+vendues n'est pas connu ici).
+
+Toutes les données nécessaires, période de comparaison comprise, sont lues
+en une seule requête (UNION ALL du rollup journalier des ventes et des
+achats agrégés par jour), puis réparties en une passe dans des buckets
+complétés par des zéros. Le premier et le dernier bucket sont tronqués à
+l'intervalle demandé : seuls les jours de [debut, fin] sont comptés,
+même si le bucket déborde. Les jours sont ceux du fuseau courant
+(``TIME_ZONE``, Africa/Dakar par défaut).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import CharField, Count, F, Sum, Value
+from django.db.models.functions import TruncDate
+
+from core.models import Achat, VenteDailyRollup
+from core.utils import debut_du_jour
+
+PERIODES = ("jour", "semaine", "mois")
+METRIQUES = ("ventes", "achats", "solde_flux", "nombre_ventes")
+
+DEUX_DECIMALES = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def debut_bucket(jour, periode):
+    if periode == "semaine":
+        return jour - timedelta(days=jour.weekday())
+    if periode == "mois":
+        return jour.replace(day=1)
+    return jour
+
+
+def decaler(bucket, periode, n):
+    """Décale un début de bucket de ``n`` périodes (n peut être négatif)."""
+    if periode == "semaine":
+        return bucket + timedelta(weeks=n)
+    if periode == "mois":
+        mois = bucket.year * 12 + bucket.month - 1 + n
+        return date(mois // 12, mois % 12 + 1, 1)
+    return bucket + timedelta(days=n)
+
+
+def decaler_jour(jour, periode, n):
+    """Comme ``decaler`` pour un jour quelconque (quantième ramené à la fin du mois si besoin)."""
+    if periode != "mois":
+        return decaler(jour, periode, n)
+    mois = decaler(jour.replace(day=1), periode, n)
+    suivant = decaler(mois, periode, 1)
+    return mois.replace(day=min(jour.day, (suivant - mois).days))
+
+
+def buckets(debut, fin, periode):
+    """Débuts des buckets couvrant [debut, fin] (bornes incluses)."""
+    courant = debut_bucket(debut, periode)
+    resultat = []
+    while courant <= fin:
+        resultat.append(courant)
+        courant = decaler(courant, periode, 1)
+    return resultat
+
+
+def _lignes_journalieres(jour_min, jour_max, avec_ventes, avec_achats):
+    """Lignes (source, jour, montant, nombre) sur [jour_min, jour_max) en une requête."""
+    requetes = []
+    if avec_ventes:
+        requetes.append(
+            VenteDailyRollup.objects.filter(jour__gte=jour_min, jour__lt=jour_max)
+            .annotate(
+                source=Value("V", output_field=CharField()),
+                j=F("jour"),
+                montant=F("total"),
+                nb=F("nombre"),
+            )
+            .values_list("source", "j", "montant", "nb")
+        )
+    if avec_achats:
+        requetes.append(
+            Achat.objects.filter(
+                statut__in=["PAYE", "PARTIEL"],
+                date__gte=debut_du_jour(jour_min),
+                date__lt=debut_du_jour(jour_max),
+            )
+            .annotate(j=TruncDate("date"))
+            .values("j")
+            .annotate(
+                source=Value("A", output_field=CharField()),
+                montant=Sum("total"),
+                nb=Count("id"),
+            )
+            .values_list("source", "j", "montant", "nb")
+        )
+    if not requetes:
+        return []
+    premiere, *autres = requetes
+    return premiere.union(*autres, all=True) if autres else premiere
+
+
+def _montant(valeur):
+    return str(valeur.quantize(DEUX_DECIMALES))
+
+
+def _series(labels, cumuls, metriques):
+    series = {}
+    for metrique in metriques:
+        valeurs = []
+        for bucket in labels:
+            c = cumuls.get(bucket, {})
+            ventes, achats = c.get("V", ZERO), c.get("A", ZERO)
+            if metrique == "ventes":
+                valeurs.append(_montant(ventes))
+            elif metrique == "achats":
+                valeurs.append(_montant(achats))
+            elif metrique == "solde_flux":
+                valeurs.append(_montant(ventes - achats))
+            else:
+                valeurs.append(c.get("nb", 0))
+        series[metrique] = valeurs
+    return series
+
+
+def calculer_series(debut, fin, periode="jour", metriques=METRIQUES, comparer=False):
+    """
+    Retourne ``{"labels", "series"}`` pour [debut, fin] et, si ``comparer``,
+    une clé ``precedent`` couvrant le même nombre de buckets juste avant
+    (jours de [debut, fin] décalés d'autant de périodes).
+    """
+    courants = buckets(debut, fin, periode)
+    fenetres = [(debut, fin + timedelta(days=1))]
+    precedents = []
+    if comparer:
+        precedents = [decaler(b, periode, -len(courants)) for b in courants]
+        fenetres.append(tuple(decaler_jour(borne, periode, -len(courants)) for borne in fenetres[0]))
+
+    avec_ventes = bool({"ventes", "solde_flux", "nombre_ventes"} & set(metriques))
+    avec_achats = bool({"achats", "solde_flux"} & set(metriques))
+
+    cumuls = [defaultdict(dict) for _ in fenetres]
+    jour_min, jour_max = fenetres[-1][0], fenetres[0][1]
+    for source, jour, montant, nb in _lignes_journalieres(jour_min, jour_max, avec_ventes, avec_achats):
+        # Fenêtres [debut, fin) : les jours hors intervalle des buckets extrêmes sont ignorés
+        fenetre = next((i for i, (d, f) in enumerate(fenetres) if d <= jour < f), None)
+        if fenetre is None:
+            continue
+        c = cumuls[fenetre][debut_bucket(jour, periode)]
+        c[source] = c.get(source, ZERO) + Decimal(str(montant or 0))
+        if source == "V":
+            c["nb"] = c.get("nb", 0) + int(nb or 0)
+
+    resultat = {"labels": courants, "series": _series(courants, cumuls[0], metriques)}
+    if comparer:
+        resultat["precedent"] = {"labels": precedents, "series": _series(precedents, cumuls[1], metriques)}
+    return resultat
@@ -0,0 +1,435 @@
+"""
+Enregistrement des opérations métier en une transaction.
+
+Une vente enregistrée par ``enregistrer_vente`` (un achat reçu par
+``receptionner_achat``) met à jour, en plus de la pièce et de ses lignes :
+le stock des produits, les mouvements de stock (SORTIE / ENTREE), le
+journal d'audit (``Transaction``) et le solde du client (du fournisseur).
+Le nombre de requêtes ne dépend pas du nombre de lignes : insertions
+groupées (``bulk_create``) et mises à jour groupées (``CASE`` par
+produit).
+
+Annuler (statut ANNULEE) ou supprimer une vente contre-passe ces effets
+(``modifier_vente``, ``supprimer_vente``) : retour en stock, mouvement
+ENTREE, audit de montant opposé et solde du client débité. Les agrégats
+suivent, eux, par les signaux de ``Vente``. De même pour un achat
+(``modifier_achat``, ``supprimer_achat``) : sortie du stock reçu,
+mouvement SORTIE, audit opposé et solde du fournisseur débité.
+
+``enregistrer_ventes`` applique le même traitement à un lot de ventes
+(POST /api/ventes/bulk/), par tranches : une transaction et un nombre
+fixe de requêtes par tranche, quel que soit le nombre de ventes.
+
+Ces écritures groupées n'envoient pas de signaux : les agrégats
+(core.rollups), le journal de synchronisation (core.sync) et les caches
+de référence sont mis à jour ici explicitement.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import APIException, ValidationError
+
+from core.cache import DASHBOARD_STATS, HISTORIQUE_VENTES, REFERENCE_PRODUITS, invalider
+from core.events import publier_changement
+from core.models import (
+    Achat, Client, Fournisseur, LigneAchat, LigneVente, MouvementStock, Produit, Transaction, Vente
+)
+from core.rollups import appliquer_lignes_vente, appliquer_ventes_creees, mois_de, vente_active
+from core.sync import journaliser
+from core.utils import log_transaction, transaction_audit
+
+logger = logging.getLogger(__name__)
+
+
+def quantites_par_produit(lignes):
+    """{produit_id: quantité totale} pour des lignes (produit, quantite)."""
+    quantites = defaultdict(Decimal)
+    for ligne in lignes:
+        if ligne["produit"] is not None:
+            quantites[ligne["produit"].pk] += Decimal(ligne["quantite"])
+    return dict(quantites)
+
+
+def _quantites_lignes(lignes):
+    """{produit_id: quantité totale} pour des lignes enregistrées."""
+    quantites = defaultdict(Decimal)
+    for ligne in lignes:
+        if ligne.produit_id is not None:
+            quantites[ligne.produit_id] += ligne.quantite
+    return dict(quantites)
+
+
+def _verifier_quantites_entieres(lignes):
+    # Produit.stock_actuel est un entier
+    erreurs = [
+        {} if Decimal(ligne["quantite"]) == Decimal(ligne["quantite"]).to_integral_value()
+        else {"quantite": ["Quantité entière attendue pour un produit suivi en stock."]}
+        for ligne in lignes
+    ]
+    if any(erreurs):
+        raise ValidationError({"lignes": erreurs})
+
+
+def ajuster_stock(quantites, signe):
+    """
+    Ajoute ``signe × quantité`` au stock de chaque produit, en un UPDATE.
+    Une sortie (``signe=-1``) n'est appliquée que si le stock suffit pour
+    tous les produits ; sinon ValidationError (la transaction est annulée).
+    """
+    if not quantites:
+        return
+    ecart = Case(
+        *[When(pk=produit_id, then=Value(int(quantite) * signe)) for produit_id, quantite in quantites.items()]
+    )
+    produits = Produit.objects.filter(pk__in=list(quantites))
+    if signe < 0:
+        suffisant = Q()
+        for produit_id, quantite in quantites.items():
+            suffisant |= Q(pk=produit_id, stock_actuel__gte=quantite)
+        produits = produits.filter(suffisant)
+    if produits.update(stock_actuel=F("stock_actuel") + ecart, updated_at=timezone.now()) != len(quantites):
+        manquants = Produit.objects.filter(pk__in=list(quantites)).values_list("pk", "nom", "stock_actuel")
+        raise ValidationError({"lignes": [
+            f"Stock insuffisant pour {nom} : {stock} disponible(s), {int(quantites[pk])} demandé(s)."
+            for pk, nom, stock in manquants if stock + signe * quantites[pk] < 0
+        ] or ["Produit introuvable."]})
+
+    journaliser(Produit, quantites)
+    invalider(REFERENCE_PRODUITS)
+
+
+def mouvements(lignes, type_, source_type, source_id):
+    MouvementStock.objects.bulk_create(_mouvements(lignes, type_, source_type, source_id))
+
+
+def _mouvements(lignes, type_, source_type, source_id):
+    return [
+        MouvementStock(
+            produit_id=ligne.produit_id, type=type_, quantite=ligne.quantite,
+            source_type=source_type, source_id=source_id,
+        )
+        for ligne in lignes if ligne.produit_id is not None
+    ]
+
+
+def _attacher_lignes(piece, lignes):
+    # Lignes (et leurs produits) déjà en mémoire pour la représentation renvoyée
+    queryset = piece.lignes.all()
+    queryset._result_cache, queryset._prefetch_done = lignes, True
+    piece._prefetched_objects_cache = {"lignes": queryset}
+
+
+def crediter_solde(modele, pk, montant):
+    """Ajoute ``montant`` au solde d'un client ou d'un fournisseur."""
+    crediter_soldes(modele, {pk: montant})
+
+
+def _etat(piece, champs):
+    return {champ: getattr(piece, champ) for champ in champs}
+
+
+def _etat_verrouille(modele, pk, champs):
+    # Verrou de ligne : deux annulations concurrentes ne contre-passent qu'une fois
+    return modele.objects.select_for_update().values(*champs).get(pk=pk)
+
+
+def crediter_soldes(modele, montants):
+    """Ajoute à chaque solde son montant (``montants`` : {pk: montant}), en un UPDATE."""
+    montants = {pk: montant for pk, montant in montants.items() if pk is not None and montant}
+    if not montants:
+        return
+    if len(montants) == 1:
+        ecart = next(iter(montants.values()))
+    else:
+        ecart = Case(
+            *[When(pk=pk, then=Value(montant)) for pk, montant in montants.items()],
+            output_field=modele._meta.get_field("solde").clone(),
+        )
+    modele.objects.filter(pk__in=list(montants)).update(solde=F("solde") + ecart, updated_at=timezone.now())
+    journaliser(modele, list(montants))
+
+
+# ─────────────────────────────────────────────
+# Ventes
+# ─────────────────────────────────────────────
+CHAMPS_VENTE = ("statut", "total", "montant_paye", "client_id")
+
+
+def _repercuter_vente(pk, etat, lignes, signe, utilisateur, libelle):
+    """
+    Applique (``signe=1``) ou contre-passe (``signe=-1``) les effets d'une
+    vente active dans l'état ``etat`` : stock, mouvements, audit et solde.
+    """
+    ajuster_stock(_quantites_lignes(lignes), -signe)
+    mouvements(lignes, "SORTIE" if signe > 0 else "ENTREE", "VENTE", pk)
+    log_transaction(utilisateur, "RECETTE", "VENTE", pk, signe * etat["total"], libelle)
+    crediter_solde(Client, etat["client_id"], signe * (etat["total"] - etat["montant_paye"]))
+
+
+@transaction.atomic
+def enregistrer_vente(donnees, utilisateur=None):
+    """
+    Crée une vente à partir de données validées par ``VenteSerializer``
+    (``lignes`` : liste de dicts produit / quantite / prix_unitaire / remise).
+    """
+    donnees = dict(donnees)
+    lignes_data = donnees.pop("lignes")
+    active = vente_active(donnees.get("statut", "EN_COURS"))
+    if active:
+        _verifier_quantites_entieres(lignes_data)
+
+    vente = Vente.objects.create(**donnees)
+    lignes = LigneVente.objects.bulk_create(LigneVente(vente=vente, **ligne) for ligne in lignes_data)
+
+    if active:
+        # bulk_create n'envoie pas post_save : statistiques produits reportées ici (cf. core.signals)
+        appliquer_lignes_vente(
+            mois_de(vente.date),
+            [(l.produit_id, l.quantite, l.prix_unitaire, l.remise) for l in lignes],
+        )
+        _repercuter_vente(vente.pk, _etat(vente, CHAMPS_VENTE), lignes, 1, utilisateur, f"Vente #{vente.pk}")
+
+    _attacher_lignes(vente, lignes)
+    return vente
+
+
+@transaction.atomic
+def modifier_vente(vente, donnees, utilisateur=None):
+    """
+    Modifie une vente (données validées par ``VenteSerializer``) et en
+    répercute les effets : une annulation les contre-passe, une
+    réactivation les applique de nouveau, une correction de montant ou de
+    client ajuste l'audit et les soldes. Les lignes ne sont pas modifiables.
+    """
+    if "lignes" in donnees:
+        raise ValidationError({"lignes": ["Les lignes d'une vente enregistrée ne sont pas modifiables."]})
+    avant = _etat_verrouille(Vente, vente.pk, CHAMPS_VENTE)
+    for champ, valeur in donnees.items():
+        setattr(vente, champ, valeur)
+    vente.save()
+    apres = _etat(vente, CHAMPS_VENTE)
+
+    active_avant, active_apres = vente_active(avant["statut"]), vente_active(apres["statut"])
+    if active_avant and not active_apres:
+        _repercuter_vente(vente.pk, avant, list(vente.lignes.all()), -1, utilisateur, f"Annulation vente #{vente.pk}")
+    elif active_apres and not active_avant:
+        lignes = list(vente.lignes.all())
+        _verifier_quantites_entieres([{"quantite": ligne.quantite} for ligne in lignes])
+        _repercuter_vente(vente.pk, apres, lignes, 1, utilisateur, f"Réactivation vente #{vente.pk}")
+    elif active_avant:
+        if apres["total"] != avant["total"]:
+            log_transaction(
+                utilisateur, "RECETTE", "VENTE", vente.pk, apres["total"] - avant["total"], f"Correction vente #{vente.pk}"
+            )
+        soldes = defaultdict(Decimal)
+        soldes[avant["client_id"]] -= avant["total"] - avant["montant_paye"]
+        soldes[apres["client_id"]] += apres["total"] - apres["montant_paye"]
+        crediter_soldes(Client, soldes)
+    return vente
+
+
+@transaction.atomic
+def supprimer_vente(vente, utilisateur=None):
+    """Supprime une vente ; si elle était active, ses effets sont d'abord contre-passés."""
+    avant = _etat_verrouille(Vente, vente.pk, CHAMPS_VENTE)
+    if vente_active(avant["statut"]):
+        _repercuter_vente(vente.pk, avant, list(vente.lignes.all()), -1, utilisateur, f"Suppression vente #{vente.pk}")
+    vente.delete()
+
+
+def enregistrer_ventes(lot, utilisateur=None, taille_tranche=500):
+    """
+    Enregistre un lot de ventes validées par ``VenteSerializer`` (``lot`` :
+    liste de (clé, données)) et retourne {clé: Vente créée ou exception}.
+
+    Chaque tranche de ``taille_tranche`` ventes est écrite dans sa propre
+    transaction. Le stock est réservé dans l'ordre du lot : une vente que
+    le stock ne couvre plus (ou aux quantités non entières) est écartée
+    seule, avec son erreur. Une erreur d'écriture fait échouer toute la
+    tranche, sans toucher aux autres.
+    """
+    resultats = {}
+    for debut in range(0, len(lot), taille_tranche):
+        tranche = lot[debut:debut + taille_tranche]
+        try:
+            with transaction.atomic():
+                resultats.update(_enregistrer_tranche(tranche, utilisateur))
+        except APIException as exc:
+            # Stock modifié entre la réservation et la sortie (écriture concurrente)
+            resultats.update((cle, exc) for cle, _ in tranche)
+        except DatabaseError:
+            logger.exception("Enregistrement d'une tranche de %d ventes impossible", len(tranche))
+            erreur = APIException("Enregistrement impossible, tranche annulée.")
+            resultats.update((cle, erreur) for cle, _ in tranche)
+    return resultats
+
+
+def _reserver_stock(tranche):
+    """Sépare les ventes servies par le stock (liste de (clé, données)) des autres ({clé: erreur})."""
+    quantites = {
+        cle: quantites_par_produit(donnees["lignes"])
+        for cle, donnees in tranche if vente_active(donnees.get("statut", "EN_COURS"))
+    }
+    produits = set().union(*quantites.values())
+    stocks = dict(
+        Produit.objects.select_for_update().filter(pk__in=produits).values_list("pk", "stock_actuel")
+    ) if produits else {}
+
+    acceptees, refusees = [], {}
+    for cle, donnees in tranche:
+        if cle in quantites:
+            try:
+                _verifier_quantites_entieres(donnees["lignes"])
+            except ValidationError as exc:
+                refusees[cle] = exc
+                continue
+            noms = {ligne["produit"].pk: ligne["produit"].nom for ligne in donnees["lignes"] if ligne["produit"]}
+            manques = [
+                f"Stock insuffisant pour {noms[pk]} : {stocks.get(pk, 0)} disponible(s), {int(quantite)} demandé(s)."
+                for pk, quantite in quantites[cle].items() if stocks.get(pk, 0) < quantite
+            ]
+            if manques:
+                refusees[cle] = ValidationError({"lignes": manques})
+                continue
+            for pk, quantite in quantites[cle].items():
+                stocks[pk] -= int(quantite)
+        acceptees.append((cle, donnees))
+    return acceptees, refusees
+
+
+def _enregistrer_tranche(tranche, utilisateur):
+    acceptees, resultats = _reserver_stock(tranche)
+    if not acceptees:
+        return resultats
+
+    ventes = Vente.objects.bulk_create(
+        Vente(**{champ: valeur for champ, valeur in donnees.items() if champ != "lignes"})
+        for _, donnees in acceptees
+    )
+    lignes = LigneVente.objects.bulk_create(
+        LigneVente(vente=vente, **ligne)
+        for vente, (_, donnees) in zip(ventes, acceptees) for ligne in donnees["lignes"]
+    )
+    lignes_par_vente = defaultdict(list)
+    for ligne in lignes:
+        lignes_par_vente[ligne.vente_id].append(ligne)
+
+    # bulk_create n'envoie pas post_save : rollups, caches et diffusion reportés ici (cf. core.signals)
+    appliquer_ventes_creees((vente, lignes_par_vente[vente.pk]) for vente in ventes)
+    actives = [(vente, donnees) for vente, (_, donnees) in zip(ventes, acceptees) if vente_active(vente.statut)]
+    quantites, soldes = defaultdict(Decimal), defaultdict(Decimal)
+    for vente, donnees in actives:
+        for pk, quantite in quantites_par_produit(donnees["lignes"]).items():
+            quantites[pk] += quantite
+        if vente.client_id is not None:
+            soldes[vente.client_id] += vente.total - vente.montant_paye
+    ajuster_stock(quantites, -1)
+    MouvementStock.objects.bulk_create(
+        mouvement for vente, _ in actives
+        for mouvement in _mouvements(lignes_par_vente[vente.pk], "SORTIE", "VENTE", vente.pk)
+    )
+    Transaction.objects.bulk_create(
+        transaction_audit(utilisateur, "RECETTE", "VENTE", vente.pk, vente.total, f"Vente #{vente.pk}")
+        for vente, _ in actives
+    )
+    crediter_soldes(Client, soldes)
+
+    invalider(DASHBOARD_STATS)
+    invalider(HISTORIQUE_VENTES)
+    # Un événement par tranche : les abonnés rechargent le tableau de bord, pas chaque vente
+    dernier = ventes[-1].pk
+    transaction.on_commit(lambda: publier_changement("vente", dernier, "creation"))
+
+    for (cle, _), vente in zip(acceptees, ventes):
+        _attacher_lignes(vente, lignes_par_vente[vente.pk])
+        resultats[cle] = vente
+    return resultats
+
+
+# ─────────────────────────────────────────────
+# Achats
+# ─────────────────────────────────────────────
+STATUT_ACHAT_ANNULE = "ANNULE"
+CHAMPS_ACHAT = ("statut", "total", "montant_paye", "fournisseur_id")
+
+
+def achat_actif(statut):
+    return statut != STATUT_ACHAT_ANNULE
+
+
+def _repercuter_achat(pk, etat, lignes, signe, utilisateur, libelle):
+    """Applique (``signe=1``) ou contre-passe (``signe=-1``) les effets d'un achat actif."""
+    ajuster_stock(_quantites_lignes(lignes), signe)
+    mouvements(lignes, "ENTREE" if signe > 0 else "SORTIE", "ACHAT", pk)
+    log_transaction(utilisateur, "DEPENSE", "ACHAT", pk, signe * etat["total"], libelle)
+    crediter_solde(Fournisseur, etat["fournisseur_id"], signe * (etat["total"] - etat["montant_paye"]))
+
+
+@transaction.atomic
+def receptionner_achat(donnees, utilisateur=None):
+    """
+    Crée un achat reçu à partir de données validées par ``AchatSerializer`` :
+    entrée en stock des quantités, mouvements ENTREE, audit (DEPENSE) et
+    montant restant dû ajouté au solde du fournisseur.
+    """
+    donnees = dict(donnees)
+    lignes_data = donnees.pop("lignes")
+    actif = achat_actif(donnees.get("statut", "EN_ATTENTE"))
+    if actif:
+        _verifier_quantites_entieres(lignes_data)
+
+    achat = Achat.objects.create(**donnees)
+    lignes = LigneAchat.objects.bulk_create(LigneAchat(achat=achat, **ligne) for ligne in lignes_data)
+
+    if actif:
+        _repercuter_achat(achat.pk, _etat(achat, CHAMPS_ACHAT), lignes, 1, utilisateur, f"Achat #{achat.pk}")
+
+    _attacher_lignes(achat, lignes)
+    return achat
+
+
+@transaction.atomic
+def modifier_achat(achat, donnees, utilisateur=None):
+    """
+    Modifie un achat (données validées par ``AchatSerializer``) et en
+    répercute les effets, comme ``modifier_vente`` : l'annulation retire
+    du stock les quantités reçues (refusée si elles ont déjà été vendues).
+    """
+    if "lignes" in donnees:
+        raise ValidationError({"lignes": ["Les lignes d'un achat enregistré ne sont pas modifiables."]})
+    avant = _etat_verrouille(Achat, achat.pk, CHAMPS_ACHAT)
+    for champ, valeur in donnees.items():
+        setattr(achat, champ, valeur)
+    achat.save()
+    apres = _etat(achat, CHAMPS_ACHAT)
+
+    actif_avant, actif_apres = achat_actif(avant["statut"]), achat_actif(apres["statut"])
+    if actif_avant and not actif_apres:
+        _repercuter_achat(achat.pk, avant, list(achat.lignes.all()), -1, utilisateur, f"Annulation achat #{achat.pk}")
+    elif actif_apres and not actif_avant:
+        lignes = list(achat.lignes.all())
+        _verifier_quantites_entieres([{"quantite": ligne.quantite} for ligne in lignes])
+        _repercuter_achat(achat.pk, apres, lignes, 1, utilisateur, f"Réactivation achat #{achat.pk}")
+    elif actif_avant:
+        if apres["total"] != avant["total"]:
+            log_transaction(
+                utilisateur, "DEPENSE", "ACHAT", achat.pk, apres["total"] - avant["total"], f"Correction achat #{achat.pk}"
+            )
+        soldes = defaultdict(Decimal)
+        soldes[avant["fournisseur_id"]] -= avant["total"] - avant["montant_paye"]
+        soldes[apres["fournisseur_id"]] += apres["total"] - apres["montant_paye"]
+        crediter_soldes(Fournisseur, soldes)
+    return achat
+
+
+@transaction.atomic
+def supprimer_achat(achat, utilisateur=None):
+    """Supprime un achat ; s'il était actif, ses effets sont d'abord contre-passés."""
+    avant = _etat_verrouille(Achat, achat.pk, CHAMPS_ACHAT)
+    if achat_actif(avant["statut"]):
+        _repercuter_achat(achat.pk, avant, list(achat.lignes.all()), -1, utilisateur, f"Suppression achat #{achat.pk}")
+    achat.delete()
@@ -0,0 +1,219 @@
+"""
+Signaux de l'application core (chargés par CoreConfig.ready).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.cache import (
+    DASHBOARD_STATS, HISTORIQUE_VENTES, REFERENCE_CATEGORIES, REFERENCE_PRODUITS, invalider
+)
+from core.events import publier_changement
+from core.models import (
+    Achat, CategorieProduit, Client, Employe, Fournisseur, LigneVente, MouvementStock, Produit, Vente
+)
+from core.rollups import (
+    appliquer_delta_vente, appliquer_lignes_vente, appliquer_vente_client,
+    contribution_vente, mois_de, vente_active
+)
+from core.sync import journaliser
+
+
+# ─────────────────────────────────────────────
+# Rollups des ventes (journalier, par client)
+# ─────────────────────────────────────────────
+@receiver(pre_save, sender=Vente)
+def memoriser_vente_precedente(sender, instance, raw=False, **kwargs):
+    """Conserve l'état en base avant modification pour calculer le delta."""
+    instance._rollup_precedent = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_precedent = (
+        Vente.objects.filter(pk=instance.pk)
+        .values('statut', 'total', 'date', 'client_id')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Vente)
+def maj_rollup_vente(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    precedent = getattr(instance, '_rollup_precedent', None)
+
+    ancienne = contribution_vente(precedent['statut'], precedent['total'], precedent['date']) if precedent else None
+    nouvelle = contribution_vente(instance.statut, instance.total, instance.date)
+    if ancienne != nouvelle:
+        if ancienne:
+            appliquer_delta_vente(ancienne[0], -ancienne[1], -1)
+        if nouvelle:
+            appliquer_delta_vente(nouvelle[0], nouvelle[1], 1)
+
+    ancienne = _contribution_client(**precedent) if precedent else None
+    nouvelle = _contribution_client(instance.statut, instance.total, instance.date, instance.client_id)
+    if ancienne != nouvelle:
+        if ancienne:
+            appliquer_vente_client(*ancienne, signe=-1)
+        if nouvelle:
+            appliquer_vente_client(*nouvelle)
+
+    # Annulation / réactivation : les lignes sortent / rentrent dans les stats produits
+    if precedent and vente_active(precedent['statut']) != vente_active(instance.statut):
+        appliquer_lignes_vente(
+            mois_de(instance.date),
+            instance.lignes.values_list('produit_id', 'quantite', 'prix_unitaire', 'remise'),
+            signe=1 if vente_active(instance.statut) else -1,
+        )
+
+
+@receiver(post_delete, sender=Vente)
+def retirer_vente_du_rollup(sender, instance, **kwargs):
+    contribution = contribution_vente(instance.statut, instance.total, instance.date)
+    if contribution:
+        appliquer_delta_vente(contribution[0], -contribution[1], -1)
+    contribution = _contribution_client(instance.statut, instance.total, instance.date, instance.client_id)
+    if contribution:
+        appliquer_vente_client(*contribution, signe=-1)
+
+
+def _contribution_client(statut, total, date, client_id):
+    if not vente_active(statut) or client_id is None or date is None:
+        return None
+    return client_id, mois_de(date), total
+
+
+# ─────────────────────────────────────────────
+# Statistiques mensuelles par produit
+# ─────────────────────────────────────────────
+def _contribution_ligne(vente, produit_id, quantite, prix_unitaire, remise):
+    if produit_id is None or not vente_active(vente.statut):
+        return None
+    return mois_de(vente.date), (produit_id, quantite, prix_unitaire, remise)
+
+
+@receiver(pre_save, sender=LigneVente)
+def memoriser_ligne_precedente(sender, instance, raw=False, **kwargs):
+    instance._rollup_precedent = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_precedent = (
+        LigneVente.objects.filter(pk=instance.pk)
+        .values_list('produit_id', 'quantite', 'prix_unitaire', 'remise')
+        .first()
+    )
+
+
+@receiver(post_save, sender=LigneVente)
+def maj_stats_produit(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    precedent = getattr(instance, '_rollup_precedent', None)
+    ancienne = _contribution_ligne(instance.vente, *precedent) if precedent else None
+    nouvelle = _contribution_ligne(
+        instance.vente, instance.produit_id, instance.quantite, instance.prix_unitaire, instance.remise
+    )
+    if ancienne == nouvelle:
+        return
+    if ancienne:
+        appliquer_lignes_vente(ancienne[0], [ancienne[1]], signe=-1)
+    if nouvelle:
+        appliquer_lignes_vente(nouvelle[0], [nouvelle[1]])
+
+
+@receiver(post_delete, sender=LigneVente)
+def retirer_ligne_des_stats(sender, instance, **kwargs):
+    try:
+        vente = instance.vente
+    except Vente.DoesNotExist:
+        return
+    contribution = _contribution_ligne(
+        vente, instance.produit_id, instance.quantite, instance.prix_unitaire, instance.remise
+    )
+    if contribution:
+        appliquer_lignes_vente(contribution[0], [contribution[1]], signe=-1)
+
+
+# ─────────────────────────────────────────────
+# Invalidation des snapshots en cache
+# ─────────────────────────────────────────────
+@receiver(post_save, sender=Vente)
+@receiver(post_delete, sender=Vente)
+@receiver(post_save, sender=Achat)
+@receiver(post_delete, sender=Achat)
+@receiver(post_save, sender=Produit)
+@receiver(post_delete, sender=Produit)
+def invalider_dashboard(sender, **kwargs):
+    invalider(DASHBOARD_STATS)
+
+
+@receiver(post_save, sender=Vente)
+@receiver(post_delete, sender=Vente)
+def invalider_historique(sender, **kwargs):
+    invalider(HISTORIQUE_VENTES)
+
+
+@receiver(post_save, sender=CategorieProduit)
+@receiver(post_delete, sender=CategorieProduit)
+def invalider_categories(sender, **kwargs):
+    invalider(REFERENCE_CATEGORIES)
+    # La liste des produits imbrique la catégorie
+    invalider(REFERENCE_PRODUITS)
+
+
+@receiver(post_save, sender=Produit)
+@receiver(post_delete, sender=Produit)
+def invalider_produits(sender, **kwargs):
+    invalider(REFERENCE_PRODUITS)
+
+
+# ─────────────────────────────────────────────
+# Journal de synchronisation (core.sync)
+# ─────────────────────────────────────────────
+@receiver(post_save, sender=CategorieProduit)
+@receiver(post_save, sender=Produit)
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Fournisseur)
+@receiver(post_save, sender=Employe)
+def journaliser_enregistrement(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    journaliser(sender, [instance.pk])
+    if sender is CategorieProduit:
+        # Les produits imbriquent leur catégorie
+        journaliser(Produit, instance.produit_set.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=CategorieProduit)
+def journaliser_produits_decategorises(sender, instance, **kwargs):
+    # SET_NULL passe par QuerySet.update() : aucun signal côté produits
+    journaliser(Produit, instance.produit_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=CategorieProduit)
+@receiver(post_delete, sender=Produit)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Fournisseur)
+@receiver(post_delete, sender=Employe)
+def journaliser_suppression(sender, instance, **kwargs):
+    journaliser(sender, [instance.pk], supprime=True)
+
+
+# ─────────────────────────────────────────────
+# Diffusion temps réel (flux SSE du tableau de bord)
+# ─────────────────────────────────────────────
+@receiver(post_save, sender=Vente)
+@receiver(post_save, sender=Achat)
+@receiver(post_save, sender=MouvementStock)
+def publier_enregistrement(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    modele, pk, action = sender._meta.model_name, instance.pk, "creation" if created else "modification"
+    transaction.on_commit(lambda: publier_changement(modele, pk, action))
+
+
+@receiver(post_delete, sender=Vente)
+@receiver(post_delete, sender=Achat)
+@receiver(post_delete, sender=MouvementStock)
+def publier_suppression(sender, instance, **kwargs):
+    modele, pk = sender._meta.model_name, instance.pk
+    transaction.on_commit(lambda: publier_changement(modele, pk, "suppression"))
@@ -0,0 +1,110 @@
+"""
+Synchronisation incrémentale des données de référence (terminaux hors
+ligne, front end).
+
+Chaque création, modification ou suppression d'un produit, d'une
+catégorie, d'un client, d'un fournisseur ou d'un employé est inscrite par
+core.signals dans ``ChangementSync``. Le journal est compacté : un objet
+n'y a qu'une entrée, replacée en fin de journal à chaque changement. Le
+jeton remis au client est la position de la dernière entrée servie, et
+``?since=<jeton>`` ne relit que les entrées postérieures. Une suppression
+laisse une entrée ``supprime=True`` (tombstone).
+
+Comme le journal décrit l'état complet, ``since=0`` sert tout le
+catalogue ; la migration initiale y inscrit les lignes existantes.
+
+La position d'une entrée est ``(xid, id)`` : sous PostgreSQL, ``xid`` est
+l'identifiant de la transaction qui l'a écrite (l'entrée existante est
+mise à jour sur place, ``INSERT ... ON CONFLICT``). Une lecture ne sert
+que les entrées des transactions antérieures à la plus ancienne encore
+en cours (``pg_snapshot_xmin``) : toute écriture validée plus tard aura
+une position supérieure, et un client ne peut pas dépasser une entrée
+encore en cours d'écriture. Aucun verrou n'est pris ; une longue
+transaction retarde seulement la diffusion des changements suivants.
+Ailleurs (SQLite), les écritures sont sérialisées par la base : ``xid``
+vaut 0, l'entrée est réinsérée et l'ordre des ids suffit.
+
+Les écritures en masse (``QuerySet.update()``, ``bulk_create()``)
+contournent les signaux et doivent appeler ``journaliser`` elles-mêmes.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from core.models import CategorieProduit, ChangementSync, Client, Employe, Fournisseur, Produit, TransactionCourante
+
+# Ressource (préfixe d'URL de l'API) -> modèle
+RESSOURCES = {
+    'categories': CategorieProduit,
+    'produits': Produit,
+    'clients': Client,
+    'fournisseurs': Fournisseur,
+    'employes': Employe,
+}
+_PAR_MODELE = {modele: nom for nom, modele in RESSOURCES.items()}
+
+
+def ressource_de(modele):
+    return _PAR_MODELE[modele]
+
+
+def journaliser(modele, ids, supprime=False):
+    """Inscrit un changement des objets ``ids`` de ``modele`` en fin de journal."""
+    ids = list(dict.fromkeys(ids))  # ON CONFLICT ne met pas à jour deux fois la même ligne
+    if not ids:
+        return
+    ressource = ressource_de(modele)
+    entrees = [
+        ChangementSync(ressource=ressource, objet_id=pk, supprime=supprime, xid=TransactionCourante())
+        for pk in ids
+    ]
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            ChangementSync.objects.bulk_create(
+                entrees, update_conflicts=True,
+                unique_fields=['ressource', 'objet_id'], update_fields=['supprime', 'date', 'xid'],
+            )
+            return
+        ChangementSync.objects.filter(ressource=ressource, objet_id__in=ids).delete()
+        ChangementSync.objects.bulk_create(entrees)
+
+
+def lire_jeton(jeton):
+    """``"xid.id"`` (ou ``"id"``) -> (xid, id) ; ValueError si mal formé."""
+    xid, _, pk = str(jeton).rpartition('.')
+    position = int(xid or 0), int(pk)
+    if min(position) < 0:
+        raise ValueError(jeton)
+    return position
+
+
+def ecrire_jeton(position):
+    return '%d.%d' % position
+
+
+def changements_depuis(position, taille, ressources=None):
+    """
+    Lit au plus ``taille`` entrées après ``position`` (``(xid, id)``).
+
+    Retourne ``(changements, position, encore)`` : ``changements`` associe à
+    chaque ressource ``(ids_modifies, ids_supprimes)`` ; ``position`` est à
+    repasser au prochain appel ; ``encore`` indique qu'il reste des entrées
+    à lire.
+    """
+    xid, pk = position
+    entrees = ChangementSync.objects.filter(Q(xid__gt=xid) | Q(xid=xid, id__gt=pk)).order_by('xid', 'id')
+    if connection.vendor == 'postgresql':
+        entrees = entrees.filter(xid__lt=RawSQL('pg_snapshot_xmin(pg_current_snapshot())::text::bigint', []))
+    if ressources is not None:
+        entrees = entrees.filter(ressource__in=ressources)
+    entrees = list(entrees.values_list('xid', 'id', 'ressource', 'objet_id', 'supprime')[:taille + 1])
+    encore = len(entrees) > taille
+    entrees = entrees[:taille]
+
+    changements = {}
+    for _, _, ressource, objet_id, supprime in entrees:
+        modifies, supprimes = changements.setdefault(ressource, ([], []))
+        (supprimes if supprime else modifies).append(objet_id)
+    if entrees:
+        position = entrees[-1][:2]
+    return changements, position, encore
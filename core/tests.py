@@ -1,5 +1,49 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import threading
+import time
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+import msgpack
+import zstandard
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db import connection
+from django.test import (
+    AsyncClient, AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
 from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.events import Broadcaster, DiffuseurKpi, LocalBackend
+from core.kpis import KPIS, calculer_kpi, calculer_kpis
+from core.compression import choisir_codec, codecs_disponibles
+from core.middleware import CompressionMiddleware
+from core.pagination import compter
+from core.renderers import MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer
+from core.series import calculer_series
+from core.serializers import MouvementStockSerializer, VenteSerializer
+from core.views.asynchrone import DashboardStatsAsyncView, HistoriqueVentesAsyncView
+from core.views.dashboard import calculer_stats_dashboard
+from core.models import (
+    Achat, CategorieProduit, ChangementSync, Client, ClientMonthlyStats, Fournisseur, LigneAchat, LigneVente, MouvementStock, Produit,
+    ProduitMonthlyStats, RequeteIdempotente, Transaction, Vente, VenteDailyRollup
+)
+from core.utils import intervalle_jours, intervalle_mois
+from users.models import User
 
 class BasicTests(TestCase):
     def test_home_page(self):
@@ -8,4 +52,1403 @@ class BasicTests(TestCase):
     
     def test_admin_page(self):
         response = self.client.get('/admin/')
-        self.assertIn(response.status_code, [200, 302])
\ No newline at end of file
+        self.assertIn(response.status_code, [200, 302])
+
+class VenteDailyRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+
+    def _rollup(self):
+        return list(VenteDailyRollup.objects.values_list("total", "nombre"))
+
+    def test_rollup_suit_creation_statut_et_suppression(self):
+        vente = Vente.objects.create(total=Decimal("100.00"))
+        self.assertEqual(self._rollup(), [])
+
+        vente.statut = "PAYEE"
+        vente.save()
+        Vente.objects.create(total=Decimal("50.00"), statut="PAYEE")
+        self.assertEqual(self._rollup(), [(Decimal("150.00"), 2)])
+
+        vente.total = Decimal("80.00")
+        vente.save()
+        self.assertEqual(self._rollup(), [(Decimal("130.00"), 2)])
+
+        vente.delete()
+        self.assertEqual(self._rollup(), [(Decimal("50.00"), 1)])
+
+    def test_rebuild_rollups(self):
+        Vente.objects.create(total=Decimal("10.00"), statut="PAYEE")
+        Vente.objects.create(total=Decimal("30.00"), statut="PAYEE")
+        VenteDailyRollup.objects.all().delete()
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(self._rollup(), [(Decimal("40.00"), 2)])
+
+    def test_historique_ventes(self):
+        Vente.objects.create(total=Decimal("10.00"), statut="PAYEE")
+        Vente.objects.create(total=Decimal("30.00"), statut="PAYEE")
+        for periode in ("jour", "semaine", "mois"):
+            response = self.api.get("/api/stats/historique-ventes/", {"periode": periode})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["data"]), 1)
+            ligne = response.data["data"][0]
+            self.assertEqual(ligne["total_ventes"], "40.00")
+            self.assertEqual(ligne["nombre_ventes"], 2)
+            self.assertEqual(ligne["montant_moyen"], "20.00")
+
+    def test_historique_parametres_bornes(self):
+        for parametres in ({"jours": "abc"}, {"jours": 0}, {"jours": 5 * 366 + 1}, {"periode": "annee"}):
+            with self.subTest(parametres=parametres):
+                response = self.api.get("/api/stats/historique-ventes/", parametres)
+                self.assertEqual(response.status_code, 400)
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+
+    def test_hit_miss_et_invalidation(self):
+        url = "/api/dashboard-stats/"
+        self.assertEqual(self.api.get(url)["X-Cache"], "MISS")
+        self.assertEqual(self.api.get(url)["X-Cache"], "HIT")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("1.00"), stock_actuel=7)
+        # Rafale d'écritures : l'ancien snapshot reste servi pendant le debounce
+        response = self.api.get(url)
+        self.assertEqual(response["X-Cache"], "STALE")
+        self.assertEqual(response.data["total_stock"], 0)
+
+        with override_settings(DASHBOARD_CACHE_DEBOUNCE=0):
+            response = self.api.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["total_stock"], 7)
+
+
+class KpiEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"), stock_actuel=10, seuil_min=20)
+        Produit.objects.create(nom="Huile", unite="l", prix_unitaire=Decimal("4.00"), stock_actuel=5, seuil_min=1)
+        Vente.objects.create(total=Decimal("100.00"), montant_paye=Decimal("100.00"), statut="PAYEE")
+        Vente.objects.create(total=Decimal("80.00"), montant_paye=Decimal("30.00"))
+        Vente.objects.create(total=Decimal("60.00"), statut="ANNULEE")
+        Achat.objects.create(total=Decimal("70.00"), montant_paye=Decimal("20.00"), statut="PARTIEL")
+
+    def test_tous_les_kpis_en_une_requete(self):
+        with self.assertNumQueries(1):
+            kpis = calculer_kpis()
+        self.assertEqual(kpis, {
+            "total_vente": Decimal("100.00"),
+            "total_achat": Decimal("70.00"),
+            "total_stock": 15,
+            "valeur_stock": Decimal("45.00"),
+            "creances_clients": Decimal("50.00"),
+            "dettes_fournisseurs": Decimal("50.00"),
+            "produits_sous_seuil": 1,
+        })
+
+    def test_sous_ensemble_via_parametre(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        response = api.get("/api/dashboard-stats/", {"kpis": "valeur_stock,produits_sous_seuil"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"valeur_stock": "45.00", "produits_sous_seuil": 1})
+        self.assertEqual(api.get("/api/dashboard-stats/", {"kpis": "inconnu"}).status_code, 400)
+
+    def test_une_requete_quel_que_soit_le_nombre_de_kpis(self):
+        for n in range(1, len(KPIS) + 1):
+            with self.assertNumQueries(1):
+                calculer_kpis(list(KPIS)[:n])
+
+
+class FiltresDateTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+
+    def test_filtre_jour_semi_ouvert(self):
+        aujourd_hui = timezone.localdate()
+        debut, fin = intervalle_jours(aujourd_hui, aujourd_hui)
+        t1 = Transaction.objects.create(type="RECETTE", module="VENTE", reference_id=1, montant=1)
+        t2 = Transaction.objects.create(type="RECETTE", module="VENTE", reference_id=2, montant=1)
+        Transaction.objects.filter(pk=t1.pk).update(date=debut)
+        Transaction.objects.filter(pk=t2.pk).update(date=fin)
+
+        response = self.api.get("/api/transactions/", {"date": aujourd_hui.isoformat()})
+        self.assertEqual([t["id"] for t in response.data["results"]], [t1.pk])
+        response = self.api.get("/api/transactions/", {"date_debut": (aujourd_hui + timedelta(days=1)).isoformat()})
+        self.assertEqual([t["id"] for t in response.data["results"]], [t2.pk])
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN spécifique à PostgreSQL")
+class IndexDatesExplainTests(TestCase):
+    def _plan(self, queryset):
+        with connection.cursor() as cursor:
+            # Tables quasi vides : on interdit le seq scan pour observer l'index choisi
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_index_composites_utilises(self):
+        debut, fin = intervalle_mois(timezone.localdate())
+        produit = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=1)
+        cas = {
+            "vente_statut_date_idx": Vente.objects.filter(statut="PAYEE", date__gte=debut, date__lt=fin),
+            "achat_statut_date_idx": Achat.objects.filter(statut="PAYE", date__gte=debut, date__lt=fin),
+            "mouvement_produit_date_idx": MouvementStock.objects.filter(produit=produit, date__gte=debut, date__lt=fin),
+            "transaction_module_date_idx": Transaction.objects.filter(module="VENTE", date__gte=debut, date__lt=fin),
+        }
+        for index, queryset in cas.items():
+            with self.subTest(index=index):
+                self.assertIn(index, self._plan(queryset))
+
+
+class SeriesTemporellesTests(TestCase):
+    def setUp(self):
+        self.aujourd_hui = timezone.localdate()
+        self.hier = self.aujourd_hui - timedelta(days=1)
+        Vente.objects.create(total=Decimal("100.00"), statut="PAYEE")
+        Vente.objects.create(total=Decimal("20.00"), statut="PAYEE")
+        achat = Achat.objects.create(total=Decimal("30.00"), statut="PAYE")
+        Achat.objects.filter(pk=achat.pk).update(date=intervalle_jours(self.hier, self.hier)[0])
+
+    def test_series_alignees_et_completees(self):
+        debut = self.aujourd_hui - timedelta(days=2)
+        with self.assertNumQueries(1):
+            resultat = calculer_series(debut, self.aujourd_hui, comparer=True)
+        self.assertEqual(resultat["labels"], [debut, self.hier, self.aujourd_hui])
+        self.assertEqual(resultat["series"], {
+            "ventes": ["0.00", "0.00", "120.00"],
+            "achats": ["0.00", "30.00", "0.00"],
+            "solde_flux": ["0.00", "-30.00", "120.00"],
+            "nombre_ventes": [0, 0, 2],
+        })
+        self.assertEqual(resultat["precedent"]["labels"][-1], debut - timedelta(days=1))
+        self.assertEqual(resultat["precedent"]["series"]["ventes"], ["0.00"] * 3)
+
+    def test_buckets_extremes_tronques(self):
+        # Le bucket du mois déborde de l'intervalle : l'achat d'hier n'est pas compté
+        resultat = calculer_series(self.aujourd_hui, self.aujourd_hui, "mois", ["ventes", "achats"])
+        self.assertEqual(resultat["labels"], [self.aujourd_hui.replace(day=1)])
+        self.assertEqual(resultat["series"], {"ventes": ["120.00"], "achats": ["0.00"]})
+
+        resultat = calculer_series(self.aujourd_hui, self.aujourd_hui, metriques=["achats"], comparer=True)
+        self.assertEqual(resultat["precedent"]["series"], {"achats": ["30.00"]})
+
+    def test_endpoint(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        response = api.get("/api/stats/series/", {"periode": "mois", "metriques": "ventes,achats"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data["series"]), {"ventes", "achats"})
+        self.assertEqual(len(response.data["labels"]), len(response.data["series"]["ventes"]))
+        self.assertEqual(api.get("/api/stats/series/", {"metriques": "stock"}).status_code, 400)
+
+
+class StatsMensuellesTests(TestCase):
+    def setUp(self):
+        self.riz = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("2.00"))
+        self.huile = Produit.objects.create(nom="Huile", unite="l", prix_unitaire=Decimal("5.00"))
+        self.client_a = Client.objects.create(nom="Awa")
+        self.vente = Vente.objects.create(client=self.client_a, total=Decimal("25.00"))
+        LigneVente.objects.create(vente=self.vente, produit=self.riz, quantite=10, prix_unitaire=Decimal("2.00"))
+        LigneVente.objects.create(
+            vente=self.vente, produit=self.huile, quantite=1, prix_unitaire=Decimal("5.00"), remise=Decimal("0.50")
+        )
+
+    def _stats(self):
+        return (
+            sorted(ProduitMonthlyStats.objects.values_list("produit__nom", "quantite", "chiffre_affaires")),
+            list(ClientMonthlyStats.objects.values_list("nombre_ventes", "chiffre_affaires")),
+        )
+
+    def test_maintenance_incrementale(self):
+        self.assertEqual(self._stats(), (
+            [("Huile", Decimal("1.00"), Decimal("4.50")), ("Riz", Decimal("10.00"), Decimal("20.00"))],
+            [(1, Decimal("25.00"))],
+        ))
+        incremental = self._stats()
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(self._stats(), incremental)
+
+        self.vente.statut = "ANNULEE"
+        self.vente.save()
+        produits, clients = self._stats()
+        self.assertEqual({ca for _, _, ca in produits}, {Decimal("0.00")})
+        self.assertEqual(clients, [(0, Decimal("0.00"))])
+
+        self.vente.statut = "PAYEE"
+        self.vente.save()
+        self.assertEqual(self._stats(), incremental)
+
+        self.vente.delete()
+        produits, clients = self._stats()
+        self.assertEqual({ca for _, _, ca in produits}, {Decimal("0.00")})
+
+    def test_top_produits_et_clients(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        response = api.get("/api/stats/top/", {"n": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"][0]["produit__nom"], "Riz")
+        response = api.get("/api/stats/top/", {"critere": "quantite", "n": 5})
+        self.assertEqual([l["produit__nom"] for l in response.data["data"]], ["Riz", "Huile"])
+        response = api.get("/api/stats/top/", {"type": "clients"})
+        self.assertEqual(response.data["data"][0]["chiffre_affaires_total"], "25.00")
+        self.assertEqual(api.get("/api/stats/top/", {"type": "clients", "critere": "quantite"}).status_code, 400)
+
+
+class FluxTempsReelTests(TestCase):
+    def test_delta_diffuse_aux_abonnes(self):
+        valeurs = [{"total_vente": "10.00", "total_stock": 3}, {"total_vente": "15.00", "total_stock": 3}]
+        appels = []
+
+        def calcul():
+            appels.append(1)
+            return valeurs[len(appels) - 1]
+
+        broadcaster = Broadcaster()
+        diffuseur = DiffuseurKpi(broadcaster, calcul=calcul)
+
+        async def scenario():
+            files = [broadcaster.abonner(), broadcaster.abonner()]
+            messages = []
+            for _ in valeurs:
+                # Rafale de changements : un seul calcul, un seul message par abonné
+                for pk in range(5):
+                    diffuseur.recevoir({"type": "changement", "modele": "vente", "id": pk})
+                messages.append([await asyncio.wait_for(f.get(), 5) for f in files])
+            return messages
+
+        with override_settings(EVENTS_COALESCE=0.2):
+            premier, second = asyncio.run(scenario())
+        self.assertEqual(len(appels), 2)
+        self.assertEqual(premier[0], premier[1])
+        self.assertEqual(premier[0]["kpis"], {"total_vente": "10.00", "total_stock": 3})
+        self.assertEqual(second[0]["kpis"], {"total_vente": "15.00"})
+
+    def test_signal_publie_apres_commit(self):
+        backend = LocalBackend()
+        recus = []
+        backend.demarrer(recus.append)
+        with mock.patch("core.events._backend", backend):
+            with self.captureOnCommitCallbacks(execute=True):
+                vente = Vente.objects.create(total=Decimal("5.00"))
+                self.assertEqual(recus, [])
+        self.assertEqual(recus, [{"type": "changement", "modele": "vente", "id": vente.pk, "action": "creation"}])
+
+    async def test_flux_exige_une_authentification(self):
+        client = AsyncClient()
+        response = await client.get("/api/dashboard-stats/stream/")
+        self.assertEqual(response.status_code, 401)
+
+        await client.aforce_login(await User.objects.acreate(username="test"))
+        response = await client.get("/api/dashboard-stats/stream/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        premier = await anext(aiter(response.streaming_content))
+        self.assertTrue(premier.startswith(b"event: snapshot\ndata: "))
+        await response.streaming_content.aclose()
+
+    def test_flux_refuse_sous_wsgi(self):
+        self.client.force_login(User.objects.create_user(username="test", password="x"))
+        response = self.client.get("/api/dashboard-stats/stream/")
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+
+
+class VuesAsynchronesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="test", password="x")
+        Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"), stock_actuel=4)
+        Vente.objects.create(total=Decimal("12.00"), statut="PAYEE")
+
+    async def _get_async(self, vue, url):
+        request = AsyncRequestFactory().get(url)
+        request.user = self.user
+        return await vue.as_view()(request)
+
+    async def test_meme_reponse_que_les_vues_synchrones(self):
+        api = APIClient()
+        api.force_authenticate(self.user)
+        cas = [
+            (DashboardStatsAsyncView, "/api/dashboard-stats/?kpis=total_vente,valeur_stock"),
+            (HistoriqueVentesAsyncView, "/api/stats/historique-ventes/?periode=mois"),
+        ]
+        for vue, url in cas:
+            with self.subTest(url=url):
+                attendu = await sync_to_async(api.get)(url)
+                response = await self._get_async(vue, url)
+                self.assertEqual(response.status_code, 200)
+                if "historique" in url:
+                    self.assertEqual(json.loads(response.content)["data"], json.loads(attendu.content)["data"])
+                else:
+                    self.assertEqual(json.loads(response.content), json.loads(attendu.content))
+
+    async def test_erreurs(self):
+        response = await self._get_async(DashboardStatsAsyncView, "/api/dashboard-stats/?kpis=inconnu")
+        self.assertEqual(response.status_code, 400)
+        request = AsyncRequestFactory().get("/api/dashboard-stats/")
+        request.user = AnonymousUser()
+        self.assertEqual((await DashboardStatsAsyncView.as_view()(request)).status_code, 401)
+        response = await self._get_async(HistoriqueVentesAsyncView, "/api/stats/historique-ventes/?jours=100000")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("jours", json.loads(response.content))
+
+    def test_kpi_isole_identique(self):
+        tous = calculer_kpis()
+        for nom in KPIS:
+            with self.subTest(kpi=nom):
+                self.assertEqual(calculer_kpi(nom), tous[nom])
+
+
+class KpisParallelesTests(TransactionTestCase):
+    async def test_kpi_calcules_en_parallele(self):
+        await sync_to_async(cache.clear)()
+        user = await sync_to_async(User.objects.create_user)(username="test", password="x")
+        await Produit.objects.acreate(nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"), stock_actuel=4)
+        await Vente.objects.acreate(total=Decimal("12.00"), statut="PAYEE")
+        attendu = await sync_to_async(calculer_stats_dashboard)()
+
+        request = AsyncRequestFactory().get("/api/dashboard-stats/")
+        request.user = user
+        response = await DashboardStatsAsyncView.as_view()(request)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(json.loads(response.content), json.loads(JSONRenderer().render(attendu)))
+        response = await DashboardStatsAsyncView.as_view()(request)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+
+class PrechauffageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        categorie = CategorieProduit.objects.create(nom="Céréales")
+        Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"), categorie=categorie)
+
+    def test_warm_caches_remplit_chaque_entree(self):
+        sortie = StringIO()
+        call_command("warm_caches", stdout=sortie)
+        self.assertIn("liste des produits", sortie.getvalue())
+        urls = [
+            "/api/dashboard-stats/",
+            "/api/stats/historique-ventes/?periode=jour",
+            "/api/stats/historique-ventes/?periode=semaine&jours=30",
+            "/api/categories/",
+            "/api/produits/",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.api.get(url)["X-Cache"], "HIT")
+
+    def test_liste_de_reference_invalidee(self):
+        self.assertEqual(self.api.get("/api/produits/")["X-Cache"], "MISS")
+        with self.captureOnCommitCallbacks(execute=True):
+            categorie = CategorieProduit.objects.get()
+            categorie.nom = "Grains"
+            categorie.save()
+        with override_settings(DASHBOARD_CACHE_DEBOUNCE=0):
+            response = self.api.get("/api/produits/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["categorie"]["nom"], "Grains")
+        # Les requêtes filtrées ne passent pas par le cache
+        self.assertNotIn("X-Cache", self.api.get("/api/produits/", {"search": "Riz"}))
+
+
+class PaginationParCleTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        self.ids = [
+            Transaction.objects.create(type="RECETTE", module="VENTE", reference_id=i, montant=1).pk
+            for i in range(5)
+        ]
+        # Dates identiques : l'id départage les lignes
+        Transaction.objects.update(date=timezone.now())
+
+    def _parcourir(self, url, params=None):
+        ids, pages = [], 0
+        response = self.api.get(url, params)
+        while True:
+            pages += 1
+            ids += [t["id"] for t in response.data["results"]]
+            if not response.data["next"]:
+                return ids, pages, response
+            response = self.api.get(response.data["next"])
+
+    def test_parcours_complet_sans_doublon(self):
+        ids, pages, derniere = self._parcourir("/api/transactions/", {"page_size": 2})
+        self.assertEqual(ids, sorted(self.ids, reverse=True))
+        self.assertEqual(pages, 3)
+
+        precedente = self.api.get(derniere.data["previous"])
+        self.assertEqual([t["id"] for t in precedente.data["results"]], ids[2:4])
+        premiere = self.api.get(precedente.data["previous"])
+        self.assertEqual([t["id"] for t in premiere.data["results"]], ids[:2])
+        self.assertIsNone(premiere.data["previous"])
+
+    def test_modele_sans_date_trie_par_id(self):
+        categories = [CategorieProduit.objects.create(nom=f"C{i}").pk for i in range(3)]
+        ids, pages, _ = self._parcourir("/api/categories/", {"page_size": 2})
+        self.assertEqual(ids, categories)
+        self.assertEqual(pages, 2)
+
+    def test_taille_de_page_plafonnee(self):
+        with override_settings(API_PAGE_SIZE_MAX=3):
+            response = self.api.get("/api/transactions/", {"page_size": 1000})
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_curseur_invalide(self):
+        self.assertEqual(self.api.get("/api/transactions/", {"cursor": "%%%"}).status_code, 404)
+
+    def test_curseur_mal_forme(self):
+        def curseur(position):
+            brut = json.dumps({"p": position, "r": False}).encode()
+            return urlsafe_b64encode(brut).decode().rstrip("=")
+
+        # (-date, -id) pour les ventes et transactions, id pour les clients
+        cas = {
+            "/api/ventes/": [["zzz", "1"], ["2025-01-01T00:00:00+00:00", "abc"], [None, None], "abc", [1], {"a": 1}],
+            "/api/transactions/": [["zzz", "1"], [[], 1], [None, None], "abc", [1]],
+            "/api/clients/": [["zzz"], [None], "abc", [1, 2], [], [{"a": 1}]],
+        }
+        for url, positions in cas.items():
+            for position in positions:
+                with self.subTest(url=url, position=position):
+                    self.assertEqual(self.api.get(url, {"cursor": curseur(position)}).status_code, 404)
+        jeton = urlsafe_b64encode(b"[1, 2]").decode()
+        self.assertEqual(self.api.get("/api/clients/", {"cursor": jeton}).status_code, 404)
+
+    def test_pagination_par_decalage_explicite(self):
+        response = self.api.get("/api/transactions/", {"page": 2, "page_size": 2})
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class ComptageEstimeTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        for i in range(5):
+            Transaction.objects.create(type="RECETTE", module="VENTE", reference_id=i, montant=1)
+
+    def test_sqlite_comptage_exact(self):
+        response = self.api.get("/api/transactions/", {"page_size": 2})
+        self.assertEqual((response.data["count"], response.data["count_exact"]), (5, True))
+        response = self.api.get("/api/transactions/", {"page": 1, "page_size": 2})
+        self.assertEqual((response.data["count"], response.data["count_exact"]), (5, True))
+
+    def test_postgresql_estime_ou_plafonne(self):
+        with mock.patch.object(connection, "vendor", "postgresql"), \
+                mock.patch("core.pagination.estimation_table", return_value=50000):
+            self.assertEqual(compter(Transaction.objects.all(), plafond=3), (50000, False))
+            filtre = Transaction.objects.filter(module="VENTE")
+            self.assertEqual(compter(filtre, plafond=3), (3, False))
+            self.assertEqual(compter(filtre, plafond=10), (5, True))
+
+    def test_admin_changelist(self):
+        admin = User.objects.create_superuser(username="admin", password="x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:core_transaction_changelist"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 5)
+
+
+class ChampsDemandesTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        categorie = CategorieProduit.objects.create(nom="Céréales")
+        self.produit = Produit.objects.create(
+            nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"), categorie=categorie
+        )
+        client = Client.objects.create(nom="Awa")
+        vente = Vente.objects.create(client=client, total=5, montant_paye=5, statut="PAYEE")
+        LigneVente.objects.create(vente=vente, produit=self.produit, quantite=2, prix_unitaire=Decimal("2.50"))
+
+    def test_fields_sans_jointure(self):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.api.get("/api/produits/", {"fields": "id,nom,prix_unitaire"})
+        self.assertEqual(response.data["results"], [{"id": self.produit.pk, "nom": "Riz", "prix_unitaire": "2.50"}])
+        sql = requetes.captured_queries[-1]["sql"]
+        self.assertNotIn("core_categorieproduit", sql)
+        self.assertNotIn("stock_actuel", sql)
+
+    def test_omit_abandonne_le_prefetch(self):
+        with self.assertNumQueries(1):
+            response = self.api.get("/api/ventes/", {"omit": "lignes,client"})
+        self.assertNotIn("lignes", response.data["results"][0])
+        self.assertIn("total", response.data["results"][0])
+        # Sans paramètre, la représentation complète est inchangée
+        self.assertIn("lignes", self.api.get("/api/ventes/").data["results"][0])
+
+    def test_champ_inconnu(self):
+        self.assertEqual(self.api.get("/api/clients/", {"fields": "id,inconnu"}).status_code, 400)
+
+
+class LectureRapideTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        riz = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"))
+        huile = Produit.objects.create(nom="Huile", unite="l", prix_unitaire=Decimal("4"))
+        client = Client.objects.create(nom="Awa")
+        for i, c in enumerate([client, None, client]):
+            vente = Vente.objects.create(client=c, total=Decimal("12.5") + i, montant_paye=5, statut="PAYEE")
+            LigneVente.objects.create(vente=vente, produit=riz, quantite=2, prix_unitaire=Decimal("2.5"))
+            LigneVente.objects.create(vente=vente, produit=huile, quantite=Decimal("1.25"), prix_unitaire=4, remise=1)
+        MouvementStock.objects.create(produit=riz, type="SORTIE", quantite=2, source_type="VENTE", source_id=1)
+
+    def _attendu(self, serializer_class, queryset):
+        return json.loads(JSONRenderer().render(serializer_class(queryset, many=True).data))
+
+    def test_sortie_identique_au_serializer(self):
+        cas = [
+            ("/api/ventes/", VenteSerializer, Vente.objects.order_by("-date", "-id")),
+            ("/api/mouvements/", MouvementStockSerializer, MouvementStock.objects.order_by("-date", "-id")),
+        ]
+        for url, serializer_class, queryset in cas:
+            with self.subTest(url=url):
+                response = self.api.get(url)
+                self.assertEqual(json.loads(response.content)["results"], self._attendu(serializer_class, queryset))
+
+    def test_requetes_constantes_et_champs_demandes(self):
+        # ventes, clients, lignes, produits : indépendant du nombre de ventes
+        with self.assertNumQueries(4):
+            self.api.get("/api/ventes/")
+        response = self.api.get("/api/ventes/", {"fields": "id,total"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "total"})
+        self.assertEqual(response.data["results"][0]["total"], "14.50")
+
+
+class ORJSONRendererTests(TestCase):
+    def test_octets_identiques_au_rendu_standard(self):
+        donnees = {
+            "texte": "Café\u2028fin\u2029",
+            "montant": Decimal("12.50"),
+            "entier": 3,
+            "flottant": 0.1,
+            "nul": None,
+            "date": timezone.localdate(),
+            "instant": timezone.now(),
+            "liste": [Decimal("0.10"), {"imbrique": True}],
+            1: "clé entière",
+        }
+        self.assertEqual(ORJSONRenderer().render(donnees), JSONRenderer().render(donnees))
+
+    def test_reponses_api_identiques(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"))
+        Vente.objects.create(total=Decimal("12.5"), montant_paye=5, statut="PAYEE")
+        for url in ("/api/produits/", "/api/ventes/", "/api/dashboard-stats/", "/api/stats/series/"):
+            with self.subTest(url=url):
+                response = api.get(url)
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_decimal_sans_perte(self):
+        montant = Decimal("12345678901234567.89")
+        self.assertEqual(json.loads(ORJSONRenderer().render({"m": montant}), parse_float=Decimal)["m"], montant)
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"nom": "Thé"}'.encode())), {"nom": "Thé"})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b"{invalide"))
+
+
+class MessagePackTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        self.produit = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"))
+
+    def test_negociation_et_types_etendus(self):
+        response = self.api.get("/api/produits/", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content)["results"], self.api.get("/api/produits/").json()["results"])
+
+        donnees = {"montant": Decimal("12.50"), "jour": timezone.localdate(), "instant": timezone.now()}
+        relu = MessagePackParser().parse(BytesIO(MessagePackRenderer().render(donnees)))
+        self.assertEqual(relu, donnees)
+        self.assertIsInstance(relu["montant"], Decimal)
+
+    def test_envoi(self):
+        corps = MessagePackRenderer().render({"nom": "Awa", "solde": Decimal("1234567890.25")})
+        response = self.api.post("/api/clients/", corps, content_type="application/msgpack")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Client.objects.get().solde, Decimal("1234567890.25"))
+
+    def test_corps_invalide(self):
+        response = self.api.post("/api/clients/", b"\xc1", content_type="application/msgpack")
+        self.assertEqual(response.status_code, 400)
+
+    def test_extension_invalide(self):
+        extensions = [
+            msgpack.ExtType(1, b"zz"), msgpack.ExtType(1, b"\xff"),
+            msgpack.ExtType(2, b"\xff"), msgpack.ExtType(2, b"2025-13-45"), msgpack.ExtType(9, b""),
+        ]
+        for extension in extensions:
+            with self.subTest(extension=extension):
+                corps = msgpack.packb({"nom": "Awa", "solde": extension})
+                response = self.api.post("/api/clients/", corps, content_type="application/msgpack")
+                self.assertEqual(response.status_code, 400)
+
+    async def test_vue_asynchrone(self):
+        utilisateur = await User.objects.acreate(username="async")
+        request = AsyncRequestFactory().get("/api/dashboard-stats/", headers={"Accept": "application/msgpack"})
+        with mock.patch("core.views.asynchrone._authentifier", return_value=utilisateur):
+            response = await DashboardStatsAsyncView.as_view()(request)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertIn("total_vente", msgpack.unpackb(response.content))
+
+
+@override_settings(API_STREAM_CHUNK=2)
+class ExportFluxTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        for i in range(5):
+            Transaction.objects.create(type="RECETTE", module="VENTE" if i % 2 else "ACHAT", reference_id=i, montant=i)
+
+    def _contenu(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_tableau_json_identique_a_la_liste(self):
+        response = self.api.get("/api/transactions/stream/")
+        self.assertEqual(response["Content-Type"], "application/json")
+        attendu = self.api.get("/api/transactions/", {"page_size": 100}).json()["results"]
+        self.assertEqual(json.loads(self._contenu(response)), attendu)
+
+    def test_ndjson_filtres_et_champs(self):
+        response = self.api.get(
+            "/api/transactions/stream/", {"module": "VENTE", "fields": "id,montant"},
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lignes = [json.loads(l) for l in self._contenu(response).splitlines()]
+        self.assertEqual(lignes, [{"id": t.pk, "montant": f"{t.montant:.2f}"}
+                                  for t in Transaction.objects.filter(module="VENTE").order_by("-date", "-id")])
+
+    def test_liste_vide(self):
+        Transaction.objects.all().delete()
+        self.assertEqual(self._contenu(self.api.get("/api/transactions/stream/")), b"[]")
+        self.assertEqual(self._contenu(self.api.get("/api/mouvements/stream/", {"format": "ndjson"})), b"")
+
+
+class ReponseConditionnelleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        self.categorie = CategorieProduit.objects.create(nom="Céréales")
+        self.produit = Produit.objects.create(
+            nom="Riz", unite="kg", prix_unitaire=Decimal("2.50"), categorie=self.categorie
+        )
+
+    def test_304_avant_serialisation(self):
+        response = self.api.get("/api/produits/")
+        etag = response["ETag"]
+        self.assertFalse(response.has_header("Last-Modified"))
+        # Une seule requête : l'agrégat qui sert d'empreinte
+        with self.assertNumQueries(1):
+            response = self.api.get("/api/produits/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        # Autres paramètres ou autre format : autre représentation
+        self.assertNotEqual(self.api.get("/api/produits/", {"fields": "id"})["ETag"], etag)
+        self.assertNotEqual(self.api.get("/api/produits/", HTTP_ACCEPT="application/msgpack")["ETag"], etag)
+
+    def test_modification_change_l_etag(self):
+        etag = self.api.get("/api/produits/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categorie.nom = "Grains"
+            self.categorie.save()
+        with override_settings(DASHBOARD_CACHE_DEBOUNCE=0):
+            response = self.api.get("/api/produits/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["categorie"]["nom"], "Grains")
+
+        etag = response["ETag"]
+        Produit.objects.create(nom="Huile", unite="l", prix_unitaire=4)
+        self.assertEqual(self.api.get("/api/produits/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_suppression_avec_if_modified_since(self):
+        Produit.objects.create(nom="Huile", unite="l", prix_unitaire=4)
+        avant = self.api.get("/api/produits/")
+        self.assertEqual(len(avant.data["results"]), 2)
+        date = http_date(time.time() + 60)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produit.delete()
+        with override_settings(DASHBOARD_CACHE_DEBOUNCE=0):
+            response = self.api.get("/api/produits/", HTTP_IF_MODIFIED_SINCE=date)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["nom"] for p in response.data["results"]], ["Huile"])
+
+    def test_detail(self):
+        url = f"/api/clients/{Client.objects.create(nom='Awa').pk}/"
+        etag = self.api.get(url)["ETag"]
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.api.get(url)
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertEqual(self.api.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+        self.assertEqual(self.api.get("/api/clients/999/", HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        self.categorie = CategorieProduit.objects.create(nom="Céréales")
+        self.riz = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=2, categorie=self.categorie)
+        self.client_awa = Client.objects.create(nom="Awa")
+
+    def sync(self, **params):
+        response = self.api.get("/api/sync/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_catalogue_puis_delta(self):
+        data = self.sync()
+        self.assertFalse(data["encore"])
+        self.assertEqual([p["nom"] for p in data["changements"]["produits"]["modifies"]], ["Riz"])
+        self.assertEqual(set(data["changements"]), {"categories", "produits", "clients"})
+
+        # Rien de neuf : réponse vide, jeton inchangé
+        vide = self.sync(since=data["jeton"])
+        self.assertEqual((vide["changements"], vide["jeton"]), ({}, data["jeton"]))
+
+        self.client_awa.nom = "Awa D."
+        self.client_awa.save()
+        Fournisseur.objects.create(nom="Sotra")
+        pk = self.client_awa.pk
+        self.client_awa.delete()
+        delta = self.sync(since=data["jeton"])
+        self.assertEqual(delta["changements"]["clients"], {"modifies": [], "supprimes": [pk]})
+        self.assertEqual([f["nom"] for f in delta["changements"]["fournisseurs"]["modifies"]], ["Sotra"])
+        self.assertNotIn("produits", delta["changements"])
+
+    def test_categorie_modifiee_ou_supprimee_resynchronise_ses_produits(self):
+        jeton = self.sync()["jeton"]
+        self.categorie.nom = "Grains"
+        self.categorie.save()
+        delta = self.sync(since=jeton)
+        self.assertEqual(delta["changements"]["produits"]["modifies"][0]["categorie"]["nom"], "Grains")
+
+        pk = self.categorie.pk
+        self.categorie.delete()
+        delta = self.sync(since=delta["jeton"])
+        self.assertEqual(delta["changements"]["categories"]["supprimes"], [pk])
+        self.assertIsNone(delta["changements"]["produits"]["modifies"][0]["categorie"])
+
+    def test_pages_par_sequence(self):
+        for i in range(4):
+            Client.objects.create(nom=f"Client {i}")
+        noms, jeton, pages = [], 0, 0
+        while True:
+            data = self.sync(since=jeton, page_size=2, ressources="clients")
+            noms += [c["nom"] for c in data["changements"].get("clients", {}).get("modifies", [])]
+            jeton, pages = data["jeton"], pages + 1
+            if not data["encore"]:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(noms), 5)
+        self.assertEqual(self.api.get("/api/sync/", {"ressources": "ventes"}).status_code, 400)
+        self.assertEqual(self.api.get("/api/sync/", {"since": "x"}).status_code, 400)
+        self.assertEqual(self.api.get("/api/sync/", {"since": "0.-1"}).status_code, 400)
+        # Jeton « xid.id » ; un id seul vaut position (0, id)
+        self.assertRegex(jeton, r"^\d+\.\d+$")
+        self.assertEqual(self.sync(since=jeton.split(".")[1])["jeton"], jeton)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        for i in range(40):
+            Client.objects.create(nom=f"Client {i}", adresse="Quartier du marché, rue 12")
+
+    def test_negociation(self):
+        zstd, gzip_ = codecs_disponibles()
+        self.assertIs(choisir_codec("gzip, deflate, br, zstd", [zstd, gzip_]), zstd)
+        self.assertIs(choisir_codec("zstd;q=0.5, gzip", [zstd, gzip_]), gzip_)
+        self.assertIs(choisir_codec("*", [zstd, gzip_]), zstd)
+        self.assertIsNone(choisir_codec("gzip;q=0, identity", [zstd, gzip_]))
+
+    def test_liste_compressee_au_dela_du_seuil(self):
+        brut = self.api.get("/api/clients/")
+        self.assertFalse(brut.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", brut["Vary"])
+
+        response = self.api.get("/api/clients/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), brut.content)
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+
+        response = self.api.get("/api/clients/", HTTP_ACCEPT_ENCODING="gzip, zstd")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        self.assertEqual(zstandard.ZstdDecompressor().decompress(response.content), brut.content)
+
+        petite = self.api.get("/api/clients/", {"page_size": 1}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(petite.has_header("Content-Encoding"))
+
+    def test_export_en_flux(self):
+        brut = b"".join(self.api.get("/api/mouvements/stream/").streaming_content)
+        response = self.api.get("/api/mouvements/stream/", HTTP_ACCEPT_ENCODING="zstd")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        contenu = b"".join(response.streaming_content)
+        self.assertEqual(zstandard.ZstdDecompressor().decompressobj().decompress(contenu), brut)
+
+    def test_flux_asynchrone_et_types_exclus(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        request = RequestFactory().get("/api/export/", HTTP_ACCEPT_ENCODING="gzip")
+
+        async def morceaux():
+            for i in range(3):
+                yield b"ligne %d\n" % i * 100
+
+        response = middleware.process_response(request, StreamingHttpResponse(morceaux()))
+
+        async def lire():
+            return b"".join([morceau async for morceau in response.streaming_content])
+        self.assertEqual(gzip.decompress(asyncio.run(lire())), b"".join(b"ligne %d\n" % i * 100 for i in range(3)))
+
+        for type_contenu in ("application/zip", "text/event-stream", "image/png"):
+            response = middleware.process_response(request, HttpResponse(b"x" * 5000, content_type=type_contenu))
+            self.assertFalse(response.has_header("Content-Encoding"), type_contenu)
+        admin = RequestFactory().get("/admin/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(middleware.process_response(admin, HttpResponse(b"x" * 5000)).has_header("Content-Encoding"))
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.user = User.objects.create_user(username="test", password="x")
+        self.api.force_authenticate(self.user)
+        self.riz = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=2)
+
+    def lot(self, *requetes, **options):
+        response = self.api.post("/api/batch/", {"requetes": list(requetes), **options}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ecran_d_accueil(self):
+        reponses = self.lot(
+            {"url": "/api/dashboard-stats/?kpis=total_stock"},
+            {"url": "/api/stats/historique-ventes/"},
+            {"url": "/api/ventes/?page_size=5"},
+            {"url": "/api/produits/?fields=id,nom"},
+            {"method": "POST", "url": "/api/clients/", "body": {"nom": "Awa"}},
+            {"url": "/api/clients/"},
+        )
+        self.assertEqual([r["status"] for r in reponses], [200, 200, 200, 200, 201, 200])
+        self.assertEqual(reponses[3]["body"]["results"], [{"id": self.riz.pk, "nom": "Riz"}])
+        # Les sous-requêtes s'exécutent dans l'ordre
+        self.assertEqual([c["nom"] for c in reponses[5]["body"]["results"]], ["Awa"])
+
+    def test_erreurs_par_sous_requete(self):
+        reponses = self.lot(
+            {"url": "/api/produits/999/"},
+            {"url": "/api/inconnu/"},
+            {"url": "/api/mouvements/stream/"},
+            {"url": "/api/batch/", "method": "POST"},
+            {"method": "POST", "url": "/api/clients/", "body": {}},
+        )
+        self.assertEqual([r["status"] for r in reponses], [404, 404, 400, 400, 400])
+        self.assertIn("nom", reponses[4]["body"])
+
+        response = self.api.post("/api/batch/", {"requetes": [{"url": "/admin/"}]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        with override_settings(API_BATCH_MAX=1):
+            response = self.api.post("/api/batch/", {"requetes": [{"url": "/api/clients/"}] * 2}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_authentification_unique(self):
+        etag = self.api.get(f"/api/produits/{self.riz.pk}/")["ETag"]
+        with mock.patch("core.authentication.FirebaseAuthentication.authenticate") as authentifier:
+            reponses = self.lot(
+                {"url": f"/api/produits/{self.riz.pk}/", "headers": {"If-None-Match": etag}},
+                {"url": "/api/produits/"},
+            )
+        authentifier.assert_not_called()
+        self.assertEqual([r["status"] for r in reponses], [304, 200])
+        self.assertIsNone(reponses[0]["body"])
+
+        anonyme = APIClient().post("/api/batch/", {"requetes": [{"url": "/api/produits/"}]}, format="json")
+        self.assertEqual(anonyme.status_code, 403)
+
+
+class BatchParalleleTests(TransactionTestCase):
+    def test_get_en_parallele(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        Client.objects.create(nom="Awa")
+        requetes = [
+            {"url": "/api/clients/"},
+            {"url": "/api/produits/"},
+            {"method": "POST", "url": "/api/clients/", "body": {"nom": "Binta"}},
+            {"url": "/api/clients/"},
+        ]
+        response = api.post("/api/batch/", {"requetes": requetes, "parallele": True}, format="json")
+        reponses = response.json()
+        self.assertEqual([r["status"] for r in reponses], [200, 200, 201, 200])
+        self.assertEqual(len(reponses[0]["body"]["results"]), 1)
+        self.assertEqual(len(reponses[3]["body"]["results"]), 2)
+
+
+class CreationVenteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="test", password="x"))
+        self.client_awa = Client.objects.create(nom="Awa")
+        self.produits = [
+            Produit.objects.create(nom=f"Produit {i}", unite="u", prix_unitaire=Decimal("1.50"), stock_actuel=10)
+            for i in range(50)
+        ]
+
+    def corps(self, nombre_lignes):
+        return {
+            "client_id": self.client_awa.pk, "total": "75.00", "statut": "PAYEE",
+            "lignes": [
+                {"produit_id": self.produits[i].pk, "quantite": "1", "prix_unitaire": "1.50"}
+                for i in range(nombre_lignes)
+            ],
+        }
+
+    def creer(self, nombre_lignes):
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.api.post("/api/ventes/", self.corps(nombre_lignes), format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response, len(requetes)
+
+    def test_requetes_constantes(self):
+        self.creer(50)  # crée les lignes de stats du mois
+        _, deux_lignes = self.creer(2)
+        response, cinquante_lignes = self.creer(50)
+        self.assertEqual(cinquante_lignes, deux_lignes)
+
+        self.assertEqual(len(response.data["lignes"]), 50)
+        self.assertEqual(response.data["lignes"][0]["produit"], "Produit 0")
+        self.assertEqual(response.data["client"], "Awa")
+        stats = ProduitMonthlyStats.objects.get(produit=self.produits[0])
+        self.assertEqual((stats.quantite, stats.chiffre_affaires), (Decimal("3.00"), Decimal("4.50")))
+        self.assertEqual(ProduitMonthlyStats.objects.get(produit=self.produits[49]).quantite, Decimal("2.00"))
+
+    def test_produit_inconnu(self):
+        corps = self.corps(2)
+        corps["lignes"][1]["produit_id"] = 999
+        response = self.api.post("/api/ventes/", corps, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data["lignes"][1]), ["produit_id"])
+        self.assertIn("999", str(response.data["lignes"][1]["produit_id"][0]))
+        self.assertFalse(Vente.objects.exists())
+
+
+class EnregistrementVenteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="caisse", password="x"))
+        self.client_awa = Client.objects.create(nom="Awa", solde=Decimal("5.00"))
+        self.riz = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=2, stock_actuel=10)
+        self.huile = Produit.objects.create(nom="Huile", unite="l", prix_unitaire=5, stock_actuel=3)
+
+    def vendre(self, lignes, **vente):
+        corps = {"client_id": self.client_awa.pk, "total": "19.00", "montant_paye": "10.00", "statut": "PAYEE", **vente}
+        corps["lignes"] = [
+            {"produit_id": produit.pk, "quantite": str(quantite), "prix_unitaire": str(produit.prix_unitaire)}
+            for produit, quantite in lignes
+        ]
+        return self.api.post("/api/ventes/", corps, format="json")
+
+    def test_stock_mouvements_audit_et_solde(self):
+        jeton = self.api.get("/api/sync/").data["jeton"]
+        response = self.vendre([(self.riz, 4), (self.huile, 2), (self.riz, 1)])
+        self.assertEqual(response.status_code, 201, response.data)
+        vente_id = response.data["id"]
+
+        self.riz.refresh_from_db(), self.huile.refresh_from_db(), self.client_awa.refresh_from_db()
+        self.assertEqual((self.riz.stock_actuel, self.huile.stock_actuel), (5, 1))
+        self.assertEqual(self.client_awa.solde, Decimal("14.00"))
+        self.assertEqual(
+            sorted(MouvementStock.objects.values_list("produit__nom", "type", "quantite", "source_type", "source_id")),
+            [("Huile", "SORTIE", Decimal("2.00"), "VENTE", vente_id),
+             ("Riz", "SORTIE", Decimal("1.00"), "VENTE", vente_id),
+             ("Riz", "SORTIE", Decimal("4.00"), "VENTE", vente_id)],
+        )
+        audit = Transaction.objects.get()
+        self.assertEqual(
+            (audit.type, audit.module, audit.reference_id, audit.montant), ("RECETTE", "VENTE", vente_id, Decimal("19.00"))
+        )
+        self.assertIn("caisse", audit.description)
+
+        # Produits et client modifiés par UPDATE groupé : visibles pour la synchronisation
+        delta = self.api.get("/api/sync/", {"since": jeton}).data["changements"]
+        self.assertEqual({p["nom"]: p["stock_actuel"] for p in delta["produits"]["modifies"]}, {"Riz": 5, "Huile": 1})
+        self.assertEqual(delta["clients"]["modifies"][0]["solde"], "14.00")
+
+    def test_stock_insuffisant_annule_tout(self):
+        response = self.vendre([(self.riz, 2), (self.huile, 4)])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Huile", str(response.data["lignes"]))
+        self.riz.refresh_from_db()
+        self.assertEqual(self.riz.stock_actuel, 10)
+        self.assertFalse(Vente.objects.exists() or MouvementStock.objects.exists() or Transaction.objects.exists())
+
+        self.assertEqual(self.vendre([(self.riz, "1.5")]).status_code, 400)
+
+    def test_vente_annulee_sans_effet_sur_le_stock(self):
+        self.assertEqual(self.vendre([(self.huile, 9)], statut="ANNULEE").status_code, 201)
+        self.huile.refresh_from_db()
+        self.assertEqual(self.huile.stock_actuel, 3)
+        self.assertFalse(MouvementStock.objects.exists())
+
+    def etat(self):
+        self.riz.refresh_from_db(), self.huile.refresh_from_db(), self.client_awa.refresh_from_db()
+        return self.riz.stock_actuel, self.huile.stock_actuel, self.client_awa.solde
+
+    def test_annulation_et_reactivation(self):
+        vente_id = self.vendre([(self.riz, 4), (self.huile, 2)]).data["id"]
+        self.assertEqual(self.etat(), (6, 1, Decimal("14.00")))
+
+        response = self.api.patch(f"/api/ventes/{vente_id}/", {"statut": "ANNULEE"}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.etat(), (10, 3, Decimal("5.00")))
+        self.assertEqual(
+            sorted(MouvementStock.objects.filter(type="ENTREE").values_list("produit__nom", "quantite", "source_id")),
+            [("Huile", Decimal("2.00"), vente_id), ("Riz", Decimal("4.00"), vente_id)],
+        )
+        self.assertEqual(sum(Transaction.objects.values_list("montant", flat=True)), 0)
+        # Une seconde annulation ne contre-passe rien
+        self.api.patch(f"/api/ventes/{vente_id}/", {"statut": "ANNULEE"}, format="json")
+        self.assertEqual(self.etat(), (10, 3, Decimal("5.00")))
+
+        response = self.api.patch(f"/api/ventes/{vente_id}/", {"statut": "PAYEE", "montant_paye": "19.00"}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.etat(), (6, 1, Decimal("5.00")))
+
+        # Correction du montant d'une vente active : solde et audit seulement
+        self.api.patch(f"/api/ventes/{vente_id}/", {"total": "25.00"}, format="json")
+        self.assertEqual(self.etat(), (6, 1, Decimal("11.00")))
+        self.assertEqual(sum(Transaction.objects.values_list("montant", flat=True)), Decimal("25.00"))
+
+    def test_reactivation_sans_stock_refusee(self):
+        vente_id = self.vendre([(self.huile, 3)], statut="ANNULEE").data["id"]
+        self.vendre([(self.huile, 2)])
+        response = self.api.patch(f"/api/ventes/{vente_id}/", {"statut": "PAYEE"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Vente.objects.get(pk=vente_id).statut, "ANNULEE")
+        self.assertEqual(self.etat()[1], 1)
+
+    def test_suppression(self):
+        vente_id = self.vendre([(self.riz, 4), (self.huile, 2)]).data["id"]
+        self.assertEqual(self.api.delete(f"/api/ventes/{vente_id}/").status_code, 204)
+        self.assertEqual(self.etat(), (10, 3, Decimal("5.00")))
+        self.assertEqual(MouvementStock.objects.filter(type="ENTREE", source_id=vente_id).count(), 2)
+        self.assertEqual(Transaction.objects.order_by("id").last().montant, Decimal("-19.00"))
+
+        # Vente annulée puis supprimée : rien à contre-passer une seconde fois
+        vente_id = self.vendre([(self.riz, 1)]).data["id"]
+        self.api.patch(f"/api/ventes/{vente_id}/", {"statut": "ANNULEE"}, format="json")
+        self.api.delete(f"/api/ventes/{vente_id}/")
+        self.assertEqual(self.etat(), (10, 3, Decimal("5.00")))
+
+
+class ReceptionAchatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="magasin", password="x"))
+        self.fournisseur = Fournisseur.objects.create(nom="Sotra")
+        self.produits = Produit.objects.bulk_create(
+            Produit(nom=f"Produit {i}", unite="u", prix_unitaire=Decimal("1.00"), stock_actuel=i) for i in range(200)
+        )
+
+    def recevoir(self, nombre_lignes, **achat):
+        corps = {
+            "fournisseur_id": self.fournisseur.pk, "total": "300.00", "montant_paye": "100.00", **achat,
+            "lignes": [
+                {"produit_id": self.produits[i].pk, "quantite": "3", "prix_unitaire": "0.50"}
+                for i in range(nombre_lignes)
+            ],
+        }
+        return self.api.post("/api/achats/", corps, format="json")
+
+    @staticmethod
+    def lots(modele, nombre):
+        champs = [f for f in modele._meta.concrete_fields if not f.primary_key]
+        return -(-nombre // connection.ops.bulk_batch_size(champs, [None] * nombre))
+
+    def test_requetes_constantes_pour_200_lignes(self):
+        with CaptureQueriesContext(connection) as deux_lignes:
+            self.assertEqual(self.recevoir(2).status_code, 201)
+        # SQLite borne le nombre de paramètres : bulk_create y découpe les insertions en lots
+        lots_supplementaires = sum(self.lots(modele, 200) - 1 for modele in (LigneAchat, MouvementStock, ChangementSync))
+        with self.assertNumQueries(len(deux_lignes) + lots_supplementaires):
+            response = self.recevoir(200)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data["lignes"]), 200)
+        self.assertEqual(response.data["lignes"][199]["produit"], "Produit 199")
+
+        achat_id = response.data["id"]
+        self.assertEqual(LigneAchat.objects.filter(achat_id=achat_id).count(), 200)
+        self.assertEqual(
+            list(Produit.objects.filter(pk__in=[self.produits[0].pk, self.produits[150].pk])
+                 .order_by("pk").values_list("stock_actuel", flat=True)),
+            [6, 153],
+        )
+        self.assertEqual(MouvementStock.objects.filter(type="ENTREE", source_type="ACHAT", source_id=achat_id).count(), 200)
+        self.fournisseur.refresh_from_db()
+        self.assertEqual(self.fournisseur.solde, Decimal("400.00"))
+        self.assertEqual(
+            list(Transaction.objects.order_by("id").values_list("type", "module", "montant"))[-1],
+            ("DEPENSE", "ACHAT", Decimal("300.00")),
+        )
+
+    def test_validation_et_annulation(self):
+        corps = {
+            "fournisseur_id": self.fournisseur.pk, "total": "1.00",
+            "lignes": [{"produit_id": 0, "quantite": "1", "prix_unitaire": "1"}],
+        }
+        response = self.api.post("/api/achats/", corps, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("produit_id", response.data["lignes"][0])
+
+        self.assertEqual(self.recevoir(1, statut="ANNULE").status_code, 201)
+        self.assertEqual(Produit.objects.get(pk=self.produits[0].pk).stock_actuel, 0)
+        self.assertFalse(MouvementStock.objects.exists())
+
+    def stocks_et_solde(self):
+        self.fournisseur.refresh_from_db()
+        stocks = Produit.objects.filter(pk__in=[p.pk for p in self.produits[:2]]).order_by("pk")
+        return list(stocks.values_list("stock_actuel", flat=True)), self.fournisseur.solde
+
+    def test_annulation_et_suppression(self):
+        achat_id = self.recevoir(2).data["id"]
+        self.assertEqual(self.stocks_et_solde(), ([3, 4], Decimal("200.00")))
+
+        response = self.api.patch(f"/api/achats/{achat_id}/", {"statut": "ANNULE"}, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.stocks_et_solde(), ([0, 1], Decimal("0.00")))
+        self.assertEqual(MouvementStock.objects.filter(type="SORTIE", source_type="ACHAT", source_id=achat_id).count(), 2)
+        self.assertEqual(sum(Transaction.objects.values_list("montant", flat=True)), 0)
+
+        self.assertEqual(self.api.patch(f"/api/achats/{achat_id}/", {"statut": "PAYE"}, format="json").status_code, 200)
+        self.assertEqual(self.stocks_et_solde(), ([3, 4], Decimal("200.00")))
+
+        self.assertEqual(self.api.delete(f"/api/achats/{achat_id}/").status_code, 204)
+        self.assertEqual(self.stocks_et_solde(), ([0, 1], Decimal("0.00")))
+        self.assertEqual(Transaction.objects.order_by("id").last().montant, Decimal("-300.00"))
+
+    def test_annulation_refusee_si_stock_deja_vendu(self):
+        achat_id = self.recevoir(1).data["id"]
+        Produit.objects.filter(pk=self.produits[0].pk).update(stock_actuel=1)
+        response = self.api.patch(f"/api/achats/{achat_id}/", {"statut": "ANNULE"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Stock insuffisant", str(response.data))
+        self.assertEqual(Achat.objects.get(pk=achat_id).statut, "EN_ATTENTE")
+
+
+class BulkVentesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username="import", password="x"))
+        self.client_awa = Client.objects.create(nom="Awa")
+        self.riz = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=2, stock_actuel=1000)
+        self.huile = Produit.objects.create(nom="Huile", unite="l", prix_unitaire=5, stock_actuel=3)
+
+    def vente(self, lignes, **vente):
+        return {
+            "client_id": self.client_awa.pk, "total": "10.00", "montant_paye": "4.00", "statut": "PAYEE", **vente,
+            "lignes": [
+                {"produit_id": produit_id, "quantite": str(quantite), "prix_unitaire": "2.00"}
+                for produit_id, quantite in lignes
+            ],
+        }
+
+    def test_issue_par_vente(self):
+        lot = [
+            self.vente([(self.riz.pk, 2), (self.huile.pk, 2)]),
+            self.vente([(999, 1)]),
+            self.vente([(self.huile.pk, 2)]),  # plus que le stock restant
+            self.vente([(self.huile.pk, 5)], statut="ANNULEE"),
+            self.vente([(self.riz.pk, "0.5")]),
+            "pas une vente",
+            self.vente([(self.riz.pk, 3), (self.huile.pk, 1)]),
+        ]
+        response = self.api.post("/api/ventes/bulk/", lot, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        issues = response.data["resultats"]
+        self.assertEqual([issue["status"] for issue in issues], [201, 400, 400, 201, 400, 400, 201])
+        self.assertEqual((response.data["crees"], response.data["refusees"]), (3, 4))
+        self.assertIn("produit_id", issues[1]["erreurs"]["lignes"][0])
+        self.assertIn("Stock insuffisant pour Huile : 1 disponible(s), 2 demandé(s).", issues[2]["erreurs"]["lignes"])
+        self.assertIn("quantite", issues[4]["erreurs"]["lignes"][0])
+
+        self.riz.refresh_from_db(), self.huile.refresh_from_db(), self.client_awa.refresh_from_db()
+        self.assertEqual((self.riz.stock_actuel, self.huile.stock_actuel), (995, 0))
+        self.assertEqual(Vente.objects.count(), 3)
+        self.assertEqual(self.client_awa.solde, Decimal("12.00"))
+        self.assertEqual(
+            sorted(MouvementStock.objects.values_list("source_id", "produit__nom", "quantite")),
+            sorted([(issues[0]["id"], "Riz", Decimal("2.00")), (issues[0]["id"], "Huile", Decimal("2.00")),
+                    (issues[6]["id"], "Riz", Decimal("3.00")), (issues[6]["id"], "Huile", Decimal("1.00"))]),
+        )
+        self.assertEqual(
+            sorted(Transaction.objects.values_list("reference_id", flat=True)), [issues[0]["id"], issues[6]["id"]]
+        )
+        # Agrégats identiques à une reconstruction complète
+        rollup = VenteDailyRollup.objects.get()
+        self.assertEqual((rollup.total, rollup.nombre), (Decimal("20.00"), 2))
+        stats = ClientMonthlyStats.objects.get()
+        self.assertEqual((stats.nombre_ventes, stats.chiffre_affaires), (2, Decimal("20.00")))
+        self.assertEqual(ProduitMonthlyStats.objects.get(produit=self.riz).quantite, Decimal("5.00"))
+
+    def test_ndjson_et_msgpack(self):
+        lot = [self.vente([(self.riz.pk, 1)]), self.vente([(self.riz.pk, 2)])]
+        contenu = b"\n".join(json.dumps(vente).encode() for vente in lot) + b"\n\n"
+        response = self.api.post("/api/ventes/bulk/", contenu, content_type="application/x-ndjson")
+        self.assertEqual(response.data["crees"], 2, response.data)
+
+        response = self.api.post("/api/ventes/bulk/", msgpack.packb(lot), content_type="application/msgpack")
+        self.assertEqual(response.data["crees"], 2, response.data)
+        self.riz.refresh_from_db()
+        self.assertEqual(self.riz.stock_actuel, 994)
+
+        response = self.api.post("/api/ventes/bulk/", b'{"total": 1}\n{', content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ligne 2", str(response.data))
+
+    def test_requetes_independantes_du_nombre_de_ventes(self):
+        def importer(nombre):
+            lot = [self.vente([(self.riz.pk, 1), (self.huile.pk, 0)]) for _ in range(nombre)]
+            with CaptureQueriesContext(connection) as requetes:
+                response = self.api.post("/api/ventes/bulk/", lot, format="json")
+            self.assertEqual(response.data["crees"], nombre, response.data)
+            return len(requetes)
+
+        importer(2)  # crée les lignes d'agrégats du jour et du mois
+        cinq = importer(5)
+        # Découpage des insertions en lots sous SQLite (cf. ReceptionAchatTests)
+        lots_supplementaires = sum(
+            ReceptionAchatTests.lots(modele, nombre) - 1
+            for modele, nombre in ((Vente, 100), (LigneVente, 200), (MouvementStock, 200), (Transaction, 100))
+        )
+        self.assertEqual(importer(100), cinq + lots_supplementaires)
+        self.assertEqual(LigneVente.objects.count(), 214)
+
+    @override_settings(API_BULK_MAX=3, API_BULK_CHUNK=2)
+    def test_tranches_et_plafond(self):
+        lot = [self.vente([(self.riz.pk, 1)]) for _ in range(3)]
+        response = self.api.post("/api/ventes/bulk/", lot, format="json")
+        self.assertEqual(response.data["crees"], 3, response.data)
+        self.assertEqual(self.api.post("/api/ventes/bulk/", lot + lot[:1], format="json").status_code, 400)
+        self.assertEqual(self.api.post("/api/ventes/bulk/", lot[0], format="json").status_code, 400)
+
+
+class IdempotenceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.caissier = User.objects.create_user(username="caisse", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.caissier)
+        self.riz = Produit.objects.create(nom="Riz", unite="kg", prix_unitaire=2, stock_actuel=10)
+        self.client_awa = Client.objects.create(nom="Awa")
+
+    def vendre(self, cle, quantite=1, api=None):
+        corps = {
+            "client_id": self.client_awa.pk, "total": "2.00", "statut": "PAYEE",
+            "lignes": [{"produit_id": self.riz.pk, "quantite": str(quantite), "prix_unitaire": "2.00"}],
+        }
+        return (api or self.api).post("/api/ventes/", corps, format="json", HTTP_IDEMPOTENCY_KEY=cle)
+
+    def test_rejeu_sans_nouvelle_execution(self):
+        premiere = self.vendre("k1")
+        self.assertEqual(premiere.status_code, 201)
+        with CaptureQueriesContext(connection) as requetes:
+            rejeu = self.vendre("k1")
+        self.assertEqual((rejeu.status_code, rejeu.data), (201, premiere.data))
+        self.assertEqual(rejeu["Idempotent-Replayed"], "true")
+        self.assertFalse(any("core_vente" in requete["sql"] for requete in requetes.captured_queries))
+        self.riz.refresh_from_db()
+        self.assertEqual((Vente.objects.count(), self.riz.stock_actuel), (1, 9))
+
+        # Sans clé ou avec une autre clé : nouvelle vente
+        self.assertEqual(self.vendre("k2").data["id"], premiere.data["id"] + 1)
+        self.assertEqual(Vente.objects.count(), 2)
+
+    def test_cle_reutilisee_et_portee(self):
+        self.vendre("k1")
+        self.assertEqual(self.vendre("k1", quantite=2).status_code, 422)
+        autre = APIClient()
+        autre.force_authenticate(User.objects.create_user(username="autre", password="x"))
+        self.assertEqual(self.vendre("k1", api=autre).status_code, 201)
+        self.assertEqual(Vente.objects.count(), 2)
+
+    def test_erreur_et_expiration_liberent_la_cle(self):
+        self.assertEqual(self.vendre("k1", quantite=50).status_code, 400)
+        self.assertEqual(self.vendre("k1", quantite=50).status_code, 400)  # réexécutée, pas rejouée
+        self.assertEqual(self.vendre("k1").status_code, 201)
+
+        RequeteIdempotente.objects.update(expire=timezone.now())
+        self.assertNotIn("Idempotent-Replayed", self.vendre("k1"))
+        self.assertEqual(Vente.objects.count(), 2)
+
+        RequeteIdempotente.objects.update(expire=timezone.now())
+        out = StringIO()
+        call_command("purger_idempotence", stdout=out)
+        self.assertIn("1 entrées", out.getvalue())
+
+    def test_lot_de_ventes_et_batch(self):
+        lot = [{"client_id": self.client_awa.pk, "total": "2.00", "lignes": [{"produit_id": self.riz.pk, "quantite": "1", "prix_unitaire": "2"}]}]
+        for _ in range(2):
+            response = self.api.post("/api/ventes/bulk/", lot, format="json", HTTP_IDEMPOTENCY_KEY="lot-1")
+            self.assertEqual(response.data["crees"], 1)
+        self.assertEqual(Vente.objects.count(), 1)
+
+        # La clé du lot n'est pas transmise aux sous-requêtes
+        requetes = [{"method": "POST", "url": "/api/clients/", "body": {"nom": nom}} for nom in ("Awa", "Binta")]
+        response = self.api.post("/api/batch/", {"requetes": requetes}, format="json", HTTP_IDEMPOTENCY_KEY="b-1")
+        self.assertEqual([r["status"] for r in response.json()], [201, 201])
+
+
+class IdempotenceConcurrenteTests(TransactionTestCase):
+    def setUp(self):
+        self.caissier = User.objects.create_user(username="caisse", password="x")
+        self.api = APIClient()
+        self.api.force_authenticate(self.caissier)
+        corps = {"nom": "Awa"}
+        self.poster = lambda: self.api.post("/api/clients/", corps, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+        self.poster()
+        self.en_cours = RequeteIdempotente.objects.get()
+        self.reponse = (self.en_cours.statut, self.en_cours.reponse)
+        RequeteIdempotente.objects.update(statut=None, reponse=None)
+
+    def test_attend_la_requete_en_cours(self):
+        def terminer():
+            time.sleep(0.2)
+            RequeteIdempotente.objects.update(statut=self.reponse[0], reponse=self.reponse[1])
+            connection.close()
+
+        fil = threading.Thread(target=terminer)
+        fil.start()
+        response = self.poster()
+        fil.join()
+        self.assertEqual((response.status_code, response["Idempotent-Replayed"]), (201, "true"))
+        self.assertEqual(Client.objects.count(), 1)
+
+    @override_settings(API_IDEMPOTENCE_ATTENTE=0)
+    def test_conflit_si_toujours_en_cours(self):
+        self.assertEqual(self.poster().status_code, 409)
+        self.assertEqual(Client.objects.count(), 1)
@@ -1,9 +1,14 @@
 # core/urls.py
+from django.conf import settings
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 from core.views import stock, vente, achat, rh, transaction
 from core.views.dashboard import DashboardStatsView
-from .views.dashboard import HistoriqueVentesView
+from core.views.asynchrone import DashboardStatsAsyncView, HistoriqueVentesAsyncView
+from core.views.batch import BatchView
+from core.views.live import flux_dashboard
+from core.views.sync import SyncView
+from .views.dashboard import HistoriqueVentesView, SeriesTemporellesView, TopView
 
 
 router = DefaultRouter()
@@ -28,8 +33,21 @@ router.register(r'salaires', rh.SalaireViewSet, basename='salaire')
 # Transactions
 router.register(r'transactions', transaction.TransactionViewSet, basename='transaction')
 
+# Sous ASGI, les vues asynchrones évitent de bloquer un thread par requête
+if settings.DASHBOARD_ASYNC_VIEWS:
+    dashboard_stats_view = DashboardStatsAsyncView.as_view()
+    historique_ventes_view = HistoriqueVentesAsyncView.as_view()
+else:
+    dashboard_stats_view = DashboardStatsView.as_view()
+    historique_ventes_view = HistoriqueVentesView.as_view()
+
 urlpatterns = [
     path("", include(router.urls)),
-    path('dashboard-stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
-    path('stats/historique-ventes/', HistoriqueVentesView.as_view(), name='historique-ventes'),
+    path('dashboard-stats/', dashboard_stats_view, name='dashboard-stats'),
+    path('dashboard-stats/stream/', flux_dashboard, name='dashboard-stream'),
+    path('stats/historique-ventes/', historique_ventes_view, name='historique-ventes'),
+    path('stats/series/', SeriesTemporellesView.as_view(), name='stats-series'),
+    path('stats/top/', TopView.as_view(), name='stats-top'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('batch/', BatchView.as_view(), name='batch'),
 ]
\ No newline at end of file
@@ -1,11 +1,43 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
 from .models import Transaction
 
 def log_transaction(user, type, module, reference_id, montant, description):
     """Crée une entrée d'audit dans Transaction."""
-    return Transaction.objects.create(
+    entree = transaction_audit(user, type, module, reference_id, montant, description)
+    entree.save()
+    return entree
+
+
+def transaction_audit(user, type, module, reference_id, montant, description):
+    """Entrée d'audit non enregistrée (pour ``bulk_create``)."""
+    return Transaction(
         type=type,
         module=module,
         reference_id=reference_id,
         montant=montant,
         description=f"{description} (par {user.username if user else 'system'})"
     )
+
+
+def debut_du_jour(jour):
+    """Minuit du jour donné dans le fuseau courant (datetime aware)."""
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def intervalle_jours(debut, fin):
+    """
+    Intervalle semi-ouvert [debut 00:00, lendemain de fin 00:00) à utiliser
+    en ``date__gte`` / ``date__lt`` : contrairement à ``date__date``, ces
+    prédicats portent sur la colonne brute et peuvent utiliser un index.
+    """
+    return debut_du_jour(debut), debut_du_jour(fin + timedelta(days=1))
+
+
+def intervalle_mois(jour):
+    """Intervalle semi-ouvert couvrant le mois calendaire du jour donné."""
+    premier = jour.replace(day=1)
+    suivant = (premier + timedelta(days=32)).replace(day=1)
+    return debut_du_jour(premier), debut_du_jour(suivant)
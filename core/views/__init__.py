@@ -15,8 +15,9 @@ from core.serializers import (
     ClientSerializer,
     EmployeSerializer
 )
+from core.views.mixins import ColonnesDemandeesMixin
 
-class BaseViewSet(viewsets.ModelViewSet):
+class BaseViewSet(ColonnesDemandeesMixin, viewsets.ModelViewSet):
     """ViewSet de base avec fonctionnalités communes"""
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     
@@ -2,15 +2,17 @@ from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from core.models import Fournisseur, Achat
 from core.serializers import FournisseurSerializer, AchatSerializer
+from core.views.mixins import ColonnesDemandeesMixin, IdempotenceMixin, LectureRapideMixin, ReponseConditionnelleMixin
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
     extend_schema_view,
 )
 from drf_spectacular.types import OpenApiTypes
+from core.services import supprimer_achat
 
 # ViewSet pour les Fournisseurs (inchangé)
-class FournisseurViewSet(viewsets.ModelViewSet):
+class FournisseurViewSet(IdempotenceMixin, ReponseConditionnelleMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet):
     queryset = Fournisseur.objects.all()
     serializer_class = FournisseurSerializer
     filter_backends = [filters.SearchFilter]
@@ -39,7 +41,7 @@ class FournisseurViewSet(viewsets.ModelViewSet):
     partial_update=extend_schema(tags=["Achats"]),
     destroy=extend_schema(tags=["Achats"]),
 )
-class AchatViewSet(viewsets.ModelViewSet):
+class AchatViewSet(IdempotenceMixin, LectureRapideMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet):
     queryset = Achat.objects.select_related("fournisseur").prefetch_related("lignes__produit")
     serializer_class = AchatSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
@@ -64,3 +66,7 @@ class AchatViewSet(viewsets.ModelViewSet):
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        # Stock, mouvements, audit et solde fournisseur contre-passés (core.services)
+        supprimer_achat(instance, utilisateur=self.request.user)
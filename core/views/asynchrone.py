@@ -0,0 +1,133 @@
+# core/views/asynchrone.py
+"""
+Variantes asynchrones des vues du tableau de bord, pour un déploiement ASGI
+(activées par ``DASHBOARD_ASYNC_VIEWS``). Les vues synchrones restent
+utilisées sous WSGI.
+
+Sur un MISS, les KPI du tableau de bord sont calculés en parallèle, une
+requête par KPI (``calculer_kpi``) exécutée avec ``asyncio.gather`` sur
+des threads distincts, donc sur autant de connexions : l'ORM asynchrone
+de Django (``aaggregate``) exécuterait ces requêtes l'une après l'autre
+sur son unique thread partagé. Le gain suppose que PostgreSQL dispose
+de plusieurs cœurs libres ; à mesurer avec ``manage.py bench_dashboard``.
+Ces threads sont ceux, réutilisés, de
+l'exécuteur de la boucle : avec ``CONN_MAX_AGE`` (``DB_CONN_MAX_AGE`` en
+production) ils gardent leur connexion d'un calcul à l'autre au lieu d'en
+ouvrir une par KPI. Au sein d'une transaction (tests), le calcul reste
+séquentiel sur la connexion courante.
+"""
+import asyncio
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import NotAcceptable, ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core.cache import DASHBOARD_STATS, HISTORIQUE_VENTES, MISS, lire, snapshot, stocker
+from core.kpis import KPIS, calculer_kpi
+from core.serializers.dashboard import DashboardStatsSerializer, HistoriqueParametresSerializer
+from core.views.dashboard import (
+    calculer_historique, calculer_stats_dashboard, filtrer_kpis, kpis_demandes
+)
+
+
+def _authentifier(request):
+    """Applique les authentifications DRF configurées (session, JWT, Firebase)."""
+    drf_request = Request(
+        request,
+        authenticators=[classe() for classe in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    user = drf_request.user
+    return user if user and user.is_authenticated else None
+
+
+async def authentifier(request):
+    try:
+        return await sync_to_async(_authentifier)(request)
+    except Exception:
+        return None
+
+
+def reponse_json(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def reponse(request, data, status=200):
+    """Réponse rendue selon l'en-tête Accept (JSON ou MessagePack), comme dans les vues DRF."""
+    renderers = [classe() for classe in api_settings.DEFAULT_RENDERER_CLASSES if classe.format != 'api']
+    try:
+        renderer, media_type = DefaultContentNegotiation().select_renderer(Request(request), renderers)
+    except NotAcceptable:
+        renderer, media_type = renderers[0], renderers[0].media_type
+    return HttpResponse(renderer.render(data, media_type, {}), status=status, content_type=media_type)
+
+
+def _calculer_kpi_dans_thread(nom):
+    try:
+        return calculer_kpi(nom)
+    finally:
+        # Seule la connexion du thread, et seulement au-delà de CONN_MAX_AGE
+        connection.close_if_unusable_or_obsolete()
+
+
+def _en_transaction():
+    return connection.in_atomic_block
+
+
+async def calculer_stats_dashboard_async():
+    """Équivalent de ``calculer_stats_dashboard``, un KPI par connexion."""
+    if await sync_to_async(_en_transaction)():
+        return await sync_to_async(calculer_stats_dashboard)()
+    valeurs = await asyncio.gather(*(
+        sync_to_async(_calculer_kpi_dans_thread, thread_sensitive=False)(nom) for nom in KPIS
+    ))
+    return dict(DashboardStatsSerializer(dict(zip(KPIS, valeurs))).data)
+
+
+def non_authentifie():
+    return reponse_json({"detail": "Informations d'authentification non fournies."}, status=401)
+
+
+class DashboardStatsAsyncView(View):
+    """Équivalent asynchrone de DashboardStatsView"""
+
+    async def get(self, request):
+        if await authentifier(request) is None:
+            return non_authentifie()
+        try:
+            demandes = kpis_demandes(request.GET)
+        except ValidationError as e:
+            return reponse(request, e.detail, status=400)
+
+        data, statut, version = await sync_to_async(lire)(DASHBOARD_STATS)
+        if statut == MISS:
+            data = await calculer_stats_dashboard_async()
+            await sync_to_async(stocker)(DASHBOARD_STATS, data, version=version)
+        response = reponse(request, filtrer_kpis(data, demandes))
+        response['X-Cache'] = statut
+        return response
+
+
+class HistoriqueVentesAsyncView(View):
+    """Équivalent asynchrone de HistoriqueVentesView"""
+
+    async def get(self, request):
+        if await authentifier(request) is None:
+            return non_authentifie()
+        parametres = HistoriqueParametresSerializer(data=request.GET)
+        if not parametres.is_valid():
+            return reponse(request, parametres.errors, status=400)
+        jours, periode = parametres.validated_data['jours'], parametres.validated_data['periode']
+
+        data, statut = await sync_to_async(snapshot)(
+            HISTORIQUE_VENTES, partial(calculer_historique, jours, periode), variante=f"{periode}:{jours}"
+        )
+        response = reponse(request, data)
+        response['X-Cache'] = statut
+        return response
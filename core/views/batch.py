@@ -0,0 +1,139 @@
+# core/views/batch.py
+"""
+POST /api/batch/ : plusieurs appels de l'API en un aller-retour HTTP.
+
+Chaque sous-requête est résolue par l'URLconf et passée directement à sa
+vue, sans repasser par les middlewares. L'utilisateur authentifié pour le
+lot est imposé aux sous-requêtes (``ForcedAuthentication`` de DRF) : le
+jeton n'est vérifié qu'une fois. Les réponses sont renvoyées dans l'ordre
+des requêtes ; chaque sous-requête réussit ou échoue indépendamment (pas
+de transaction commune).
+
+Avec ``parallele``, les GET consécutifs sont exécutés sur un pool de
+threads (``API_BATCH_WORKERS``), chacun avec sa propre connexion à la
+base ; une écriture attend la fin des lectures qui la précèdent.
+Dans un bloc atomique, les threads ne verraient pas les écritures non
+validées : le lot est alors exécuté séquentiellement.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, connections
+from django.urls import Resolver404, resolve
+from drf_spectacular.utils import extend_schema
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.renderers import ORJSONRenderer
+from core.serializers.batch import LotSerializer, SousReponseSerializer
+
+# En-têtes de la requête de lot non transmis aux sous-requêtes
+ENTETES_LOT = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_ACCEPT', 'HTTP_ACCEPT_ENCODING',
+               'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IDEMPOTENCY_KEY')
+
+
+class BatchView(APIView):
+
+    @extend_schema(request=LotSerializer, responses=SousReponseSerializer(many=True))
+    def post(self, request):
+        lot = LotSerializer(data=request.data)
+        lot.is_valid(raise_exception=True)
+        requetes = lot.validated_data['requetes']
+
+        if not lot.validated_data['parallele'] or connection.in_atomic_block:
+            return Response([self.executer(request, requete) for requete in requetes])
+
+        reponses = []
+        with ThreadPoolExecutor(max_workers=getattr(settings, 'API_BATCH_WORKERS', 4)) as pool:
+            lectures = []
+            for requete in requetes:
+                if requete['method'] == 'GET':
+                    lectures.append(pool.submit(self.executer_dans_thread, request, requete))
+                    continue
+                reponses += [future.result() for future in lectures]
+                lectures = []
+                reponses.append(self.executer(request, requete))
+            reponses += [future.result() for future in lectures]
+        return Response(reponses)
+
+    def executer_dans_thread(self, request, requete):
+        try:
+            return self.executer(request, requete)
+        finally:
+            # Connexions propres au thread du pool
+            connections.close_all()
+
+    def executer(self, request, requete):
+        url = urlsplit(requete['url'])
+        try:
+            correspondance = resolve(url.path)
+        except Resolver404:
+            return erreur(404, "Aucune ressource à cette adresse.")
+        nom = correspondance.url_name or ''
+        if nom == 'batch' or nom.endswith('stream'):
+            return erreur(400, "Cette ressource ne peut pas être appelée dans un lot.")
+
+        sous_requete = construire_requete(request, requete, url)
+        try:
+            response = correspondance.func(sous_requete, *correspondance.args, **correspondance.kwargs)
+            if asyncio.iscoroutine(response):
+                response = async_to_sync(attendre)(response)
+        except Exception as exc:
+            response = response_for_exception(sous_requete, exc)
+
+        if response.streaming:
+            response.close()
+            return erreur(400, "Réponse en flux non prise en charge dans un lot.")
+        return {
+            'status': response.status_code,
+            'headers': {cle: valeur for cle, valeur in response.items() if cle != 'Content-Length'},
+            'body': corps(response),
+        }
+
+
+def construire_requete(request, requete, url):
+    environ = {cle: valeur for cle, valeur in request.META.items() if cle not in ENTETES_LOT}
+    for nom, valeur in requete['headers'].items():
+        environ['HTTP_' + nom.upper().replace('-', '_')] = valeur
+    contenu = b'' if requete['body'] is None else ORJSONRenderer().render(requete['body'])
+    environ.update({
+        'REQUEST_METHOD': requete['method'],
+        'PATH_INFO': url.path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': url.query,
+        # Les corps sont rendus en JSON : la sous-réponse est relue telle quelle
+        'HTTP_ACCEPT': 'application/json',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(contenu)),
+        'wsgi.input': BytesIO(contenu),
+    })
+    sous_requete = WSGIRequest(environ)
+    sous_requete._force_auth_user = request.user
+    sous_requete._force_auth_token = request.auth
+    return sous_requete
+
+
+async def attendre(coroutine):
+    return await coroutine
+
+
+def corps(response):
+    """Contenu de la sous-réponse : ``data`` pour une réponse DRF, sinon JSON relu."""
+    if isinstance(response, Response):
+        return response.data
+    if not response.content:
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset, errors='replace')
+
+
+def erreur(statut, message):
+    return {'status': statut, 'headers': {}, 'body': {'detail': message}}
@@ -1,114 +1,190 @@
 # core/views/dashboard.py
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from core.models import Vente, Achat, Produit
-from django.db.models import Sum, Count, Avg
-from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from rest_framework.exceptions import ValidationError
+from core.models import VenteDailyRollup
+from django.db.models import F, Sum
+from django.db.models.functions import TruncWeek, TruncMonth
 from django.utils import timezone
 from datetime import timedelta
-from core.serializers.dashboard import DashboardStatsSerializer, HistoriqueVentesSerializer
-from drf_spectacular.utils import extend_schema
+from core.cache import DASHBOARD_STATS, HISTORIQUE_VENTES, snapshot
+from core.kpis import KPIS, calculer_kpis
+from core.rollups import top_clients, top_produits
+from core.series import METRIQUES, calculer_series
+from core.serializers.dashboard import (
+    DashboardStatsSerializer, HistoriqueParametresSerializer, HistoriqueVentesSerializer,
+    SeriesParametresSerializer, SeriesTemporellesSerializer,
+    TopParametresSerializer, TopProduitSerializer, TopClientSerializer
+)
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 
 class DashboardStatsView(APIView):
     """Calcule et sérialise les statistiques pour le tableau de bord"""
 
     @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='kpis',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Liste de KPI séparés par des virgules (tous par défaut) : " + ", ".join(KPIS)
+            )
+        ],
         responses=DashboardStatsSerializer
     )
     def get(self, request):
-        today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-        last_day_of_month = (first_day_of_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-
-        ventes_mois = Vente.objects.filter(
-            date__date__range=[first_day_of_month, last_day_of_month],
-            statut='PAYEE'
-        ).aggregate(total_vente=Sum('total'))['total_vente'] or 0
-
-        achats_mois = Achat.objects.filter(
-            date__date__range=[first_day_of_month, last_day_of_month],
-            statut__in=['PAYE', 'PARTIEL']
-        ).aggregate(total_achat=Sum('total'))['total_achat'] or 0
-
-        stock_total = Produit.objects.aggregate(
-            total_stock=Sum('stock_actuel')
-        )['total_stock'] or 0
-
-        data = {
-            'total_vente': float(ventes_mois),
-            'total_achat': float(achats_mois),
-            'total_stock': int(stock_total)
-        }
+        demandes = kpis_demandes(request.query_params)
+
+        # Le snapshot contient tous les KPI (une seule requête) ; on filtre ensuite
+        data, statut = snapshot(DASHBOARD_STATS, calculer_stats_dashboard)
+        response = Response(filtrer_kpis(data, demandes))
+        response['X-Cache'] = statut
+        return response
+
+
+def kpis_demandes(query_params):
+    demandes = [k for k in query_params.get('kpis', '').split(',') if k]
+    inconnus = [k for k in demandes if k not in KPIS]
+    if inconnus:
+        raise ValidationError({'kpis': f"KPI inconnu(s) : {', '.join(inconnus)}"})
+    return demandes
+
 
-        serializer = DashboardStatsSerializer(data=data)
-        serializer.is_valid(raise_exception=True)
+def filtrer_kpis(data, demandes):
+    return {k: data[k] for k in demandes} if demandes else data
 
-        return Response(serializer.data)
+
+def calculer_stats_dashboard():
+    return dict(DashboardStatsSerializer(calculer_kpis()).data)
 
 
 class HistoriqueVentesView(APIView):
     """Retourne l'historique des ventes agrégées par période"""
 
     @extend_schema(
-        parameters=[
-            {
-                "name": "jours",
-                "in": "query",
-                "required": False,
-                "schema": {
-                    "type": "integer",
-                    "default": 30
-                },
-                "description": "Nombre de jours à analyser"
-            },
-            {
-                "name": "periode",
-                "in": "query",
-                "required": False,
-                "schema": {
-                    "type": "string",
-                    "enum": ["jour", "semaine", "mois"],
-                    "default": "jour"
-                },
-                "description": "Période d'agrégation"
-            }
-        ],
+        parameters=[HistoriqueParametresSerializer],
         responses=HistoriqueVentesSerializer(many=True)
     )
     def get(self, request):
-        jours = int(request.query_params.get('jours', 30))
-        periode = request.query_params.get('periode', 'jour')
+        parametres = HistoriqueParametresSerializer(data=request.query_params)
+        parametres.is_valid(raise_exception=True)
+        jours, periode = parametres.validated_data['jours'], parametres.validated_data['periode']
+
+        data, statut = snapshot(
+            HISTORIQUE_VENTES, lambda: calculer_historique(jours, periode), variante=f"{periode}:{jours}"
+        )
+        response = Response(data)
+        response['X-Cache'] = statut
+        return response
+
+
+def calculer_historique(jours, periode):
+    date_debut, date_fin, lignes = requete_historique(jours, periode)
+    return construire_historique(jours, periode, date_debut, date_fin, lignes)
+
+
+def requete_historique(jours, periode):
+    """Retourne (date_debut, date_fin, queryset des périodes agrégées)."""
+    date_fin = timezone.now()
+    date_debut = date_fin - timedelta(days=jours)
+
+    # Agrégation à partir du rollup journalier : O(jours) et non O(ventes)
+    trunc_map = {
+        'semaine': TruncWeek,
+        'mois': TruncMonth
+    }
+    trunc_func = trunc_map.get(periode)
+    bucket = trunc_func('jour') if trunc_func else F('jour')
+
+    lignes = VenteDailyRollup.objects.filter(
+        jour__range=[timezone.localdate(date_debut), timezone.localdate(date_fin)],
+        nombre__gt=0
+    ).annotate(
+        date=bucket
+    ).values('date').annotate(
+        total_ventes=Sum('total'),
+        nombre_ventes=Sum('nombre')
+    ).order_by('date')
+    return date_debut, date_fin, lignes
+
+
+def construire_historique(jours, periode, date_debut, date_fin, lignes):
+    queryset = [
+        {
+            **ligne,
+            'montant_moyen': ligne['total_ventes'] / ligne['nombre_ventes'],
+        }
+        for ligne in lignes
+    ]
 
-        date_fin = timezone.now()
-        date_debut = date_fin - timedelta(days=jours)
+    serializer = HistoriqueVentesSerializer(queryset, many=True)
+
+    return {
+        'meta': {
+            'periode': periode,
+            'jours_analyses': jours,
+            'date_debut': date_debut,
+            'date_fin': date_fin
+        },
+        'data': serializer.data
+    }
 
-        # Sélection de la fonction de truncation
-        trunc_map = {
-            'jour': TruncDay,
-            'semaine': TruncWeek,
-            'mois': TruncMonth
-        }
-        trunc_func = trunc_map.get(periode, TruncDay)
 
-        queryset = Vente.objects.filter(
-            date__range=[date_debut, date_fin],
-            statut='PAYEE'
-        ).annotate(
-            periode=trunc_func('date')
-        ).values('periode').annotate(
-            total_ventes=Sum('total'),
-            nombre_ventes=Count('id'),
-            montant_moyen=Avg('total')
-        ).order_by('periode')
+class SeriesTemporellesView(APIView):
+    """Séries alignées et complétées par des zéros (ventes, achats, solde des flux, nombre de ventes)"""
+
+    @extend_schema(
+        parameters=[SeriesParametresSerializer],
+        responses=SeriesTemporellesSerializer
+    )
+    def get(self, request):
+        parametres = SeriesParametresSerializer(data=request.query_params)
+        parametres.is_valid(raise_exception=True)
+        p = parametres.validated_data
+        metriques = p.get('metriques') or list(METRIQUES)
+
+        resultat = calculer_series(
+            p['debut'], p['fin'], p['periode'], metriques, p['comparer']
+        )
+        return Response({
+            'meta': {
+                'periode': p['periode'],
+                'debut': p['debut'],
+                'fin': p['fin'],
+                'metriques': metriques,
+                'fuseau': timezone.get_current_timezone_name()
+            },
+            **resultat
+        })
+
+
+class TopView(APIView):
+    """Meilleurs produits ou clients sur une plage de mois, lus dans les agrégats mensuels"""
+
+    @extend_schema(
+        parameters=[TopParametresSerializer],
+        responses=TopProduitSerializer(many=True)
+    )
+    def get(self, request):
+        parametres = TopParametresSerializer(data=request.query_params)
+        parametres.is_valid(raise_exception=True)
+        p = parametres.validated_data
 
-        serializer = HistoriqueVentesSerializer(queryset, many=True)
+        if p['type'] == 'produits':
+            lignes = top_produits(p['debut'], p['fin'], p['n'], p['critere'])
+            serializer = TopProduitSerializer(lignes, many=True)
+        else:
+            lignes = top_clients(p['debut'], p['fin'], p['n'], p['critere'])
+            serializer = TopClientSerializer(lignes, many=True)
 
         return Response({
             'meta': {
-                'periode': periode,
-                'jours_analyses': jours,
-                'date_debut': date_debut,
-                'date_fin': date_fin
+                'type': p['type'],
+                'critere': p['critere'],
+                'debut': p['debut'].strftime('%Y-%m'),
+                'fin': p['fin'].strftime('%Y-%m'),
+                'n': p['n']
             },
             'data': serializer.data
-        })
\ No newline at end of file
+        })
@@ -0,0 +1,55 @@
+# core/views/live.py
+"""
+Flux Server-Sent Events du tableau de bord (nécessite un serveur ASGI).
+
+Sous WSGI, Django consommerait le générateur asynchrone infini de façon
+synchrone et chaque client occuperait un worker en permanence : le flux
+y répond 501 et le client se rabat sur GET /api/dashboard-stats/.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from core.events import broadcaster, diffuseur_kpi
+from core.views.asynchrone import authentifier, non_authentifie, reponse_json
+from core.views.dashboard import calculer_stats_dashboard
+
+INTERVALLE_PING = 15  # secondes
+
+
+def _evenement(nom, donnees):
+    return f"event: {nom}\ndata: {json.dumps(donnees)}\n\n"
+
+
+async def _flux(file):
+    try:
+        # État complet à la connexion, puis uniquement les KPI modifiés
+        yield _evenement("snapshot", await sync_to_async(calculer_stats_dashboard)())
+        while True:
+            try:
+                message = await asyncio.wait_for(file.get(), timeout=INTERVALLE_PING)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield _evenement(message["type"], message["kpis"])
+    finally:
+        broadcaster.desabonner(file)
+
+
+async def flux_dashboard(request):
+    """GET /api/dashboard-stats/stream/ : pousse les deltas de KPI à chaque changement validé."""
+    if request.method != "GET":
+        return reponse_json({"detail": "Méthode non autorisée."}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return reponse_json({"detail": "Flux temps réel disponible uniquement sous un serveur ASGI."}, status=501)
+    if await authentifier(request) is None:
+        return non_authentifie()
+
+    diffuseur_kpi.demarrer()
+    response = StreamingHttpResponse(_flux(broadcaster.abonner()), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,275 @@
+# core/views/mixins.py
+from hashlib import sha1
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Max, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core.cache import snapshot
+from core.idempotence import idempotent
+from core.lecture_rapide import PlanLecture
+from core.pagination import KeysetPagination
+from core.renderers import NDJSONRenderer, ORJSONRenderer
+from core.serializers.mixins import champs_demandes
+
+
+def pagination_par_cle(vue):
+    return isinstance(vue.paginator, KeysetPagination)
+
+
+class ListeEnCacheMixin:
+    """
+    Sert la liste non filtrée d'un ViewSet depuis un snapshot versionné du
+    cache (``nom_cache_liste``), invalidé par core.signals. Toute requête
+    portant des paramètres (recherche, filtres, curseur) passe par la base.
+
+    Avec la pagination par clé, le snapshot contient la première page et la
+    position de la suivante ; les liens sont reconstruits à chaque requête.
+    """
+    nom_cache_liste = None
+
+    def list(self, request, *args, **kwargs):
+        if self.nom_cache_liste is None or request.query_params:
+            return super().list(request, *args, **kwargs)
+        data, statut = snapshot(self.nom_cache_liste, self.calculer_liste)
+        if pagination_par_cle(self):
+            response = self.paginator.reponse_premiere_page(request, data['results'], data['suivante'])
+        else:
+            response = Response(data)
+        response['X-Cache'] = statut
+        return response
+
+    def calculer_liste(self):
+        # Liste non filtrée : les filter backends n'ont rien à appliquer
+        queryset = self.get_queryset()
+        if not pagination_par_cle(self):
+            return list(self.get_serializer(queryset, many=True).data)
+        pagination = self.paginator
+        objets, suivante, _ = pagination.paginer(
+            queryset, pagination.get_ordering(queryset, self), pagination.page_size
+        )
+        return {'results': list(self.get_serializer(objets, many=True).data), 'suivante': suivante}
+
+    @classmethod
+    def liste_pour_cache(cls):
+        """Calcule la liste hors requête HTTP (préchauffage du cache)."""
+        vue = cls(action='list', format_kwarg=None, kwargs={})
+        vue.request = None
+        return vue.calculer_liste()
+
+
+class ColonnesDemandeesMixin:
+    """
+    Complète ``ChampsDemandesMixin`` côté base : lorsque ``?fields=`` ou
+    ``?omit=`` est présent, le queryset ne charge que les colonnes des champs
+    restants (``only()``) et abandonne les ``select_related`` /
+    ``prefetch_related`` devenus inutiles.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, omit = champs_demandes(getattr(self, 'request', None))
+        if fields is None and omit is None:
+            return queryset
+        ordering = self.paginator.get_ordering(queryset, self) if pagination_par_cle(self) else ()
+        return restreindre_queryset(
+            queryset,
+            self.get_serializer()._readable_fields,
+            [nom.lstrip('-') for nom in ordering],
+        )
+
+
+class LectureRapideMixin:
+    """
+    Sert les listes (GET) via ``core.lecture_rapide`` : lignes ``values()``
+    et convertisseurs précompilés au lieu d'instances de modèles passées au
+    sérialiseur. La sortie est identique ; si le sérialiseur comporte un
+    champ non pris en charge, la liste classique est utilisée.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = PlanLecture.depuis_serializer(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = self.paginator.get_ordering(queryset, self) if pagination_par_cle(self) else ()
+        lignes = queryset.select_related(None).prefetch_related(None).values(
+            *plan.colonnes(*(nom.lstrip('-') for nom in ordering))
+        )
+        page = self.paginate_queryset(lignes)
+        if page is not None:
+            return self.get_paginated_response(plan.construire(page))
+        return Response(plan.construire(lignes))
+
+
+class ExportFluxMixin:
+    """
+    Action ``GET .../stream/`` : toute la liste (filtres et ``?fields=``
+    compris, sans pagination), parcourue par ``iterator()`` et émise au fil
+    de l'eau, en tableau JSON ou en NDJSON (``Accept: application/x-ndjson``
+    ou ``?format=ndjson``). La mémoire reste bornée par la taille d'un lot
+    (``API_STREAM_CHUNK``), quel que soit le nombre de lignes.
+    """
+
+    @action(detail=False, methods=['get'], url_path='stream', renderer_classes=[ORJSONRenderer, NDJSONRenderer])
+    def stream(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if pagination_par_cle(self):
+            queryset = queryset.order_by(*self.paginator.get_ordering(queryset, self))
+        lots = self.lots_serialises(queryset, getattr(settings, 'API_STREAM_CHUNK', 2000))
+        ndjson = request.accepted_renderer.format == 'ndjson'
+        return StreamingHttpResponse(
+            self._ndjson(lots) if ndjson else self._tableau(lots),
+            content_type=request.accepted_renderer.media_type,
+        )
+
+    def lots_serialises(self, queryset, taille):
+        """Représentations par lots de ``taille`` lignes (lecture rapide si possible)."""
+        plan = PlanLecture.depuis_serializer(self.get_serializer())
+        if plan is None:
+            lignes = queryset.iterator(chunk_size=taille)
+            while lot := list(islice(lignes, taille)):
+                yield self.get_serializer(lot, many=True).data
+            return
+
+        ordering = self.paginator.get_ordering(queryset, self) if pagination_par_cle(self) else ()
+        lignes = queryset.select_related(None).prefetch_related(None).values(
+            *plan.colonnes(*(nom.lstrip('-') for nom in ordering))
+        ).iterator(chunk_size=taille)
+        while lot := list(islice(lignes, taille)):
+            yield plan.construire(lot)
+
+    @staticmethod
+    def _tableau(lots):
+        rendu = ORJSONRenderer().render
+        yield b'['
+        premier = True
+        for lot in lots:
+            for ligne in lot:
+                yield rendu(ligne) if premier else b',' + rendu(ligne)
+                premier = False
+        yield b']'
+
+    @staticmethod
+    def _ndjson(lots):
+        rendu = NDJSONRenderer().render
+        for lot in lots:
+            yield b''.join(rendu(ligne) for ligne in lot)
+
+
+class IdempotenceMixin:
+    """Création rejouable sans doublon avec l'en-tête ``Idempotency-Key`` (voir core.idempotence)."""
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
+
+class ReponseConditionnelleMixin:
+    """
+    GET conditionnels (``If-None-Match`` / ``If-Modified-Since``) sur la
+    liste et le détail. Les validateurs viennent d'une seule requête
+    d'agrégat sur le queryset filtré : ``COUNT`` et ``MAX`` des colonnes
+    ``champs_empreinte`` (y compris celles des objets imbriqués dans la
+    représentation), combinés à l'URL complète et au type de média négocié.
+    Une correspondance renvoie 304 avant toute sérialisation.
+
+    ``Last-Modified`` n'est servi que sur le détail : une suppression (ou
+    une ligne qui sort du filtre) laisse ``MAX(updated_at)`` inchangé, et
+    seul le ``COUNT`` de l'ETag la signale. Sur une liste, seul
+    ``If-None-Match`` peut donc produire un 304.
+    """
+    champs_empreinte = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self._conditionnel(request, queryset, super().list, *args, avec_date=False, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup]})
+        return self._conditionnel(request, queryset, super().retrieve, *args, **kwargs)
+
+    def validateurs(self, request, queryset):
+        """Retourne ``(etag, derniere_modification)`` pour ``queryset``."""
+        agregats = queryset.order_by().aggregate(
+            nombre=Count('pk'),
+            **{f'max_{i}': Max(champ) for i, champ in enumerate(self.champs_empreinte)},
+        )
+        nombre = agregats.pop('nombre')
+        dates = [d for d in agregats.values() if d is not None]
+        derniere = max(dates) if dates else None
+        cle = '|'.join([
+            queryset.model._meta.label,
+            str(nombre),
+            derniere.isoformat() if derniere else '',
+            request.get_full_path(),
+            request.accepted_media_type or '',
+        ])
+        return 'W/' + quote_etag(sha1(cle.encode()).hexdigest()), derniere
+
+    def _conditionnel(self, request, queryset, vue, *args, avec_date=True, **kwargs):
+        etag, derniere = self.validateurs(request, queryset)
+        modification = int(derniere.timestamp()) if derniere and avec_date else None
+        response = get_conditional_response(request, etag=etag, last_modified=modification)
+        if response is None:
+            response = vue(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if modification is not None:
+            response['Last-Modified'] = http_date(modification)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+
+def _chemins(arbre, prefixe=''):
+    """Aplatit l'arbre ``query.select_related`` en lookups ``a__b``."""
+    for nom, enfants in arbre.items():
+        yield prefixe + nom
+        yield from _chemins(enfants, f"{prefixe}{nom}__")
+
+
+def restreindre_queryset(queryset, champs, obligatoires=()):
+    """
+    Limite ``queryset`` aux colonnes lues par ``champs`` (champs de
+    sérialiseur lisibles) et aux relations qu'ils traversent. Si un champ
+    lit autre chose qu'un champ de modèle (propriété, source ``*``), le
+    queryset est rendu tel quel.
+    """
+    select = queryset.query.select_related
+    if select is True:
+        return queryset
+
+    colonnes, relations = set(obligatoires), set()
+    for champ in champs:
+        if champ.source == '*':
+            return queryset
+        nom = champ.source.split('.')[0]
+        try:
+            champ_modele = queryset.model._meta.get_field(nom)
+        except FieldDoesNotExist:
+            return queryset
+        if champ_modele.concrete:
+            colonnes.add(champ_modele.name)
+        if champ_modele.is_relation:
+            relations.add(nom)
+
+    premier = lambda chemin: chemin.split('__')[0]
+    selects = [c for c in _chemins(select or {}) if premier(c) in relations]
+    prefetches = [
+        p for p in queryset._prefetch_related_lookups
+        if premier(p.prefetch_through if isinstance(p, Prefetch) else p) in relations
+    ]
+    queryset = queryset.select_related(None).prefetch_related(None).prefetch_related(*prefetches)
+    if selects:
+        # select_related() sans argument suivrait toutes les clés étrangères
+        queryset = queryset.select_related(*selects)
+    return queryset.only(*colonnes)
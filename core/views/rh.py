@@ -2,14 +2,15 @@ from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from core.models import Employe, Salaire
 from core.serializers import EmployeSerializer, SalaireSerializer
+from core.views.mixins import ColonnesDemandeesMixin, IdempotenceMixin, ReponseConditionnelleMixin
 
-class EmployeViewSet(viewsets.ModelViewSet):
+class EmployeViewSet(IdempotenceMixin, ReponseConditionnelleMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet):
     queryset = Employe.objects.all()
     serializer_class = EmployeSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["nom","poste"]
 
-class SalaireViewSet(viewsets.ModelViewSet):
+class SalaireViewSet(IdempotenceMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet):
     queryset = Salaire.objects.select_related("employe")
     serializer_class = SalaireSerializer
     filter_backends = [DjangoFilterBackend]
@@ -1,25 +1,42 @@
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from core.cache import REFERENCE_CATEGORIES, REFERENCE_PRODUITS
+from core.filters import MouvementStockFilterSet
+from core.pagination import EstimatedCountPagination
 from core.models import CategorieProduit, Produit, MouvementStock
 from core.serializers import (
     CategorieProduitSerializer, ProduitSerializer, MouvementStockSerializer
 )
+from core.views.mixins import (
+    ColonnesDemandeesMixin, ExportFluxMixin, IdempotenceMixin, LectureRapideMixin, ListeEnCacheMixin,
+    ReponseConditionnelleMixin
+)
 
-class CategorieProduitViewSet(viewsets.ModelViewSet):
+class CategorieProduitViewSet(
+    IdempotenceMixin, ReponseConditionnelleMixin, ListeEnCacheMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet
+):
+    nom_cache_liste = REFERENCE_CATEGORIES
     queryset = CategorieProduit.objects.all()
     serializer_class = CategorieProduitSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["nom"]
 
-class ProduitViewSet(viewsets.ModelViewSet):
-    queryset = Produit.objects.all()
+class ProduitViewSet(
+    IdempotenceMixin, ReponseConditionnelleMixin, ListeEnCacheMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet
+):
+    nom_cache_liste = REFERENCE_PRODUITS
+    queryset = Produit.objects.select_related("categorie")
+    champs_empreinte = ("updated_at", "categorie__updated_at")
     serializer_class = ProduitSerializer
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ["nom"]
     filterset_fields = ["categorie"]
 
-class MouvementStockViewSet(viewsets.ReadOnlyModelViewSet):
+class MouvementStockViewSet(
+    ExportFluxMixin, LectureRapideMixin, ColonnesDemandeesMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = MouvementStock.objects.select_related("produit")
     serializer_class = MouvementStockSerializer
+    pagination_class = EstimatedCountPagination
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["produit","type","date"]
+    filterset_class = MouvementStockFilterSet
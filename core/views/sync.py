@@ -0,0 +1,103 @@
+# core/views/sync.py
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from core.pagination import _page_size_max
+from core.sync import RESSOURCES, changements_depuis, ecrire_jeton, lire_jeton
+from core.views import achat, rh, stock, vente
+
+# Ressource -> ViewSet dont on reprend le queryset et le sérialiseur
+VUES = {
+    'categories': stock.CategorieProduitViewSet,
+    'produits': stock.ProduitViewSet,
+    'clients': vente.ClientViewSet,
+    'fournisseurs': achat.FournisseurViewSet,
+    'employes': rh.EmployeViewSet,
+}
+
+
+class SyncView(APIView):
+    """
+    Changements des données de référence depuis un jeton de synchronisation
+    (voir core.sync). Sans ``since``, tout le catalogue est servi. Tant que
+    ``encore`` est vrai, le client rappelle avec le ``jeton`` reçu ; il le
+    conserve ensuite pour la prochaine reconnexion.
+
+    Un objet journalisé qui ne figure plus dans le queryset de sa vue est
+    servi comme supprimé.
+    """
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='since',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description='Jeton renvoyé par la synchronisation précédente (0 ou absent : tout le catalogue)'
+            ),
+            OpenApiParameter(
+                name='ressources',
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Ressources séparées par des virgules (toutes par défaut) : " + ", ".join(RESSOURCES)
+                            + ". Le jeton obtenu ne vaut que pour cette sélection."
+            ),
+            OpenApiParameter(
+                name='page_size',
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description='Nombre maximal de changements par réponse'
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            position = lire_jeton(params.get('since', 0))
+        except ValueError:
+            raise ValidationError({'since': "Jeton de synchronisation invalide."})
+        taille = self.entier(params, 'page_size', api_settings.PAGE_SIZE, plafond=_page_size_max(), strict=True)
+        ressources = ressources_demandees(params)
+
+        changements, position, encore = changements_depuis(position, taille, ressources)
+        return Response({
+            'jeton': ecrire_jeton(position),
+            'encore': encore,
+            'changements': {
+                ressource: self.representer(ressource, modifies, supprimes)
+                for ressource, (modifies, supprimes) in changements.items()
+            },
+        })
+
+    @staticmethod
+    def entier(params, nom, defaut, plafond=None, strict=False):
+        if nom not in params:
+            return defaut
+        try:
+            return _positive_int(params[nom], strict=strict, cutoff=plafond)
+        except ValueError:
+            raise ValidationError({nom: "Entier positif attendu."})
+
+    @staticmethod
+    def representer(ressource, modifies, supprimes):
+        vue = VUES[ressource]
+        objets = list(vue.queryset.filter(pk__in=modifies).order_by('pk'))
+        presents = {objet.pk for objet in objets}
+        return {
+            'modifies': vue.serializer_class(objets, many=True).data,
+            'supprimes': supprimes + [pk for pk in modifies if pk not in presents],
+        }
+
+
+def ressources_demandees(params):
+    demandees = [r for r in params.get('ressources', '').split(',') if r]
+    inconnues = [r for r in demandees if r not in RESSOURCES]
+    if inconnues:
+        raise ValidationError({'ressources': f"Ressource(s) inconnue(s) : {', '.join(inconnues)}"})
+    return demandees or None
@@ -1,10 +1,16 @@
 from rest_framework import viewsets
 from django_filters.rest_framework import DjangoFilterBackend
+from core.filters import TransactionFilterSet
+from core.pagination import EstimatedCountPagination
 from core.models import Transaction
 from core.serializers import TransactionSerializer
+from core.views.mixins import ColonnesDemandeesMixin, ExportFluxMixin, LectureRapideMixin
 
-class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
+class TransactionViewSet(
+    ExportFluxMixin, LectureRapideMixin, ColonnesDemandeesMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
+    pagination_class = EstimatedCountPagination
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ["type","module","date"]
+    filterset_class = TransactionFilterSet
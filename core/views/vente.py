@@ -1,17 +1,80 @@
+from django.conf import settings
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from core.models import Client, Vente
+from drf_spectacular.utils import extend_schema
+from core.idempotence import idempotent
+from core.models import Client, Produit, Vente
+from core.renderers import MessagePackParser, NDJSONParser, ORJSONParser
 from core.serializers import ClientSerializer, VenteSerializer
+from core.serializers.mixins import precharger
+from core.serializers.vente import ResultatLotSerializer
+from core.services import enregistrer_ventes, supprimer_vente
+from core.views.mixins import ColonnesDemandeesMixin, IdempotenceMixin, LectureRapideMixin, ReponseConditionnelleMixin
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(IdempotenceMixin, ReponseConditionnelleMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["nom","telephone","email"]
 
-class VenteViewSet(viewsets.ModelViewSet):
+class VenteViewSet(IdempotenceMixin, LectureRapideMixin, ColonnesDemandeesMixin, viewsets.ModelViewSet):
     queryset = Vente.objects.select_related("client").prefetch_related("lignes__produit")
     serializer_class = VenteSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ["statut","client"]
     search_fields = ["id"]
+
+    def perform_destroy(self, instance):
+        # Stock, mouvements, audit et solde client contre-passés (core.services)
+        supprimer_vente(instance, utilisateur=self.request.user)
+
+    @extend_schema(request=VenteSerializer(many=True), responses=ResultatLotSerializer)
+    @action(detail=False, methods=["post"], url_path="bulk",
+            parser_classes=[ORJSONParser, NDJSONParser, MessagePackParser])
+    @idempotent
+    def bulk(self, request):
+        """
+        Crée un lot de ventes (liste JSON ou msgpack, ou une vente par ligne
+        en NDJSON). Clients et produits de tout le lot sont chargés en deux
+        requêtes avant la validation ; chaque vente est acceptée ou refusée
+        seule, et ``resultats`` donne l'issue de chacune, dans l'ordre.
+        """
+        elements = request.data
+        if not isinstance(elements, list):
+            raise ValidationError({"detail": "Liste de ventes attendue."})
+        maximum = getattr(settings, "API_BULK_MAX", 5000)
+        if len(elements) > maximum:
+            raise ValidationError({"detail": f"{maximum} ventes au plus par lot."})
+
+        contexte = self.get_serializer_context()
+        ventes = [element for element in elements if isinstance(element, dict)]
+        precharger(contexte, Client.objects.all(), (vente.get("client_id") for vente in ventes))
+        precharger(contexte, Produit.objects.all(), (
+            ligne.get("produit_id")
+            for vente in ventes if isinstance(vente.get("lignes"), list)
+            for ligne in vente["lignes"] if isinstance(ligne, dict)
+        ))
+
+        resultats, valides = {}, []
+        for index, element in enumerate(elements):
+            serializer = self.get_serializer_class()(data=element, context=contexte)
+            if serializer.is_valid():
+                valides.append((index, serializer.validated_data))
+            else:
+                resultats[index] = ValidationError(serializer.errors)
+        resultats.update(enregistrer_ventes(
+            valides, utilisateur=request.user, taille_tranche=getattr(settings, "API_BULK_CHUNK", 500),
+        ))
+
+        issues = [issue_du_lot(index, resultats[index]) for index in range(len(elements))]
+        crees = sum(issue["status"] == 201 for issue in issues)
+        return Response({"crees": crees, "refusees": len(issues) - crees, "resultats": issues})
+
+
+def issue_du_lot(index, resultat):
+    if isinstance(resultat, Vente):
+        return {"index": index, "status": 201, "id": resultat.pk}
+    return {"index": index, "status": resultat.status_code, "erreurs": resultat.detail}
@@ -98,6 +98,7 @@ INSTALLED_APPS = [
 # ─────────────────────────────────────────────
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -123,6 +124,9 @@ if ENV == "prod":
             "PASSWORD": os.getenv("DB_PASSWORD", "postgres"),
             "HOST": os.getenv("DB_HOST", "db"),
             "PORT": os.getenv("DB_PORT", "5432"),
+            # Connexions persistantes (secondes) : réutilisées entre autres par les threads des KPI asynchrones
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "0")),
+            "CONN_HEALTH_CHECKS": True,
         }
     }
 else:
@@ -133,6 +137,36 @@ else:
         }
     }
 
+# ─────────────────────────────────────────────
+# 7 bis. Cache
+# ─────────────────────────────────────────────
+# En production avec plusieurs workers, utiliser un backend partagé
+# (fichiers, Redis, Memcached) pour que l'invalidation soit visible de tous.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache"
+            if ENV == "prod"
+            else "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv(
+            "CACHE_LOCATION",
+            "/tmp/mutooni-cache" if ENV == "prod" else "mutooni",
+        ),
+    }
+}
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", 300))  # secondes
+DASHBOARD_CACHE_DEBOUNCE = float(os.getenv("DASHBOARD_CACHE_DEBOUNCE", 2))  # secondes
+
+# Vues asynchrones du tableau de bord (à activer pour un déploiement ASGI)
+DASHBOARD_ASYNC_VIEWS = os.getenv("DASHBOARD_ASYNC_VIEWS", "False") == "True"
+
+# Flux temps réel (SSE) : LocalBackend = un seul processus,
+# core.events.PostgresNotifyBackend = partagé entre workers via LISTEN/NOTIFY
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "core.events.LocalBackend")
+EVENTS_COALESCE = float(os.getenv("EVENTS_COALESCE", 0.5))  # secondes
+
 # ─────────────────────────────────────────────
 # 8. Authentification & API REST (inchangé)
 # ─────────────────────────────────────────────
@@ -152,7 +186,35 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # JSON encodé/décodé par orjson (repli automatique sur json si absent) ;
+    # MessagePack sur demande (Accept / Content-Type: application/msgpack)
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.ORJSONRenderer",
+        "core.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.renderers.ORJSONParser",
+        "core.renderers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    # Pagination par clé (curseur) ; ?page=N active la pagination par décalage
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", 50)),
 }
+API_PAGE_SIZE_MAX = int(os.getenv("API_PAGE_SIZE_MAX", 500))  # plafond de ?page_size=
+API_COUNT_MAX = int(os.getenv("API_COUNT_MAX", 10000))  # au-delà, total estimé (PostgreSQL)
+API_STREAM_CHUNK = int(os.getenv("API_STREAM_CHUNK", 2000))  # lignes par lot des exports .../stream/
+API_BATCH_MAX = int(os.getenv("API_BATCH_MAX", 20))  # sous-requêtes par appel à /api/batch/
+API_BATCH_WORKERS = int(os.getenv("API_BATCH_WORKERS", 4))  # threads des GET exécutés en parallèle
+API_BULK_MAX = int(os.getenv("API_BULK_MAX", 5000))  # ventes par appel à /api/ventes/bulk/
+API_BULK_CHUNK = int(os.getenv("API_BULK_CHUNK", 500))  # ventes par transaction d'un lot
+API_IDEMPOTENCE_TTL = int(os.getenv("API_IDEMPOTENCE_TTL", 24))  # heures de conservation des Idempotency-Key
+API_IDEMPOTENCE_ATTENTE = int(os.getenv("API_IDEMPOTENCE_ATTENTE", 10))  # secondes d'attente d'une requête concurrente
+API_COMPRESSION_MIN_KB = int(os.getenv("API_COMPRESSION_MIN_KB", 1))  # en deçà, réponse non compressée
+API_COMPRESSION_GZIP_LEVEL = int(os.getenv("API_COMPRESSION_GZIP_LEVEL", 6))
+API_COMPRESSION_ZSTD_LEVEL = int(os.getenv("API_COMPRESSION_ZSTD_LEVEL", 3))
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
@@ -218,7 +280,10 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
     "authorization",
     "content-type",
     "x-requested-with",
+    "if-none-match",
+    "if-modified-since",
 ]
+CORS_EXPOSE_HEADERS = ["etag", "last-modified", "x-cache"]
 CORS_ALLOW_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
 CSRF_TRUSTED_ORIGINS = [
     "https://9800-firebase-mutconi-back-1751236955562.cluster-16.widperq5ebaqo3gy4ksvoqom.cloudworkstations.dev",